@@ -0,0 +1,114 @@
+"""
+arm_link.py
+
+Streams tag positions from the pose loop to the arm simulation's IK
+(robot-arm-3d-sim/src/target_stream.py). Each frame's target tag is moved into the arm base
+frame with the camera-to-base extrinsic (camera_to_base.yaml), then submitted to an
+IkTargetStream. The stream solves on its own thread and skips targets that went stale
+while IK was busy.
+
+Every solved target carries its latency breakdown, from frame capture to IK solution:
+  capture_wait  capture -> detection start (queueing, color conversion)
+  undistort     remap, with --undistort
+  detect        detectMarkers
+  pnp           solvePnP for every tag in the frame
+  transform     camera -> base transform
+  ik_wait       waiting for the IK thread
+  ik            IK solve
+  total         capture -> IK solution
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+SIM_ROOT = Path(__file__).resolve().parents[2] / "robot-arm-3d-sim"
+DEFAULT_ARM_CONFIG = SIM_ROOT / "configs" / "robot_arm.yaml"
+DEFAULT_EXTRINSIC_YAML = Path(__file__).resolve().parent / "camera_to_base.yaml"
+
+
+def load_camera_to_base(yaml_path: Path):
+    """(R (3, 3), t (3, 1)) with p_base = R @ p_camera + t."""
+    with open(yaml_path, "r") as f:
+        data = yaml.safe_load(f)
+    R = np.array(data["rotation"], dtype=np.float64).reshape(3, 3)
+    if not np.allclose(R @ R.T, np.eye(3), atol=1e-6) or np.linalg.det(R) < 0:
+        raise ValueError(f"{yaml_path}: rotation is not a proper rotation matrix")
+    t = np.array(data["translation_m"], dtype=np.float64).reshape(3, 1)
+    return R, t
+
+
+def add_sim_to_path():
+    """Make robot-arm-3d-sim/src importable (target_stream, startup_profile)."""
+    if not (SIM_ROOT / "src" / "target_stream.py").exists():
+        raise FileNotFoundError(f"Arm simulation not found at {SIM_ROOT}")
+    if str(SIM_ROOT / "src") not in sys.path:
+        sys.path.insert(0, str(SIM_ROOT / "src"))
+
+
+class ArmTargetStage:
+    """
+    tag_id:  tag to follow; None follows the nearest tag in each frame
+    max_age_s: longest a target may wait for IK after submit (from detection, not capture);
+               overrides simulation.ik.stream.max_age_s from the arm config
+    """
+
+    def __init__(self, extrinsic_yaml: Path = DEFAULT_EXTRINSIC_YAML, arm_config: Path = DEFAULT_ARM_CONFIG,
+                 tag_id: int = None, max_age_s: float = None):
+        add_sim_to_path()
+        from target_stream import IkTargetStream
+
+        self.R, self.t = load_camera_to_base(extrinsic_yaml)
+        self.tag_id = tag_id
+        kwargs = {} if max_age_s is None else {"max_age_s": max_age_s}
+        self.stream = IkTargetStream.from_config(arm_config, **kwargs)
+        self.frames = 0
+        self.without_target = 0
+        self._lock = threading.Lock()
+
+    def pick(self, poses):
+        if self.tag_id is not None:
+            return next((p for p in poses if p.id == self.tag_id), None)
+        return min(poses, key=lambda p: p.distance, default=None)
+
+    def submit(self, poses, captured_at: float, timings: dict) -> None:
+        """Called once per processed frame with its poses, capture time and stage timings."""
+        t0 = time.perf_counter()
+        with self._lock:
+            self.frames += 1
+        pose = self.pick(poses)
+        if pose is None:
+            with self._lock:
+                self.without_target += 1
+            return
+        target = (self.R @ np.asarray(pose.tvec, dtype=np.float64).reshape(3, 1) + self.t).reshape(3)
+        t1 = time.perf_counter()
+        upstream = {"undistort": timings.get("undistort_ms"), "detect": timings.get("detect_ms"),
+                    "pnp": timings.get("pose_ms")}
+        upstream = {name: ms for name, ms in upstream.items() if ms is not None}
+        stages = {"capture_wait": max((t0 - captured_at) * 1000.0 - sum(upstream.values()), 0.0)}
+        stages.update(upstream)
+        stages["transform"] = (t1 - t0) * 1000.0
+        self.stream.submit(target, created_at=captured_at, stages_ms=stages)
+
+    def close(self) -> None:
+        """Let the last target finish; re-raises an IK or callback error from the stream."""
+        try:
+            self.stream.wait_idle(timeout=1.0)
+        finally:
+            self.stream.close()
+
+    def report(self) -> str:
+        s = self.stream
+        latest = s.latest
+        lines = [f"Arm targets: {self.frames} frames, {self.without_target} without the target tag"]
+        if latest is not None:
+            x, y, z = latest.sample.target_xyz_m
+            lines.append(f"Last target (base frame): ({x:+.3f}, {y:+.3f}, {z:+.3f}) m, "
+                         f"IK {'converged' if latest.converged else 'did not converge'}")
+        lines.append(s.report())
+        return "\n".join(lines)
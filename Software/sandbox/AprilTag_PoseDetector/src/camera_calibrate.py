@@ -1,90 +1,278 @@
+import argparse
 import cv2
 import numpy as np
+import os
+import shutil
+import time
 import yaml
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
+from chessboard import (DEFAULT_MAX_WIDTH, ChessboardWorker, IncrementalCalibration, board_object_points,
+                        detect_image_file, list_images, refine_corners)
+from frame_sources import ResultWriter, add_source_args, open_source
+
+CALIB_CSV_FIELDS = ["frame", "time_s", "found", "captured", "captures", "detect_ms"]
+
+def save_calibration(result, image_size, out_yaml, names=()):
+    w, h = image_size
+    data = {
+        "camera_matrix": result.K.tolist(),
+        "dist_coeffs": result.dist.flatten().tolist(),
+        "reprojection_error": float(result.rms),
+        "image_size": [int(w), int(h)],
+        "per_view_errors": [round(float(e), 4) for e in result.per_view_errors],
+    }
+    if names and all(names):
+        data["views"] = [str(n) for n in names]
+    with open(out_yaml, "w") as f:
+        yaml.safe_dump(data, f)
+
+    print(f"Saved calibration to {out_yaml}")
+    print(f"Reprojection error: {result.rms}")
+
+def print_view_errors(result, names, top=10):
+    order = np.argsort(result.per_view_errors)[::-1]
+    print(f"Per-view reprojection error (px), worst {min(top, len(order))} of {len(order)}:")
+    for i in order[:top]:
+        print(f"  #{i:3d} {result.per_view_errors[i]:.3f}  {names[i]}")
+
+def finish_calibration(calib, max_view_error, min_views):
+    """
+    Wait for the solve over the current views, then drop the worst view while it is above
+    max_view_error (px) and more than min_views remain. Returns the final result.
+    """
+    result = calib.wait()
+    while max_view_error and result is not None and len(calib) > min_views:
+        worst = calib.worst_view()
+        if worst is None or worst[1] <= max_view_error:
+            break
+        i, err = worst
+        print(f"Dropping view #{i} ({calib.names[i] or 'unsaved'}): {err:.3f} px > {max_view_error} px")
+        calib.remove(i)
+        result = calib.wait()
+    return result
+
+def run_batch(args, pattern, objp, out_yaml):
+    """Offline calibration over an image folder; corner extraction in a process pool."""
+    files = list_images(args.images)
+    if not files:
+        print(f"No images found in {args.images}")
+        return
+    t0 = time.perf_counter()
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            chunk = max(1, len(files) // (4 * args.jobs))
+            results = list(pool.map(detect_image_file, files, repeat(pattern), repeat(args.max_width),
+                                    chunksize=chunk))
+    else:
+        results = [detect_image_file(f, pattern, args.max_width) for f in files]
+    elapsed = time.perf_counter() - t0
+
+    views = [(path, corners) for path, _, corners in results if corners is not None]
+    sizes = {size for _, size, corners in results if corners is not None}
+    print(f"Chessboard found in {len(views)}/{len(files)} images in {elapsed:.2f} s "
+          f"({elapsed * 1000.0 / len(files):.1f} ms/image, {args.jobs} process(es))")
+    if len(sizes) > 1:
+        raise ValueError(f"Images have different sizes: {sorted(sizes)}")
+    if len(views) < args.min_captures:
+        print(f"Only {len(views)} usable images; need at least {args.min_captures} for decent calibration.")
+        return
+
+    image_size = sizes.pop()
+    calib = IncrementalCalibration(objp, image_size, min_views=args.min_captures)
+    try:
+        calib.extend(views)
+        t0 = time.perf_counter()
+        result = finish_calibration(calib, args.max_view_error, args.min_captures)
+        if result is None:
+            print("Calibration failed; nothing saved.")
+            return
+        print(f"Calibrated {len(calib)} views in {time.perf_counter() - t0:.2f} s")
+        print_view_errors(result, calib.names)
+        save_calibration(result, image_size, out_yaml, calib.names)
+    finally:
+        calib.close()
+
 def main():
+    ap = argparse.ArgumentParser(description="Chessboard camera calibration")
+    ap.add_argument("--cam-index", type=int, default=0)
+    add_source_args(ap)
+    ap.add_argument("--out", type=Path, default=None,
+                    help="Write per-frame detection results (.csv or JSONL)")
+    ap.add_argument("--capture-every", type=int, default=10,
+                    help="With --no-display, capture every Nth frame where the board is found")
+    ap.add_argument("--min-captures", type=int, default=10)
+    ap.add_argument("--save-dir", type=Path, default=None,
+                    help="Save every captured frame here as PNG (for re-running offline with --images)")
+    ap.add_argument("--images", type=Path, default=None,
+                    help="Calibrate offline from a folder of saved captures instead of a camera/source")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                    help="Processes for corner extraction (--images)")
+    ap.add_argument("--max-width", type=int, default=DEFAULT_MAX_WIDTH,
+                    help="Detect the board on frames downscaled to this width; 0 for full resolution")
+    ap.add_argument("--max-view-error", type=float, default=None,
+                    help="Before the final solve, drop views whose reprojection error (px) is above this")
+    args = ap.parse_args()
+
     # === CONFIG ===
-    cam_index = 0
     chessboard_size = (9, 6)   # inner corners (columns, rows)
     square_size_m = 0.0245     # <-- SET THIS: physical chessboard square size in meters
 
     out_yaml = Path(__file__).parent / "camera.yaml"
 
-    # Prepare object points (0,0,0), (1,0,0) ... scaled by square_size_m
-    objp = np.zeros((chessboard_size[0] * chessboard_size[1], 3), np.float32)
-    objp[:, :2] = np.mgrid[0:chessboard_size[0], 0:chessboard_size[1]].T.reshape(-1, 2)
-    objp *= square_size_m
+    # Object points (0,0,0), (1,0,0) ... scaled by square_size_m
+    objp = board_object_points(chessboard_size, square_size_m)
 
-    objpoints = []
-    imgpoints = []
+    if args.images is not None:
+        run_batch(args, chessboard_size, objp, out_yaml)
+        return
 
-    cap = cv2.VideoCapture(cam_index)
+    cap = open_source(args.source, args.cam_index, args.max_fps, args.as_fast_as_possible)
     if not cap.isOpened():
         raise RuntimeError("Could not open webcam.")
+    writer = ResultWriter(args.out, CALIB_CSV_FIELDS) if args.out else None
+    if args.save_dir is not None:
+        args.save_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.no_display:
+        print(f"Calibration capture: every {args.capture_every}th frame with the chessboard found; "
+              "calibrates when the source ends")
+    else:
+        print("Calibration capture:")
+        print(" - Press SPACE to capture a frame when chessboard is detected")
+        print(" - Press d to drop the capture with the worst reprojection error")
+        print(" - Press ENTER to run calibration")
+        print(" - Press q to quit")
 
-    print("Calibration capture:")
-    print(" - Press SPACE to capture a frame when chessboard is detected")
-    print(" - Press ENTER to run calibration")
-    print(" - Press q to quit")
+    # Board detection runs on a worker thread. A live camera keeps only the newest frame
+    # for it; replayed files have every frame processed.
+    worker = ChessboardWorker(chessboard_size, args.max_width, drop_frames=args.source is None)
+    calib = None
+    latest = None          # newest detection result, drawn on the preview
+    shown = None           # last intermediate calibration printed
+    frame_index = 0
+    found_count = 0
+    calibrated = False
 
+    def capture(r):
+        nonlocal calib
+        if calib is None:
+            h, w = r.gray.shape[:2]
+            calib = IncrementalCalibration(objp, (w, h), min_views=min(4, args.min_captures))
+        name = ""
+        if args.save_dir is not None:
+            name = str(args.save_dir / f"capture_{len(calib):03d}_f{r.frame_index:06d}.png")
+            cv2.imwrite(name, r.frame)
+        calib.add(refine_corners(r.gray, r.corners), name)
+        print(f"Captured {len(calib)}")
+
+    def handle(results):
+        nonlocal latest, found_count
+        for r in results:
+            captured = False
+            if args.no_display and r.found:
+                found_count += 1
+                captured = (found_count - 1) % args.capture_every == 0
+            if captured:
+                capture(r)
+            if writer is not None:
+                writer.write({"frame": r.frame_index, "time_s": r.time_s, "found": bool(r.found),
+                              "captured": captured, "captures": len(calib) if calib else 0,
+                              "detect_ms": r.detect_ms})
+            latest = r
+
+    t_start = time.perf_counter()
     while True:
         ret, frame = cap.read()
         if not ret:
             break
+        worker.submit(frame_index, getattr(cap, "frame_time_s", None), frame)
+        frame_index += 1
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        found, corners = cv2.findChessboardCorners(gray, chessboard_size, None)
-
-        view = frame.copy()
-        if found:
-            cv2.drawChessboardCorners(view, chessboard_size, corners, found)
-            cv2.putText(view, "Chessboard FOUND - press SPACE to capture",
-                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)
-        else:
-            cv2.putText(view, "Chessboard NOT found",
-                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,255), 2)
+        key = -1
+        if not args.no_display:
+            view = frame.copy()
+            if latest is not None and latest.found:
+                cv2.drawChessboardCorners(view, chessboard_size, latest.corners, True)
+                cv2.putText(view, "Chessboard FOUND - press SPACE to capture",
+                            (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)
+            else:
+                cv2.putText(view, "Chessboard NOT found",
+                            (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,255), 2)
 
-        cv2.putText(view, f"Captures: {len(objpoints)}",
-                    (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,255), 2)
+            cv2.putText(view, f"Captures: {len(calib) if calib else 0}",
+                        (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,255), 2)
+            if calib is not None and calib.latest is not None:
+                worst = calib.worst_view()
+                text = f"RMS {calib.latest.rms:.3f} px"
+                if worst is not None:
+                    text += f" | worst #{worst[0]}: {worst[1]:.3f} px (d to drop)"
+                cv2.putText(view, text, (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,255), 2)
 
-        cv2.imshow("camera_calibrate", view)
-        key = cv2.waitKey(1) & 0xFF
+            cv2.imshow("camera_calibrate", view)
+            key = cv2.waitKey(1) & 0xFF
 
-        if key == ord('q'):
-            break
-        if key == 32 and found:  # SPACE
-            # Refine corners
-            criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
-            corners2 = cv2.cornerSubPix(gray, corners, (11,11), (-1,-1), criteria)
-
-            objpoints.append(objp.copy())
-            imgpoints.append(corners2)
-            print(f"Captured {len(objpoints)}")
-        if key == 13:  # ENTER
-            if len(objpoints) < 10:
-                print("Need at least 10 captures for decent calibration.")
-                continue
+            if key == ord('q'):
+                break
+        handle(worker.results())
+        if key == 32 and latest is not None and latest.found:  # SPACE
+            capture(latest)
 
-            h, w = gray.shape[:2]
-            ret, K, dist, rvecs, tvecs = cv2.calibrateCamera(objpoints, imgpoints, (w, h), None, None)
+        if calib is not None and calib.latest is not None and calib.latest is not shown:
+            shown = calib.latest
+            worst = int(np.argmax(shown.per_view_errors))
+            print(f"Intermediate calibration: {len(shown.per_view_errors)} views, RMS {shown.rms:.3f} px, "
+                  f"worst view #{worst} {shown.per_view_errors[worst]:.3f} px")
 
-            data = {
-                "camera_matrix": K.tolist(),
-                "dist_coeffs": dist.flatten().tolist(),
-                "reprojection_error": float(ret),
-                "image_size": [int(w), int(h)]
-            }
-            with open(out_yaml, "w") as f:
-                yaml.safe_dump(data, f)
+        if key == ord('d') and calib is not None:
+            worst = calib.worst_view()
+            if worst is None:
+                print("No up-to-date calibration yet; nothing dropped.")
+            else:
+                name = calib.remove(worst[0])
+                print(f"Dropped capture #{worst[0]} ({worst[1]:.3f} px); {len(calib)} left")
+                if name:
+                    dropped_dir = args.save_dir / "dropped"
+                    dropped_dir.mkdir(exist_ok=True)
+                    shutil.move(name, dropped_dir / Path(name).name)
 
-            print(f"Saved calibration to {out_yaml}")
-            print(f"Reprojection error: {ret}")
+        if key == 13:  # ENTER
+            if calib is None or len(calib) < args.min_captures:
+                print(f"Need at least {args.min_captures} captures for decent calibration.")
+                continue
+            calibrated = True
             break
 
+    handle(worker.close())
+    elapsed = time.perf_counter() - t_start
+    if frame_index:
+        print(f"Processed {frame_index} frames in {elapsed:.2f} s ({frame_index / elapsed:.1f} fps), "
+              f"{worker.dropped} skipped by the detection worker")
+    if args.no_display:
+        # Replayed or headless capture: calibrate once the source is exhausted.
+        calibrated = True
+    if calibrated:
+        captures = len(calib) if calib else 0
+        if captures < args.min_captures:
+            print(f"Only {captures} captures; need at least {args.min_captures} for decent calibration.")
+        else:
+            result = finish_calibration(calib, args.max_view_error, args.min_captures)
+            if result is None:
+                print("Calibration failed; nothing saved.")
+            else:
+                print_view_errors(result, [n or "unsaved" for n in calib.names])
+                save_calibration(result, calib.image_size, out_yaml, calib.names)
+
+    if calib is not None:
+        calib.close()
     cap.release()
-    cv2.destroyAllWindows()
+    if writer is not None:
+        writer.close()
+        print(f"Wrote: {writer.path}")
+    if not args.no_display:
+        cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,245 @@
+"""
+chessboard.py
+
+Chessboard detection and calibration helpers for camera_calibrate.py.
+
+  - find_chessboard: findChessboardCorners with CALIB_CB_FAST_CHECK on a frame downscaled
+    to at most max_width, corners returned in full-resolution coordinates. FAST_CHECK
+    rejects frames without a board quickly, and the downscale keeps the full search
+    cheap when a board is present. refine_corners then runs cornerSubPix on the
+    full-resolution image, only for the frames that are captured.
+  - ChessboardWorker: runs find_chessboard on a background thread, so the capture/UI
+    loop never waits on it.
+  - detect_image_file: one saved capture -> refined corners; module level so a process
+    pool can run it over an image folder.
+  - IncrementalCalibration: the captured views plus a calibration re-solved in the
+    background after each change, with per-view reprojection errors, so bad captures
+    can be dropped before the final solve.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from frame_sources import IMAGE_SUFFIXES
+from pose_pipeline import DropOldestQueue
+
+FIND_FLAGS = cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_NORMALIZE_IMAGE + cv2.CALIB_CB_FAST_CHECK
+SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+DEFAULT_MAX_WIDTH = 640
+
+
+def board_object_points(pattern, square_size_m: float) -> np.ndarray:
+    """(0,0,0), (1,0,0) ... scaled by square_size_m, for a pattern of (columns, rows) inner corners."""
+    objp = np.zeros((pattern[0] * pattern[1], 3), np.float32)
+    objp[:, :2] = np.mgrid[0:pattern[0], 0:pattern[1]].T.reshape(-1, 2)
+    return objp * square_size_m
+
+
+def find_chessboard(gray, pattern, max_width: int = DEFAULT_MAX_WIDTH):
+    """(found, corners (N, 1, 2) in full-resolution pixels or None), unrefined."""
+    scale = min(1.0, max_width / gray.shape[1]) if max_width else 1.0
+    small = gray if scale >= 1.0 else cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    found, corners = cv2.findChessboardCorners(small, pattern, FIND_FLAGS)
+    if not found:
+        return False, None
+    if scale < 1.0:
+        corners = ((corners + 0.5) / scale - 0.5).astype(np.float32)
+    return True, corners
+
+
+def refine_corners(gray, corners) -> np.ndarray:
+    return cv2.cornerSubPix(gray, corners.astype(np.float32), (11, 11), (-1, -1), SUBPIX_CRITERIA)
+
+
+def detect_image_file(path, pattern, max_width: int = DEFAULT_MAX_WIDTH):
+    """(path, image_size (w, h), refined corners or None) for one image file."""
+    gray = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return str(path), None, None
+    h, w = gray.shape
+    found, corners = find_chessboard(gray, pattern, max_width)
+    return str(path), (w, h), refine_corners(gray, corners) if found else None
+
+
+@dataclass
+class BoardResult:
+    frame_index: int
+    time_s: float
+    frame: np.ndarray
+    gray: np.ndarray
+    found: bool
+    corners: np.ndarray
+    detect_ms: float
+
+
+class ChessboardWorker:
+    """
+    Detects the board on frames submitted from the capture loop, on a background thread.
+    With drop_frames, only the newest pending frame is kept (live camera); otherwise
+    submit() waits so every frame is processed (file replay). Finished results are
+    collected with results().
+    """
+
+    def __init__(self, pattern, max_width: int = DEFAULT_MAX_WIDTH, drop_frames: bool = True):
+        self.pattern = pattern
+        self.max_width = max_width
+        self.drop_frames = drop_frames
+        self._in = DropOldestQueue(1)
+        self._out = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="chessboard", daemon=True)
+        self._thread.start()
+
+    @property
+    def dropped(self) -> int:
+        return self._in.dropped
+
+    def submit(self, frame_index: int, time_s, frame) -> None:
+        self._in.put((frame_index, time_s, frame), block=not self.drop_frames)
+
+    def _run(self) -> None:
+        while True:
+            item = self._in.get()
+            if item is None:
+                return
+            frame_index, time_s, frame = item
+            t0 = time.perf_counter()
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+            found, corners = find_chessboard(gray, self.pattern, self.max_width)
+            detect_ms = (time.perf_counter() - t0) * 1000.0
+            with self._lock:
+                self._out.append(BoardResult(frame_index, time_s, frame, gray, found, corners, detect_ms))
+
+    def results(self) -> list:
+        """Results finished since the last call, oldest first."""
+        with self._lock:
+            out, self._out = self._out, []
+        return out
+
+    def close(self) -> list:
+        """Stop after the pending frame; returns the remaining results."""
+        self._in.close()
+        self._thread.join()
+        return self.results()
+
+
+@dataclass
+class CalibrationResult:
+    rms: float
+    K: np.ndarray
+    dist: np.ndarray
+    per_view_errors: np.ndarray   # RMS reprojection error (px) of each view
+    version: int = 0              # IncrementalCalibration state the solve belongs to
+
+
+def calibrate(objpoints, imgpoints, image_size) -> CalibrationResult:
+    rms, K, dist, _, _, _, _, per_view = cv2.calibrateCameraExtended(objpoints, imgpoints, image_size, None, None)
+    return CalibrationResult(float(rms), K, dist, per_view.reshape(-1))
+
+
+class IncrementalCalibration:
+    """
+    Captured views plus a running calibration. Every add()/remove() re-solves in the
+    background once min_views views exist (at most one solve runs at a time; views
+    changed during a solve trigger one more). latest holds the newest finished solve.
+    """
+
+    def __init__(self, objp: np.ndarray, image_size, min_views: int = 4):
+        self.objp = objp
+        self.image_size = image_size
+        self.min_views = min_views
+        self.names = []
+        self.imgpoints = []
+        self.latest = None
+        self._version = 0
+        self._solving = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def __len__(self) -> int:
+        return len(self.imgpoints)
+
+    def add(self, corners, name: str = "") -> None:
+        with self._lock:
+            self.names.append(name)
+            self.imgpoints.append(corners)
+            self._changed()
+
+    def extend(self, views) -> None:
+        """Add (name, corners) pairs with a single re-solve (offline batch)."""
+        with self._lock:
+            for name, corners in views:
+                self.names.append(name)
+                self.imgpoints.append(corners)
+            self._changed()
+
+    def remove(self, i: int):
+        """Drop view i; returns its name."""
+        with self._lock:
+            name = self.names.pop(i)
+            self.imgpoints.pop(i)
+            self._changed()
+        return name
+
+    def worst_view(self):
+        """(index, error px) of the worst view in the latest solve, if it covers the current views."""
+        latest = self.latest
+        if latest is None or latest.version != self._version:
+            return None
+        i = int(np.argmax(latest.per_view_errors))
+        return i, float(latest.per_view_errors[i])
+
+    def _changed(self) -> None:
+        # Called with the lock held.
+        self._version += 1
+        if len(self.imgpoints) < self.min_views:
+            self.latest = None
+        elif not self._solving:
+            self._solving = True
+            self._executor.submit(self._solve_latest)
+
+    def _solve_latest(self) -> None:
+        while True:
+            with self._lock:
+                version = self._version
+                views = list(self.imgpoints)
+            result = None
+            if len(views) >= self.min_views:
+                try:
+                    result = calibrate([self.objp] * len(views), views, self.image_size)
+                except cv2.error as e:
+                    print(f"Intermediate calibration failed: {e}")
+            with self._lock:
+                if version == self._version:
+                    if result is not None:
+                        result.version = version
+                        self.latest = result
+                    self._solving = False
+                    return
+
+    def wait(self) -> CalibrationResult:
+        """
+        Block until the solve over the current views is done. Returns None below min_views or
+        when that solve failed (latest then still holds an older view set).
+        """
+        while True:
+            with self._lock:
+                if not self._solving:
+                    latest = self.latest
+                    if latest is None or latest.version != self._version:
+                        return None
+                    return latest
+            time.sleep(0.005)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+def list_images(folder: Path):
+    return sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
@@ -0,0 +1,66 @@
+"""
+coarse_detect.py
+
+Coarse-to-fine AprilTag detection: detectMarkers runs on a downscaled grayscale frame,
+then each corner is scaled back up and refined with cv2.cornerSubPix at full resolution
+inside a small window. The scale adapts to the smallest tag seen last frame, so the
+downscaled image keeps at least target_tag_px pixels per tag side.
+
+CoarseToFineDetector exposes detectMarkers()/getDictionary()/getDetectorParameters() like
+cv2.aruco.ArucoDetector, so it can be used wherever a detector is expected (including
+as the full-frame detector inside RoiTracker).
+"""
+
+import cv2
+import numpy as np
+
+SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+
+
+class CoarseToFineDetector:
+    """
+    detector:      the ArucoDetector to run on the downscaled frame
+    target_tag_px: tag side length (px) to aim for in the downscaled frame
+    min_scale:     never downscale below this factor
+    """
+
+    def __init__(self, detector, target_tag_px: float = 48.0, min_scale: float = 0.25):
+        self.detector = detector
+        self.target_tag_px = target_tag_px
+        self.min_scale = min_scale
+        self.scale = 1.0       # used for the next frame
+        self.last_scale = 1.0  # used for the last frame
+
+    def getDictionary(self):
+        return self.detector.getDictionary()
+
+    def getDetectorParameters(self):
+        return self.detector.getDetectorParameters()
+
+    def _next_scale(self, corners_list) -> float:
+        if not corners_list:
+            # Nothing seen: search the next frame at full resolution so small tags are not missed.
+            return 1.0
+        side = min(cv2.arcLength(c.reshape(4, 2), True) / 4.0 for c in corners_list)
+        return float(np.clip(self.target_tag_px / max(side, 1e-6), self.min_scale, 1.0))
+
+    def detectMarkers(self, gray):
+        scale = self.scale
+        self.last_scale = scale
+        if scale >= 1.0:
+            corners_list, ids, rejected = self.detector.detectMarkers(gray)
+            corners_list = list(corners_list)
+        else:
+            small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            corners_list, ids, rejected = self.detector.detectMarkers(small)
+            corners_list = list(corners_list)
+            rejected = [(r + 0.5) / scale - 0.5 for r in rejected]
+            if corners_list:
+                # Corners are in pixel-center coordinates: x_full = (x_small + 0.5) / scale - 0.5.
+                pts = (np.concatenate(corners_list).reshape(-1, 1, 2) + 0.5) / scale - 0.5
+                # The coarse corner is good to about one downscaled pixel.
+                half = max(int(np.ceil(1.5 / scale)), 2)
+                pts = cv2.cornerSubPix(gray, pts.astype(np.float32), (half, half), (-1, -1), SUBPIX_CRITERIA)
+                corners_list = [p.reshape(1, 4, 2) for p in np.split(pts, len(corners_list))]
+        self.scale = self._next_scale(corners_list)
+        return corners_list, ids, rejected
@@ -1,8 +1,28 @@
+import argparse
 import cv2
 import numpy as np
+import itertools
+import os
+import time
 import yaml
 from pathlib import Path
 import math
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from arm_link import DEFAULT_ARM_CONFIG, DEFAULT_EXTRINSIC_YAML, ArmTargetStage, add_sim_to_path
+
+from coarse_detect import CoarseToFineDetector
+from detector_profiles import DEFAULT_PROFILES_YAML, load_detector_parameters
+from frame_sources import ResultWriter, add_source_args, open_source
+from pose_filter import TagPoseFilter
+from pose_pipeline import PosePipeline
+from stereo import StereoCalibration, StereoCapture, fit_rigid, load_stereo_calibration, right_to_left, triangulate
+from tag_tracking import RoiTracker
+from undistort import load_or_build_undistort_maps
+
+WINDOW_NAME = "AprilTag_PoseDetector"
+DEFAULT_TAGS_YAML = Path(__file__).parent / "tags.yaml"
 
 def load_camera_params(yaml_path: str):
     """
@@ -67,138 +87,783 @@ def draw_axes(frame, K, dist, rvec, tvec, axis_len=0.05):
     cv2.line(frame, origin, tuple(imgpts[2]), (0, 255, 0), 2)   # Y green
     cv2.line(frame, origin, tuple(imgpts[3]), (255, 0, 0), 2)   # Z blue
 
-def main():
-    # === CONFIG ===
-    tag_size_m = 0.10  # <-- SET THIS to your measured black-square edge length in meters
-    cam_index = 0
-
-    # OpenCV AprilTag detector (requires opencv-contrib-python)
+def create_detector(params=None):
+    """OpenCV AprilTag detector (requires opencv-contrib-python); params defaults to OpenCV's."""
     aruco = cv2.aruco
     tag_dict = aruco.getPredefinedDictionary(aruco.DICT_APRILTAG_36h11)
-    params = aruco.DetectorParameters()
-    detector = aruco.ArucoDetector(tag_dict, params)
+    if params is None:
+        params = aruco.DetectorParameters()
+    return aruco.ArucoDetector(tag_dict, params)
+
+# Tag corner model for a tag of edge length 1 m, tag-centered, in the order
+# SOLVEPNP_IPPE_SQUARE requires. It matches detectMarkers' corner order
+# (top-left, top-right, bottom-right, bottom-left in the image).
+# Model frame: +x right, +y up, +z out of the tag towards the camera.
+UNIT_TAG_CORNERS = np.array([
+    [-0.5,  0.5, 0],
+    [ 0.5,  0.5, 0],
+    [ 0.5, -0.5, 0],
+    [-0.5, -0.5, 0],
+], dtype=np.float64)
+FLIP_YZ = np.diag([1.0, -1.0, -1.0])
+
+def tag_object_points(tag_size_m: float):
+    """3D model points for tag corners (meters) for a tag of the given edge length."""
+    return UNIT_TAG_CORNERS * tag_size_m
+
+@dataclass
+class TagSizes:
+    """Physical black-square edge length per tag ID, with a default for unlisted IDs."""
+    default_m: float
+    by_id: dict
+
+    def size_for(self, tag_id: int) -> float:
+        return self.by_id.get(tag_id, self.default_m)
+
+def load_tag_sizes(yaml_path: Path, default_m: float = None) -> TagSizes:
+    """
+    Loads per-ID tag sizes from a YAML file.
+    Expected format:
+      default_size_m: 0.10
+      sizes_m:
+        0: 0.10
+        7: 0.05
+    default_m (e.g. from --tag-size) overrides default_size_m when given.
+    A missing file gives every tag default_m (or 0.10 m).
+    """
+    data = {}
+    if yaml_path is not None and Path(yaml_path).exists():
+        with open(yaml_path, "r") as f:
+            data = yaml.safe_load(f) or {}
+    if default_m is None:
+        default_m = float(data.get("default_size_m", 0.10))
+    by_id = {int(k): float(v) for k, v in (data.get("sizes_m") or {}).items()}
+    return TagSizes(default_m=default_m, by_id=by_id)
+
+@dataclass
+class TagPose:
+    """Pose of one detected tag in the camera frame."""
+    id: int
+    corners: np.ndarray      # (4, 2) pixel corners, detectMarkers order
+    size_m: float
+    rvec: np.ndarray         # (3, 1) Rodrigues rotation, tag -> camera (tag +x right, +y down, +z into tag)
+    tvec: np.ndarray         # (3, 1) tag center in camera frame (m)
+    euler_deg: tuple         # (X pitch, Y yaw, Z roll), see euler_from_rotation_matrix
+    reproj_error_px: float   # RMS corner reprojection error
+
+    @property
+    def distance(self) -> float:
+        return float(np.linalg.norm(self.tvec))
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "size_m": self.size_m,
+            "rvec": self.rvec.flatten().tolist(),
+            "tvec": self.tvec.flatten().tolist(),
+            "euler_deg": list(self.euler_deg),
+            "distance_m": self.distance,
+            "reproj_error_px": self.reproj_error_px,
+        }
+
+@dataclass
+class FilteredTagPose(TagPose):
+    """TagPose whose rvec/tvec/euler are Kalman-filtered, plus rates and a one-frame prediction."""
+    velocity_m_s: np.ndarray         # (3,) camera frame
+    angular_velocity_rad_s: np.ndarray
+    predicted_rvec: np.ndarray       # pose expected at the next frame
+    predicted_tvec: np.ndarray
+    raw_rvec: np.ndarray             # this frame's unfiltered solvePnP pose
+    raw_tvec: np.ndarray
+
+    def as_dict(self) -> dict:
+        d = super().as_dict()
+        d.update(
+            velocity_m_s=self.velocity_m_s.tolist(),
+            angular_velocity_rad_s=self.angular_velocity_rad_s.tolist(),
+            predicted_rvec=self.predicted_rvec.flatten().tolist(),
+            predicted_tvec=self.predicted_tvec.flatten().tolist(),
+            raw_rvec=self.raw_rvec.flatten().tolist(),
+            raw_tvec=self.raw_tvec.flatten().tolist(),
+        )
+        return d
+
+@dataclass
+class StereoTagPose(TagPose):
+    """
+    TagPose in the left camera frame from a stereo pair. view is "stereo" when the
+    corners were triangulated from both cameras, else the single camera ("left" or
+    "right") whose solvePnP pose was used.
+    """
+    view: str
+    triangulated_size_m: float = None   # edge length of the triangulated corners (stereo only)
+    fit_error_m: float = None           # RMS distance of triangulated corners from the tag model
+
+    def as_dict(self) -> dict:
+        d = super().as_dict()
+        d.update(view=self.view, triangulated_size_m=self.triangulated_size_m, fit_error_m=self.fit_error_m)
+        return d
+
+def camera_params_for(frame_shape, camera_yaml: Path):
+    """Calibrated intrinsics if camera_yaml exists, else a rough guess from the frame size."""
+    if camera_yaml.exists():
+        return load_camera_params(str(camera_yaml))
+    # Rough guess for demo; for real metric accuracy, run calibration.
+    h, w = frame_shape[:2]
+    fx = 0.9 * w
+    fy = 0.9 * w
+    cx = w / 2.0
+    cy = h / 2.0
+    K = np.array([[fx, 0, cx],
+                  [0, fy, cy],
+                  [0,  0,  1]], dtype=np.float64)
+    dist = np.zeros((5, 1), dtype=np.float64)
+    return K, dist
 
-    cap = cv2.VideoCapture(cam_index)
-    if not cap.isOpened():
-        raise RuntimeError("Could not open webcam. Try cam_index=1 or check permissions.")
+# Reprojection error (RMS px) above which an IPPE_SQUARE pose is re-checked with ITERATIVE.
+IPPE_FALLBACK_ERROR_PX = 1.0
 
-    # Calibration load (optional)
-    camera_yaml = Path(__file__).parent / "camera.yaml"
-    use_calibrated = camera_yaml.exists()
+def reprojection_error_px(obj_pts, img_pts, rvec, tvec, K, dist) -> float:
+    """RMS distance between the detected corners and the model corners projected with the pose."""
+    proj, _ = cv2.projectPoints(obj_pts, rvec, tvec, K, dist)
+    return float(np.sqrt(np.mean(np.sum((proj - img_pts) ** 2, axis=2))))
 
-    K = None
-    dist = None
-
-    # 3D model points for tag corners (meters), tag-centered.
-    # OpenCV's detectMarkers returns corners in consistent order around the tag.
-    s = tag_size_m
-    half = s / 2.0
-    obj_pts = np.array([
-        [-half, -half, 0],
-        [ half, -half, 0],
-        [ half,  half, 0],
-        [-half,  half, 0],
-    ], dtype=np.float64)
+def rotation_angle_between(R_a, R_b) -> float:
+    """Angle (rad) of the rotation taking R_b to R_a."""
+    c = (np.trace(R_a @ R_b.T) - 1.0) / 2.0
+    return math.acos(min(max(c, -1.0), 1.0))
 
-    print("Press 'q' to quit.")
-    print(f"Calibration file found: {use_calibrated} ({camera_yaml})")
+def solve_tag_pose(obj_pts, img_pts, K, dist, guess=None):
+    """
+    (ok, rvec, tvec, reprojection error) for one tag, in the IPPE model frame.
 
-    while True:
+    IPPE_SQUARE returns both poses consistent with a square's homography. Without a
+    guess the one that reprojects best is kept. With a guess (rvec, tvec in the
+    reported tag frame, e.g. the filter's prediction), the well-fitting candidate
+    closest in rotation to the guess is kept. This keeps the pose on the same
+    branch frame to frame instead of flipping between two near-equal fits.
+
+    If neither candidate reprojects within IPPE_FALLBACK_ERROR_PX, SOLVEPNP_ITERATIVE
+    runs, seeded with useExtrinsicGuess from the guess when there is one.
+    """
+    n, rvecs, tvecs, errs = cv2.solvePnPGeneric(obj_pts, img_pts, K, dist, flags=cv2.SOLVEPNP_IPPE_SQUARE)
+    if n == 0:
+        return False, None, None, None
+    # solvePnPGeneric reports RMS over the 2N coordinates; convert to RMS per corner.
+    candidates = [(r, t, float(e) * math.sqrt(2.0)) for r, t, e in zip(rvecs, tvecs, np.ravel(errs))]
+    best = min(candidates, key=lambda c: c[2])
+
+    R_guess = None
+    if guess is not None:
+        R_guess = cv2.Rodrigues(np.asarray(guess[0], dtype=np.float64))[0] @ FLIP_YZ
+        good = [c for c in candidates if c[2] <= IPPE_FALLBACK_ERROR_PX]
+        if good:
+            best = min(good, key=lambda c: rotation_angle_between(cv2.Rodrigues(c[0])[0], R_guess))
+
+    if best[2] > IPPE_FALLBACK_ERROR_PX:
+        # Near fronto-parallel views IPPE can miss the right solution; an iterative
+        # solve settles it at a small extra cost.
+        if R_guess is not None:
+            rvec0, _ = cv2.Rodrigues(R_guess)
+            tvec0 = np.array(guess[1], dtype=np.float64).reshape(3, 1)
+            ok_it, rvec_it, tvec_it = cv2.solvePnP(obj_pts, img_pts, K, dist, rvec0, tvec0,
+                                                   useExtrinsicGuess=True, flags=cv2.SOLVEPNP_ITERATIVE)
+        else:
+            ok_it, rvec_it, tvec_it = cv2.solvePnP(obj_pts, img_pts, K, dist, flags=cv2.SOLVEPNP_ITERATIVE)
+        if ok_it:
+            err_it = reprojection_error_px(obj_pts, img_pts, rvec_it, tvec_it, K, dist)
+            if err_it < best[2]:
+                best = (rvec_it, tvec_it, err_it)
+    return True, best[0], best[1], best[2]
+
+def estimate_tag_poses(corners_list, ids, K, dist, tag_sizes: TagSizes, guesses=None):
+    """
+    Pose for every detected tag, one SOLVEPNP_IPPE_SQUARE solve each.
+
+    IPPE_SQUARE is closed-form for the square tag model, so the cost per tag is
+    constant and the per-frame cost grows linearly with the number of tags.
+    guesses maps tag id -> (rvec, tvec) predicted for tags seen before (see solve_tag_pose).
+    Tags without a pose (solver failure) are left out of the list.
+    """
+    poses = []
+    if ids is None or len(ids) == 0:
+        return poses
+    guesses = guesses or {}
+    for corners, tag_id in zip(corners_list, np.asarray(ids).reshape(-1)):
+        tag_id = int(tag_id)
+        size_m = tag_sizes.size_for(tag_id)
+        obj_pts = tag_object_points(size_m)
+        img_pts = corners.reshape(4, 1, 2).astype(np.float64)
+        ok, rvec, tvec, err = solve_tag_pose(obj_pts, img_pts, K, dist, guesses.get(tag_id))
+        if not ok:
+            continue
+        # Report in the detector's tag frame (+y down, +z into the tag, so a tag facing
+        # the camera reads 0/0/0): rotate the IPPE model frame 180 deg about x.
+        R, _ = cv2.Rodrigues(rvec)
+        R = R @ FLIP_YZ
+        rvec, _ = cv2.Rodrigues(R)
+        poses.append(TagPose(
+            id=tag_id,
+            corners=img_pts.reshape(4, 2),
+            size_m=size_m,
+            rvec=rvec,
+            tvec=tvec,
+            euler_deg=euler_from_rotation_matrix(R),
+            reproj_error_px=err,
+        ))
+    return poses
+
+def corners_by_id(corners_list, ids) -> dict:
+    if ids is None:
+        return {}
+    return {int(i): c.reshape(4, 2).astype(np.float64) for c, i in zip(corners_list, np.asarray(ids).reshape(-1))}
+
+def estimate_stereo_tag_poses(left, right, stereo: StereoCalibration, tag_sizes: TagSizes):
+    """
+    StereoTagPose for every tag seen by either camera; left/right are (corners_list, ids).
+
+    A tag seen by both cameras has its four corners triangulated with
+    cv2.triangulatePoints and the tag model fitted to them (fit_rigid), so depth comes
+    from the baseline instead of the tag's apparent size. A tag seen by one camera
+    only falls back to that camera's solvePnP pose, moved into the left camera frame.
+    """
+    left_c, right_c = corners_by_id(*left), corners_by_id(*right)
+    poses = []
+    for tag_id in sorted(left_c.keys() | right_c.keys()):
+        size_m = tag_sizes.size_for(tag_id)
+        obj_pts = tag_object_points(size_m)
+        pl, pr = left_c.get(tag_id), right_c.get(tag_id)
+        triangulated_size = fit_error = None
+        if pl is not None and pr is not None:
+            X = triangulate(stereo, pl, pr)
+            R, tvec, fit_error = fit_rigid(obj_pts, X)
+            triangulated_size = float(np.mean(np.linalg.norm(X - np.roll(X, -1, axis=0), axis=1)))
+            rvec, _ = cv2.Rodrigues(R)
+            err = reprojection_error_px(obj_pts, pl.reshape(4, 1, 2), rvec, tvec, stereo.K1, stereo.dist1)
+            view, corners = "stereo", pl
+        elif pl is not None:
+            ok, rvec, tvec, err = solve_tag_pose(obj_pts, pl.reshape(4, 1, 2), stereo.K1, stereo.dist1)
+            if not ok:
+                continue
+            R, _ = cv2.Rodrigues(rvec)
+            view, corners = "left", pl
+        else:
+            ok, rvec, tvec, err = solve_tag_pose(obj_pts, pr.reshape(4, 1, 2), stereo.K2, stereo.dist2)
+            if not ok:
+                continue
+            R, tvec = right_to_left(stereo, cv2.Rodrigues(rvec)[0], tvec)
+            # Draw the tag where the left camera would see it.
+            corners, _ = cv2.projectPoints(obj_pts, cv2.Rodrigues(R)[0], tvec, stereo.K1, stereo.dist1)
+            view, corners = "right", corners.reshape(4, 2)
+        R = R @ FLIP_YZ
+        rvec, _ = cv2.Rodrigues(R)
+        poses.append(StereoTagPose(
+            id=tag_id,
+            corners=corners,
+            size_m=size_m,
+            rvec=rvec,
+            tvec=tvec,
+            euler_deg=euler_from_rotation_matrix(R),
+            reproj_error_px=err,
+            view=view,
+            triangulated_size_m=triangulated_size,
+            fit_error_m=fit_error,
+        ))
+    return poses
+
+def filter_tag_poses(poses, pose_filter: TagPoseFilter, t_s: float):
+    """Run each TagPose through its tag's Kalman filter; returns FilteredTagPose list."""
+    filtered = []
+    for pose in poses:
+        state = pose_filter.update(pose.id, pose.rvec, pose.tvec, t_s)
+        R, _ = cv2.Rodrigues(state["rvec"])
+        filtered.append(FilteredTagPose(
+            id=pose.id,
+            corners=pose.corners,
+            size_m=pose.size_m,
+            rvec=state["rvec"],
+            tvec=state["tvec"],
+            euler_deg=euler_from_rotation_matrix(R),
+            reproj_error_px=pose.reproj_error_px,
+            velocity_m_s=state["velocity"],
+            angular_velocity_rad_s=state["angular_velocity"],
+            predicted_rvec=state["predicted_rvec"],
+            predicted_tvec=state["predicted_tvec"],
+            raw_rvec=pose.rvec,
+            raw_tvec=pose.tvec,
+        ))
+    pose_filter.prune(t_s)
+    return filtered
+
+def detect_tag_poses(detector, frame, K, dist, tag_sizes: TagSizes, timings=None, tracker=None,
+                     pose_filter=None, t_s=None):
+    """
+    Detect all tags in a BGR frame and return a list of TagPose, one per solved tag.
+    With a RoiTracker, detection only scans around the previous frame's tags.
+    With a TagPoseFilter (and the frame timestamp t_s), each tag's predicted pose guides
+    the solve and FilteredTagPose objects are returned instead.
+    If timings is a dict, detect_ms and pose_ms are written into it.
+    """
+    t0 = time.perf_counter()
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if tracker is not None:
+        corners_list, ids, _ = tracker.detect(gray)
+    else:
+        corners_list, ids, _ = detector.detectMarkers(gray)
+    t1 = time.perf_counter()
+    if pose_filter is None:
+        poses = estimate_tag_poses(corners_list, ids, K, dist, tag_sizes)
+    else:
+        if t_s is None:
+            t_s = t0
+        poses = estimate_tag_poses(corners_list, ids, K, dist, tag_sizes, pose_filter.guesses(t_s))
+        poses = filter_tag_poses(poses, pose_filter, t_s)
+    if timings is not None:
+        timings["detect_ms"] = (t1 - t0) * 1000.0
+        timings["pose_ms"] = (time.perf_counter() - t1) * 1000.0
+    return poses
+
+def draw_overlay(frame, poses, K, dist, tag_sizes: TagSizes, use_calibrated, extra_lines=()):
+    """Header, tag boxes, axes and pose readouts, drawn in place on frame."""
+    # UI header
+    header = [
+        "AprilTag Pose Detector (OpenCV)",
+        f"Tag size: {tag_sizes.default_m:.3f} m ({len(tag_sizes.by_id)} per-ID) | Family: APRILTAG_36h11",
+        "Calibrated: YES" if use_calibrated else "Calibrated: NO (approx intrinsics)"
+    ]
+    header += list(extra_lines)
+    y0 = 25
+    for i, t in enumerate(header):
+        cv2.putText(frame, t, (10, y0 + i*20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255, 255, 255), 2)
+    y1 = 120 + 20 * len(extra_lines)
+
+    if not poses:
+        cv2.putText(frame, "No AprilTag detected", (10, y1 + 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        return
+
+    for i, pose in enumerate(poses):
+        draw_tag_box(frame, pose.corners)
+        draw_axes(frame, K, dist, pose.rvec, pose.tvec, axis_len=pose.size_m / 2.0)
+
+        # Center point and ID label
+        center_px = tuple(np.mean(pose.corners, axis=0).astype(int))
+        cv2.circle(frame, center_px, 4, (0, 255, 255), -1)
+        cv2.putText(frame, str(pose.id), (center_px[0] + 6, center_px[1] - 6),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+
+        pitch_deg, yaw_deg, roll_deg = pose.euler_deg
+        line = (f"ID {pose.id}: {pose.distance:.3f} m  "
+                f"X={pitch_deg:+.1f} Y={yaw_deg:+.1f} Z={roll_deg:+.1f} deg  "
+                f"err {pose.reproj_error_px:.2f} px")
+        if isinstance(pose, FilteredTagPose):
+            line += f"  v {np.linalg.norm(pose.velocity_m_s):.2f} m/s"
+        if isinstance(pose, StereoTagPose):
+            line += f"  [{pose.view}]"
+        cv2.putText(frame, line, (10, y1 + i*24),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+def make_frame_detector(args):
+    """Detector for one loop/worker: coarse-to-fine with --coarse, else plain full resolution."""
+    detector = create_detector(load_detector_parameters(args.profile, args.profiles_config))
+    if args.coarse:
+        return CoarseToFineDetector(detector, target_tag_px=args.coarse_target_px, min_scale=args.coarse_min_scale)
+    return detector
+
+def make_tracker(detector, args):
+    """RoiTracker for --track, else None (full-frame detection every frame)."""
+    if not args.track:
+        return None
+    return RoiTracker(detector, pad_frac=args.roi_pad, full_every=args.full_every)
+
+POSE_CSV_FIELDS = [
+    "frame", "time_s", "id", "tx", "ty", "tz", "rx", "ry", "rz",
+    "euler_x_deg", "euler_y_deg", "euler_z_deg", "distance_m", "reproj_error_px",
+    "vx", "vy", "vz", "view", "triangulated_size_m", "undistort_ms", "detect_ms", "pose_ms",
+]
+
+def write_pose_results(writer: ResultWriter, frame_index, time_s, poses, timings):
+    """
+    JSONL: one object per frame with all its tags.
+    CSV: one row per tag; a frame without tags still gets a row (empty id), so every
+    processed frame shows up in the file.
+    """
+    if not writer.is_csv:
+        writer.write({"frame": frame_index, "time_s": time_s, "timings_ms": timings,
+                      "tags": [p.as_dict() for p in poses]})
+        return
+    base = {"frame": frame_index, "time_s": time_s,
+            "undistort_ms": timings.get("undistort_ms"),
+            "detect_ms": timings.get("detect_ms"), "pose_ms": timings.get("pose_ms")}
+    if not poses:
+        writer.write(base)
+    for pose in poses:
+        row = dict(base, id=pose.id, distance_m=pose.distance, reproj_error_px=pose.reproj_error_px)
+        row.update(zip(("tx", "ty", "tz"), pose.tvec.flatten()))
+        row.update(zip(("rx", "ry", "rz"), pose.rvec.flatten()))
+        row.update(zip(("euler_x_deg", "euler_y_deg", "euler_z_deg"), pose.euler_deg))
+        if isinstance(pose, FilteredTagPose):
+            row.update(zip(("vx", "vy", "vz"), pose.velocity_m_s))
+        if isinstance(pose, StereoTagPose):
+            row.update(view=pose.view, triangulated_size_m=pose.triangulated_size_m)
+        writer.write(row)
+
+def undistort_frame(maps, image, timings):
+    """Remap image with the precomputed maps (no-op without maps); time goes to undistort_ms."""
+    if maps is None:
+        return image
+    t0 = time.perf_counter()
+    image = maps.remap(image)
+    timings["undistort_ms"] = (time.perf_counter() - t0) * 1000.0
+    return image
+
+def report_first_detection(startup):
+    startup.mark("first detection")
+    print(startup.report())
+
+def run_serial(cap, K, dist, tag_sizes, use_calibrated, first_frame, args, writer=None, maps=None, arm=None,
+               startup=None):
+    """Original single-threaded loop: capture, detect, solve and show one frame at a time."""
+    detector = make_frame_detector(args)
+    if startup is not None:
+        startup.mark("create detector")
+    tracker = make_tracker(detector, args)
+    pose_filter = TagPoseFilter() if args.filter else None
+    frame = first_frame
+    frame_index = 0
+    detect_ms = []
+    pose_ms = []
+    t_start = time.perf_counter()
+    captured_at = t_start
+    while frame is not None:
+        # Replayed sources carry the recording's frame time; a live camera uses the wall clock.
+        t_frame = getattr(cap, "frame_time_s", None)
+        if t_frame is None:
+            t_frame = time.perf_counter()
+        timings = {}
+        frame = undistort_frame(maps, frame, timings)
+        poses = detect_tag_poses(detector, frame, K, dist, tag_sizes, timings=timings, tracker=tracker,
+                                 pose_filter=pose_filter, t_s=t_frame)
+        detect_ms.append(timings["detect_ms"])
+        pose_ms.append(timings["pose_ms"])
+        if startup is not None:
+            report_first_detection(startup)
+            startup = None
+        if writer is not None:
+            write_pose_results(writer, frame_index, t_frame, poses, timings)
+        if arm is not None:
+            arm.submit(poses, captured_at, timings)
+
+        if not args.no_display:
+            draw_overlay(frame, poses, K, dist, tag_sizes, use_calibrated)
+            cv2.imshow(WINDOW_NAME, frame)
+            if (cv2.waitKey(1) & 0xFF) == ord('q'):
+                break
+        frame_index += 1
+        if args.max_frames is not None and frame_index >= args.max_frames:
+            break
         ret, frame = cap.read()
+        captured_at = time.perf_counter()
         if not ret:
-            break
+            frame = None
 
-        # Init intrinsics
-        if K is None:
-            h, w = frame.shape[:2]
-            if use_calibrated:
-                K, dist = load_camera_params(str(camera_yaml))
-            else:
-                # Rough guess for demo; for real metric accuracy, run calibration.
-                fx = 0.9 * w
-                fy = 0.9 * w
-                cx = w / 2.0
-                cy = h / 2.0
-                K = np.array([[fx, 0, cx],
-                              [0, fy, cy],
-                              [0,  0,  1]], dtype=np.float64)
-                dist = np.zeros((5, 1), dtype=np.float64)
-
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        corners_list, ids, _ = detector.detectMarkers(gray)
+    elapsed = time.perf_counter() - t_start
+    if frame_index:
+        print(f"Processed {len(detect_ms)} frames in {elapsed:.2f} s ({len(detect_ms) / elapsed:.1f} fps) | "
+              f"detect {np.mean(detect_ms):.2f} ms, pose {np.mean(pose_ms):.2f} ms mean")
 
-        # UI header
-        header = [
-            "AprilTag Pose Detector (OpenCV)",
-            f"Tag size: {tag_size_m:.3f} m | Family: APRILTAG_36h11",
-            "Calibrated: YES" if use_calibrated else "Calibrated: NO (approx intrinsics)"
-        ]
-        y0 = 25
-        for i, t in enumerate(header):
-            cv2.putText(frame, t, (10, y0 + i*20),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255, 255, 255), 2)
-
-        if ids is not None and len(ids) > 0:
-            # Pick the largest detection (closest / best for demo)
-            best_i = None
-            best_area = -1.0
-            for i, c in enumerate(corners_list):
-                area = abs(cv2.contourArea(c.astype(np.float32)))
-                if area > best_area:
-                    best_area = area
-                    best_i = i
-
-            corners = corners_list[best_i].reshape(4, 2).astype(np.float64)
-            tag_id = int(ids[best_i][0])
-
-            draw_tag_box(frame, corners)
-
-            img_pts = corners.reshape(-1, 1, 2)
-
-            # For squares, IPPE can be very good; fall back to iterative if needed.
-            # Not all OpenCV builds support all flags equally; iterative is universally available.
-            ok, rvec, tvec = cv2.solvePnP(
-                obj_pts, img_pts, K, dist,
-                flags=cv2.SOLVEPNP_ITERATIVE
-            )
-
-            if ok:
-                tx, ty, tz = tvec.flatten()
-                distance = float(np.linalg.norm(tvec))
-
-                R, _ = cv2.Rodrigues(rvec)
-                pitch_deg, yaw_deg, roll_deg = euler_from_rotation_matrix(R)
-
-                # Draw axes (optional but nice)
-                draw_axes(frame, K, dist, rvec, tvec, axis_len=0.05)
-
-                # Center point
-                center_px = tuple(np.mean(corners, axis=0).astype(int))
-                cv2.circle(frame, center_px, 4, (0, 255, 255), -1)
-
-                info = [
-                    f"ID: {tag_id}",
-                    f"Distance to center: {distance:.3f} m (z={tz:.3f} m)",
-                    f"Rotation (deg): X={pitch_deg:+.1f}  Y={yaw_deg:+.1f}  Z={roll_deg:+.1f}"
-                ]
-                y1 = 120
-                for i, line in enumerate(info):
-                    cv2.putText(frame, line, (10, y1 + i*24),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-            else:
-                cv2.putText(frame, "solvePnP failed", (10, 130),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        else:
-            cv2.putText(frame, "No AprilTag detected", (10, 130),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+def run_stereo(cap, right_cap, stereo: StereoCalibration, tag_sizes, args, writer=None):
+    """
+    Stereo loop: both cameras are read concurrently and paired by timestamp, tags are
+    detected in the two frames in parallel, then triangulated (or solved from one view).
+    """
+    capture = StereoCapture(cap, right_cap, max_skew_s=args.max_skew_ms / 1000.0,
+                            drop_frames=args.source is None)
+    detectors = [make_frame_detector(args), make_frame_detector(args)]
+
+    def detect(i, frame):
+        corners_list, ids, _ = detectors[i].detectMarkers(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        return corners_list, ids
+
+    views = {"stereo": 0, "left": 0, "right": 0}
+    size_error_pct = []
+    detect_ms = []
+    pose_ms = []
+    frame_index = 0
+    t_start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            while args.max_frames is None or frame_index < args.max_frames:
+                pair = capture.read_pair()
+                if pair is None:
+                    break
+                left, right, t_left, t_right = pair
+                t0 = time.perf_counter()
+                right_job = pool.submit(detect, 1, right)
+                left_det = detect(0, left)
+                right_det = right_job.result()
+                t1 = time.perf_counter()
+                poses = estimate_stereo_tag_poses(left_det, right_det, stereo, tag_sizes)
+                timings = {"detect_ms": (t1 - t0) * 1000.0, "pose_ms": (time.perf_counter() - t1) * 1000.0}
+                detect_ms.append(timings["detect_ms"])
+                pose_ms.append(timings["pose_ms"])
+                for pose in poses:
+                    views[pose.view] += 1
+                    if pose.triangulated_size_m is not None:
+                        size_error_pct.append((pose.triangulated_size_m / pose.size_m - 1.0) * 100.0)
+                if writer is not None:
+                    write_pose_results(writer, frame_index, t_left, poses, timings)
+
+                if not args.no_display:
+                    draw_overlay(left, poses, stereo.K1, stereo.dist1, tag_sizes, True,
+                                 extra_lines=[f"Stereo: baseline {stereo.baseline_m * 100:.1f} cm, "
+                                              f"skew {abs(t_left - t_right) * 1000:.1f} ms"])
+                    cv2.imshow(WINDOW_NAME, left)
+                    if (cv2.waitKey(1) & 0xFF) == ord('q'):
+                        break
+                frame_index += 1
+    finally:
+        capture.close()
+
+    elapsed = time.perf_counter() - t_start
+    if not frame_index:
+        print("No frame pairs processed.")
+        return
+    print(f"Processed {frame_index} pairs in {elapsed:.2f} s ({frame_index / elapsed:.1f} pairs/s) | "
+          f"detect (both views) {np.mean(detect_ms):.2f} ms, triangulate/pose {np.mean(pose_ms):.2f} ms mean")
+    print(f"Pairing: {capture.skew_summary()}")
+    print(f"Tag poses: {views['stereo']} stereo, {views['left']} left-only, {views['right']} right-only")
+    if size_error_pct:
+        e = np.array(size_error_pct)
+        # Triangulated coordinates scale with depth, so the edge-length error is the depth-scale error.
+        print(f"Triangulated tag size vs configured: {e.mean():+.2f}% mean, {e.std():.2f}% std "
+              f"(depth scale error)")
+
+def run_pipelined(cap, K, dist, tag_sizes, use_calibrated, first_frame, args, writer=None, maps=None, arm=None,
+                  startup=None):
+    """Capture thread + detection/pose worker pool + display on this thread."""
+    # One filter shared by all workers, so every tag keeps a single track.
+    pose_filter = TagPoseFilter() if args.filter else None
+    # One-shot guard: only the worker that finishes the first frame (detector creation
+    # included) reports; next() on a count is atomic, so exactly one worker sees 0.
+    detections = itertools.count()
+
+    def make_processor():
+        detector = make_frame_detector(args)
+        tracker = make_tracker(detector, args)
+
+        def process(frame, timings):
+            t_s = frame.source_time_s if frame.source_time_s is not None else frame.timestamp
+            # Replace the image so the display stage draws on the undistorted frame.
+            frame.image = undistort_frame(maps, frame.image, timings)
+            poses = detect_tag_poses(detector, frame.image, K, dist, tag_sizes, timings, tracker, pose_filter, t_s)
+            if startup is not None and next(detections) == 0:
+                report_first_detection(startup)
+            if arm is not None:
+                # From the worker, so IK sees the target without waiting for display/logging.
+                arm.submit(poses, frame.timestamp, timings)
+            return poses
+        return process
+
+    def display(result, stats):
+        summary = stats.summary()
+        latency = summary.get("pose_latency", {}).get("mean_ms", 0.0)
+        frame = result.frame.image
+        draw_overlay(frame, result.detection, K, dist, tag_sizes, use_calibrated,
+                     extra_lines=[f"Pipeline: {args.workers} workers | pose latency {latency:.1f} ms"])
+        cv2.imshow(WINDOW_NAME, frame)
+        return (cv2.waitKey(1) & 0xFF) != ord('q')
+
+    def log_result(result):
+        f = result.frame
+        t_s = f.source_time_s if f.source_time_s is not None else f.timestamp
+        write_pose_results(writer, f.seq, t_s, result.detection, result.timings_ms)
+
+    # Workers already run in parallel; keep OpenCV's own thread pool from oversubscribing the CPU.
+    cv2.setNumThreads(max((os.cpu_count() or 1) // args.workers, 1))
+
+    pipeline = PosePipeline(
+        cap,
+        make_processor,
+        display=None if args.no_display else display,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        stats_every_s=args.stats_every,
+        on_result=log_result if writer is not None else None,
+        # A recording should be processed frame by frame; a live camera drops stale frames.
+        drop_frames=args.source is None,
+        first_image=first_frame,
+    )
+    pipeline.run(max_frames=args.max_frames, duration_s=args.duration)
+    print(pipeline.report(pipeline.elapsed_s))
 
-        cv2.imshow("AprilTag_PoseDetector", frame)
-        if (cv2.waitKey(1) & 0xFF) == ord('q'):
-            break
+def main():
+    ap = argparse.ArgumentParser(description="AprilTag pose detector")
+    ap.add_argument("--cam-index", type=int, default=0)
+    add_source_args(ap)
+    ap.add_argument("--out", type=Path, default=None,
+                    help="Write per-frame pose results (.csv: one row per tag, otherwise JSONL: one line per frame)")
+    # SET THIS (or tags.yaml) to your measured black-square edge length in meters
+    ap.add_argument("--tag-size", type=float, default=None,
+                    help="Default tag black-square edge length (m); overrides default_size_m in --tags-config")
+    ap.add_argument("--tags-config", type=Path, default=DEFAULT_TAGS_YAML, help="Per-ID tag sizes (YAML)")
+    ap.add_argument("--profile", default=None,
+                    help="Detector parameter profile from --profiles-config (e.g. fast, balanced, accurate)")
+    ap.add_argument("--profiles-config", type=Path, default=DEFAULT_PROFILES_YAML,
+                    help="Detector parameter profiles (YAML)")
+    ap.add_argument("--pipeline", action="store_true",
+                    help="Run capture, detection/pose and display as separate threaded stages")
+    ap.add_argument("--workers", type=int, default=2, help="Detection/pose worker threads (--pipeline)")
+    ap.add_argument("--queue-size", type=int, default=1,
+                    help="Frames buffered between capture and workers; oldest is dropped when full (--pipeline)")
+    ap.add_argument("--headless", action="store_true", help="Same as --pipeline --no-display")
+    ap.add_argument("--stats-every", type=float, default=5.0, help="Seconds between timing reports (--pipeline)")
+    ap.add_argument("--max-frames", type=int, default=None, help="Stop after this many processed frames")
+    ap.add_argument("--duration", type=float, default=None, help="Stop after this many seconds (--pipeline)")
+    ap.add_argument("--track", action="store_true",
+                    help="Only search around the last frame's tags; full-frame scan every --full-every frames")
+    ap.add_argument("--full-every", type=int, default=15, help="Full-frame scan interval in frames (--track)")
+    ap.add_argument("--roi-pad", type=float, default=0.5, help="ROI padding as a fraction of tag size (--track)")
+    ap.add_argument("--coarse", action="store_true",
+                    help="Detect on a downscaled frame, refine corners at full resolution with cornerSubPix")
+    ap.add_argument("--coarse-target-px", type=float, default=48.0,
+                    help="Tag side (px) to keep in the downscaled frame; sets the scale (--coarse)")
+    ap.add_argument("--coarse-min-scale", type=float, default=0.25, help="Smallest downscale factor (--coarse)")
+    ap.add_argument("--filter", action="store_true",
+                    help="Kalman-filter each tag's pose and seed solvePnP with its prediction")
+    ap.add_argument("--stereo", action="store_true",
+                    help="Two cameras: triangulate tag corners (needs a stereo section in camera.yaml)")
+    ap.add_argument("--right-cam-index", type=int, default=1, help="Right camera index (--stereo)")
+    ap.add_argument("--right-source", type=Path, default=None,
+                    help="Replay the right camera from a file, like --source (--stereo)")
+    ap.add_argument("--max-skew-ms", type=float, default=10.0,
+                    help="Largest timestamp difference for a left/right frame pair (--stereo)")
+    ap.add_argument("--undistort", action="store_true",
+                    help="Remap frames with cached undistortion maps from camera.yaml; solve with zero distortion")
+    ap.add_argument("--undistort-alpha", type=float, default=0.0,
+                    help="0 crops to valid pixels, 1 keeps the whole field of view (--undistort)")
+    ap.add_argument("--arm", action="store_true",
+                    help="Stream the tag position (in the arm base frame) to the arm simulation's IK")
+    ap.add_argument("--arm-tag-id", type=int, default=None,
+                    help="Tag the arm follows; default is the nearest tag in each frame (--arm)")
+    ap.add_argument("--camera-to-base", type=Path, default=DEFAULT_EXTRINSIC_YAML,
+                    help="Camera pose in the arm base frame (YAML, --arm)")
+    ap.add_argument("--arm-config", type=Path, default=DEFAULT_ARM_CONFIG,
+                    help="Arm simulation config for joints and IK settings (--arm)")
+    ap.add_argument("--arm-max-age-ms", type=float, default=None,
+                    help="Skip targets that waited longer than this for IK; default from --arm-config (--arm)")
+    ap.add_argument("--startup-profile", action="store_true",
+                    help="Print an import/init timing breakdown up to the first detection")
+    args = ap.parse_args()
+    if args.headless:
+        args.pipeline = True
+        args.no_display = True
+    startup = None
+    if args.startup_profile:
+        # Shared with the arm simulation's tools (robot-arm-3d-sim/src/startup_profile.py).
+        add_sim_to_path()
+        from startup_profile import StartupProfile
+        startup = StartupProfile()
+
+    def mark(name):
+        if startup is not None:
+            startup.mark(name)
+
+    if args.stereo:
+        unsupported = [flag for flag, on in (("--arm", args.arm), ("--track", args.track),
+                                             ("--filter", args.filter), ("--undistort", args.undistort)) if on]
+        if unsupported:
+            raise RuntimeError(f"{', '.join(unsupported)} not supported with --stereo yet")
+
+    tag_sizes = load_tag_sizes(args.tags_config, args.tag_size)
+    mark("tag sizes")
+    load_detector_parameters(args.profile, args.profiles_config)  # fail early on a bad profile
+    mark("detector profile")
+
+    cap = open_source(args.source, args.cam_index, args.max_fps, args.as_fast_as_possible)
+    if not cap.isOpened():
+        raise RuntimeError("Could not open webcam. Try --cam-index 1 or check permissions.")
+    mark("open source")
 
-    cap.release()
-    cv2.destroyAllWindows()
+    # Calibration load (optional)
+    camera_yaml = Path(__file__).parent / "camera.yaml"
+    use_calibrated = camera_yaml.exists()
+
+    if not args.no_display:
+        print("Press 'q' to quit.")
+    print(f"Calibration file found: {use_calibrated} ({camera_yaml})")
+    print(f"Detector profile: {args.profile or 'OpenCV defaults'}")
+    print(f"Tag sizes: default {tag_sizes.default_m:.3f} m, per-ID {tag_sizes.by_id}")
+
+    if args.stereo:
+        stereo = load_stereo_calibration(camera_yaml) if use_calibrated else None
+        if stereo is None:
+            cap.release()
+            raise RuntimeError(f"--stereo needs a stereo section in {camera_yaml} (see src/stereo.py)")
+        right_cap = open_source(args.right_source, args.right_cam_index, args.max_fps, args.as_fast_as_possible)
+        if not right_cap.isOpened():
+            cap.release()
+            raise RuntimeError("Could not open the right camera. Try --right-cam-index.")
+        print(f"Stereo baseline: {stereo.baseline_m * 100:.1f} cm")
+        if startup is not None:
+            startup.mark("open right source")
+            print(startup.report())
+        writer = ResultWriter(args.out, POSE_CSV_FIELDS) if args.out else None
+        try:
+            run_stereo(cap, right_cap, stereo, tag_sizes, args, writer)
+        finally:
+            if writer is not None:
+                writer.close()
+                print(f"Wrote: {writer.path}")
+            if not args.no_display:
+                cv2.destroyAllWindows()
+        return
+
+    ret, frame = cap.read()
+    if not ret:
+        cap.release()
+        return
+    mark("first frame")
+    # Init intrinsics
+    K, dist = camera_params_for(frame.shape, camera_yaml)
+    maps = None
+    if args.undistort:
+        if not use_calibrated:
+            print("--undistort needs camera.yaml; detecting on raw frames.")
+        else:
+            h, w = frame.shape[:2]
+            maps, cached, seconds = load_or_build_undistort_maps(camera_yaml, K, dist, (w, h), args.undistort_alpha)
+            # Frames are remapped before detection, so poses use the new K and no distortion.
+            K, dist = maps.K, maps.dist
+            print(f"Undistortion maps {'loaded from cache' if cached else 'built'} in {seconds * 1000:.1f} ms")
+    mark("camera params")
+
+    arm = None
+    if args.arm:
+        max_age_s = None if args.arm_max_age_ms is None else args.arm_max_age_ms / 1000.0
+        arm = ArmTargetStage(args.camera_to_base, args.arm_config, args.arm_tag_id, max_age_s)
+        print(f"Arm targets: tag {args.arm_tag_id if args.arm_tag_id is not None else 'nearest'}, "
+              f"camera-to-base from {args.camera_to_base}")
+        mark("arm stage")
+
+    writer = ResultWriter(args.out, POSE_CSV_FIELDS) if args.out else None
+    try:
+        if args.pipeline:
+            print(f"Source reports {cap.get(cv2.CAP_PROP_FPS):.1f} fps")
+            run_pipelined(cap, K, dist, tag_sizes, use_calibrated, frame, args, writer, maps, arm, startup)
+        else:
+            run_serial(cap, K, dist, tag_sizes, use_calibrated, frame, args, writer, maps, arm, startup)
+    finally:
+        cap.release()
+        if writer is not None:
+            writer.close()
+            print(f"Wrote: {writer.path}")
+        if arm is not None:
+            arm.close()  # last: a failed IK stream raises here, after the CSV is saved
+            print(arm.report())
+        if not args.no_display:
+            cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,87 @@
+"""
+detector_profiles.py
+
+Named cv2.aruco.DetectorParameters profiles (fast / balanced / accurate) kept in YAML.
+
+Each profile maps DetectorParameters attribute names to values, e.g.
+
+  profiles:
+    fast:
+      adaptiveThreshWinSizeMin: 5
+      cornerRefinementMethod: APRILTAG
+      aprilTagQuadDecimate: 2.0
+
+Any attribute of DetectorParameters may be set. Unset ones keep OpenCV's defaults.
+cornerRefinementMethod takes NONE / SUBPIX / CONTOUR / APRILTAG or the integer value.
+tools/tune_detector.py writes files in this format.
+"""
+
+from pathlib import Path
+
+import cv2
+import yaml
+
+DEFAULT_PROFILES_YAML = Path(__file__).resolve().parent / "detector_profiles.yaml"
+
+CORNER_REFINE = {
+    "NONE": cv2.aruco.CORNER_REFINE_NONE,
+    "SUBPIX": cv2.aruco.CORNER_REFINE_SUBPIX,
+    "CONTOUR": cv2.aruco.CORNER_REFINE_CONTOUR,
+    "APRILTAG": cv2.aruco.CORNER_REFINE_APRILTAG,
+}
+CORNER_REFINE_NAMES = {v: k for k, v in CORNER_REFINE.items()}
+
+
+def load_profiles(yaml_path: Path = DEFAULT_PROFILES_YAML) -> dict:
+    """{profile name: {parameter: value}} from a profiles YAML file."""
+    data = yaml.safe_load(Path(yaml_path).read_text(encoding="utf-8")) or {}
+    profiles = data.get("profiles") or {}
+    if not isinstance(profiles, dict):
+        raise ValueError(f"{yaml_path}: 'profiles' must be a mapping of name -> parameters")
+    return {str(name): dict(values or {}) for name, values in profiles.items()}
+
+
+def detector_parameters(profile: dict) -> "cv2.aruco.DetectorParameters":
+    """DetectorParameters with the profile's values applied on top of OpenCV's defaults."""
+    params = cv2.aruco.DetectorParameters()
+    for name, value in profile.items():
+        if not hasattr(params, name):
+            raise ValueError(f"Unknown detector parameter: {name}")
+        if name == "cornerRefinementMethod" and isinstance(value, str):
+            try:
+                value = CORNER_REFINE[value.upper()]
+            except KeyError:
+                raise ValueError(f"Unknown cornerRefinementMethod {value!r}; use one of {sorted(CORNER_REFINE)}")
+        setattr(params, name, type(getattr(params, name))(value))
+    return params
+
+
+def load_detector_parameters(profile_name: str, yaml_path: Path = DEFAULT_PROFILES_YAML):
+    """DetectorParameters for a named profile; None (OpenCV defaults) when profile_name is None."""
+    if profile_name is None:
+        return None
+    profiles = load_profiles(yaml_path)
+    if profile_name not in profiles:
+        raise ValueError(f"No profile {profile_name!r} in {yaml_path}; available: {', '.join(profiles)}")
+    return detector_parameters(profiles[profile_name])
+
+
+def profile_for_yaml(profile: dict) -> dict:
+    """Plain-Python copy of a profile with the refinement method written by name."""
+    out = {}
+    for name, value in profile.items():
+        if name == "cornerRefinementMethod" and not isinstance(value, str):
+            value = CORNER_REFINE_NAMES.get(int(value), int(value))
+        elif hasattr(value, "item"):
+            value = value.item()
+        out[name] = value
+    return out
+
+
+def save_profiles(yaml_path: Path, profiles: dict, header: str = "") -> None:
+    """Write {name: parameters} as a profiles YAML file; header lines become # comments."""
+    yaml_path = Path(yaml_path)
+    yaml_path.parent.mkdir(parents=True, exist_ok=True)
+    comment = "".join(f"# {line}\n".replace("# \n", "#\n") for line in header.splitlines())
+    body = yaml.safe_dump({"profiles": {k: profile_for_yaml(v) for k, v in profiles.items()}}, sort_keys=False)
+    yaml_path.write_text(comment + body, encoding="utf-8")
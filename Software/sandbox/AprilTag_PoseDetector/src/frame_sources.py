@@ -0,0 +1,209 @@
+"""
+frame_sources.py
+
+Frame sources with the same read() -> (ok, frame) interface as cv2.VideoCapture, so the
+detector and calibration loops can replay recorded footage instead of a live camera:
+
+  - a video file (anything cv2.VideoCapture opens),
+  - a directory of images (sorted by file name),
+  - an .npz frame dump with a "frames" array (N, H, W[, 3]) and optional "timestamps" (s)
+    or "fps".
+
+Replay is paced to the recording's frame rate by default. max_fps caps it, and
+as_fast_as_possible disables pacing for throughput benchmarks. After each read(),
+frame_time_s holds the frame's time in the recording, so filters see the real frame
+spacing even when replay runs faster than real time.
+
+Also writes per-frame results as CSV or JSONL (chosen by file suffix).
+"""
+
+import csv
+import json
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"}
+DEFAULT_FPS = 30.0
+
+
+class _Pacer:
+    """Sleeps so frames are handed out no faster than fps (no-op when fps is None)."""
+
+    def __init__(self, fps):
+        self.period = 1.0 / fps if fps else 0.0
+        self._next = None
+
+    def wait(self) -> None:
+        if not self.period:
+            return
+        now = time.perf_counter()
+        if self._next is None or now > self._next + self.period:
+            # First frame, or we fell behind: restart the schedule instead of bursting.
+            self._next = now
+        elif now < self._next:
+            time.sleep(self._next - now)
+        self._next += self.period
+
+
+class FileSource:
+    """Base class: subclasses implement _read() -> (ok, frame, frame_time_s)."""
+
+    native_fps = DEFAULT_FPS
+
+    def __init__(self, max_fps=None, as_fast_as_possible=False):
+        fps = None if as_fast_as_possible else min(self.native_fps, max_fps or self.native_fps)
+        self._pacer = _Pacer(fps)
+        self.frame_index = -1
+        self.frame_time_s = None
+
+    def isOpened(self) -> bool:
+        return True
+
+    def read(self):
+        ok, frame, t = self._read()
+        if not ok:
+            return False, None
+        self._pacer.wait()
+        self.frame_index += 1
+        self.frame_time_s = t
+        return True, frame
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.native_fps
+        return 0.0
+
+    def release(self) -> None:
+        pass
+
+
+class VideoFileSource(FileSource):
+    def __init__(self, path: Path, **kwargs):
+        self._cap = cv2.VideoCapture(str(path))
+        if not self._cap.isOpened():
+            raise FileNotFoundError(f"Could not open video: {path}")
+        self.native_fps = self._cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+        super().__init__(**kwargs)
+
+    def _read(self):
+        ok, frame = self._cap.read()
+        if not ok:
+            return False, None, None
+        t = self._cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        return True, frame, t
+
+    def release(self) -> None:
+        self._cap.release()
+
+
+class ImageDirSource(FileSource):
+    def __init__(self, path: Path, fps: float = DEFAULT_FPS, **kwargs):
+        self._files = sorted(p for p in Path(path).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        if not self._files:
+            raise FileNotFoundError(f"No images found in {path}")
+        self.native_fps = fps
+        self._i = 0
+        super().__init__(**kwargs)
+
+    def _read(self):
+        while self._i < len(self._files):
+            i = self._i
+            self._i += 1
+            frame = cv2.imread(str(self._files[i]), cv2.IMREAD_COLOR)
+            if frame is not None:
+                return True, frame, i / self.native_fps
+        return False, None, None
+
+
+class NpzSource(FileSource):
+    def __init__(self, path: Path, **kwargs):
+        data = np.load(path)
+        if "frames" not in data:
+            raise ValueError(f"{path} has no 'frames' array")
+        self._frames = data["frames"]
+        n = len(self._frames)
+        if "timestamps" in data:
+            self._times = np.asarray(data["timestamps"], dtype=float)
+            span = self._times[-1] - self._times[0] if n > 1 else 0.0
+            self.native_fps = (n - 1) / span if span > 0 else DEFAULT_FPS
+        else:
+            self.native_fps = float(data["fps"]) if "fps" in data else DEFAULT_FPS
+            self._times = np.arange(n) / self.native_fps
+        self._i = 0
+        super().__init__(**kwargs)
+
+    def _read(self):
+        if self._i >= len(self._frames):
+            return False, None, None
+        frame = self._frames[self._i]
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        t = float(self._times[self._i])
+        self._i += 1
+        return True, np.ascontiguousarray(frame), t
+
+
+def open_source(source, cam_index: int = 0, max_fps=None, as_fast_as_possible=False):
+    """
+    A camera (source None) or a file source picked by path: directory -> images,
+    .npz -> frame dump, anything else -> video file.
+    """
+    if source is None:
+        return cv2.VideoCapture(cam_index)
+    path = Path(source)
+    kwargs = {"max_fps": max_fps, "as_fast_as_possible": as_fast_as_possible}
+    if path.is_dir():
+        return ImageDirSource(path, **kwargs)
+    if not path.exists():
+        raise FileNotFoundError(f"Source not found: {path}")
+    if path.suffix.lower() == ".npz":
+        return NpzSource(path, **kwargs)
+    return VideoFileSource(path, **kwargs)
+
+
+def add_source_args(ap) -> None:
+    """--source/--max-fps/--as-fast-as-possible/--no-display, shared by the detector and calibration."""
+    ap.add_argument("--source", type=Path, default=None,
+                    help="Replay a video file, image directory or .npz frame dump instead of the camera")
+    ap.add_argument("--max-fps", type=float, default=None, help="Cap replay rate (--source)")
+    ap.add_argument("--as-fast-as-possible", action="store_true",
+                    help="Replay without pacing, for throughput benchmarks (--source)")
+    ap.add_argument("--no-display", action="store_true", help="Do not open a window")
+
+
+class ResultWriter:
+    """
+    Per-frame results to CSV (one row per record) or JSONL (one JSON object per record),
+    picked by the path suffix (.csv, anything else is JSONL).
+    """
+
+    def __init__(self, path: Path, fieldnames):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self.path, "w", newline="", encoding="utf-8")
+        self._csv = None
+        if self.path.suffix.lower() == ".csv":
+            self._csv = csv.DictWriter(self._f, fieldnames=fieldnames, extrasaction="ignore")
+            self._csv.writeheader()
+
+    @property
+    def is_csv(self) -> bool:
+        return self._csv is not None
+
+    def write(self, record: dict) -> None:
+        if self._csv is not None:
+            self._csv.writerow(record)
+        else:
+            self._f.write(json.dumps(record) + "\n")
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
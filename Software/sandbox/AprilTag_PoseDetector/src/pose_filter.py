@@ -0,0 +1,166 @@
+"""
+pose_filter.py
+
+Per-tag temporal filtering of solvePnP poses.
+
+Each tag ID gets a constant-velocity Kalman filter over translation and rotation.
+Rotation is filtered on the rotation group rather than on raw rvecs: the innovation is
+the rotation vector of R_measured * R_predicted^T, so the filter never sees the
+2*pi wrap-around of Rodrigues vectors. Translation and rotation each use one 2x2
+[value, rate] covariance shared by their three axes (every axis has the same noise
+model and is measured every frame, so the covariances would be identical anyway).
+
+The predicted pose also serves as the useExtrinsicGuess seed for the next solvePnP.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+
+def rotvec_to_matrix(rvec) -> np.ndarray:
+    R, _ = cv2.Rodrigues(np.asarray(rvec, dtype=np.float64).reshape(3, 1))
+    return R
+
+
+def matrix_to_rotvec(R) -> np.ndarray:
+    rvec, _ = cv2.Rodrigues(R)
+    return rvec.reshape(3)
+
+
+class ConstantVelocityCovariance:
+    """
+    Covariance and gains of a per-axis [value, rate] Kalman filter with white-noise
+    acceleration (std accel_noise) and measurement noise (std meas_noise) on the value.
+    """
+
+    def __init__(self, accel_noise: float, meas_noise: float, initial_rate_std: float):
+        self.q = accel_noise * accel_noise
+        self.r = meas_noise * meas_noise
+        self.P = np.diag([self.r, initial_rate_std * initial_rate_std])
+
+    def predict(self, dt: float) -> None:
+        F = np.array([[1.0, dt], [0.0, 1.0]])
+        Q = self.q * np.array([[dt**4 / 4.0, dt**3 / 2.0], [dt**3 / 2.0, dt * dt]])
+        self.P = F @ self.P @ F.T + Q
+
+    def update(self):
+        """Kalman gain [k_value, k_rate] for a value measurement; updates P in place."""
+        S = self.P[0, 0] + self.r
+        K = self.P[:, 0] / S
+        self.P = self.P - np.outer(K, self.P[0, :])
+        return K
+
+    def innovation_std(self) -> float:
+        return float(np.sqrt(self.P[0, 0] + self.r))
+
+
+class PoseKalman:
+    """Constant-velocity filter for one tag's pose (camera frame, SI units)."""
+
+    def __init__(self, rvec, tvec, t_s: float, trans_accel_noise=0.5, trans_meas_noise=0.002,
+                 rot_accel_noise=5.0, rot_meas_noise=0.01):
+        self.R = rotvec_to_matrix(rvec)
+        self.p = np.asarray(tvec, dtype=np.float64).reshape(3).copy()
+        self.v = np.zeros(3)          # m/s
+        self.w = np.zeros(3)          # rad/s, camera frame
+        self.t = t_s
+        self.frame_dt = None          # running estimate of the frame interval
+        self._trans = ConstantVelocityCovariance(trans_accel_noise, trans_meas_noise, 1.0)
+        self._rot = ConstantVelocityCovariance(rot_accel_noise, rot_meas_noise, 5.0)
+
+    def predict(self, t_s: float):
+        """Pose (rvec, tvec) extrapolated to t_s, without changing the filter state."""
+        dt = t_s - self.t
+        R = rotvec_to_matrix(self.w * dt) @ self.R
+        return matrix_to_rotvec(R), self.p + self.v * dt
+
+    def predict_next(self):
+        """Pose expected at the next frame, one frame interval after the last update."""
+        return self.predict(self.t + (self.frame_dt or 0.0))
+
+    def update(self, rvec, tvec, t_s: float, gate_sigma: float = 8.0) -> bool:
+        """
+        Fuse a measurement taken at t_s. Measurements not newer than the state are
+        ignored. Returns False when the translation innovation is beyond gate_sigma
+        standard deviations (the tag jumped); the track should then be restarted.
+        """
+        dt = t_s - self.t
+        if dt <= 0.0:
+            return True
+        self._trans.predict(dt)
+        self._rot.predict(dt)
+        R_pred = rotvec_to_matrix(self.w * dt) @ self.R
+        p_pred = self.p + self.v * dt
+
+        e_p = np.asarray(tvec, dtype=np.float64).reshape(3) - p_pred
+        if np.linalg.norm(e_p) > gate_sigma * self._trans.innovation_std():
+            return False
+        e_r = matrix_to_rotvec(rotvec_to_matrix(rvec) @ R_pred.T)
+
+        k_p = self._trans.update()
+        k_r = self._rot.update()
+        self.p = p_pred + k_p[0] * e_p
+        self.v = self.v + k_p[1] * e_p
+        self.R = rotvec_to_matrix(k_r[0] * e_r) @ R_pred
+        self.w = self.w + k_r[1] * e_r
+        self.frame_dt = dt if self.frame_dt is None else 0.8 * self.frame_dt + 0.2 * dt
+        self.t = t_s
+        return True
+
+    @property
+    def rvec(self) -> np.ndarray:
+        return matrix_to_rotvec(self.R)
+
+
+class TagPoseFilter:
+    """
+    PoseKalman per tag ID. Safe to share between pipeline workers: updates are
+    serialized, and measurements older than a track's last update are ignored.
+    """
+
+    def __init__(self, max_age_s: float = 0.5, **kalman_kwargs):
+        self.max_age_s = max_age_s
+        self.kalman_kwargs = kalman_kwargs
+        self._tracks = {}
+        self._lock = threading.Lock()
+        self.restarts = 0
+
+    def guesses(self, t_s: float) -> dict:
+        """Predicted (rvec, tvec) at t_s for every live track, for warm-starting solvePnP."""
+        with self._lock:
+            return {
+                tag_id: tuple(np.reshape(x, (3, 1)) for x in track.predict(t_s))
+                for tag_id, track in self._tracks.items()
+                if t_s - track.t <= self.max_age_s
+            }
+
+    def update(self, tag_id: int, rvec, tvec, t_s: float) -> dict:
+        """
+        Fuse one measurement and return a snapshot of the track: filtered rvec/tvec,
+        velocity (m/s), angular_velocity (rad/s) and the predicted next-frame rvec/tvec.
+        """
+        with self._lock:
+            track = self._tracks.get(tag_id)
+            if track is not None and t_s - track.t > self.max_age_s:
+                track = None
+            if track is None or not track.update(rvec, tvec, t_s):
+                if track is not None:
+                    self.restarts += 1
+                track = PoseKalman(rvec, tvec, t_s, **self.kalman_kwargs)
+                self._tracks[tag_id] = track
+            predicted_rvec, predicted_tvec = track.predict_next()
+            return {
+                "rvec": track.rvec.reshape(3, 1),
+                "tvec": track.p.reshape(3, 1).copy(),
+                "velocity": track.v.copy(),
+                "angular_velocity": track.w.copy(),
+                "predicted_rvec": predicted_rvec.reshape(3, 1),
+                "predicted_tvec": predicted_tvec.reshape(3, 1),
+            }
+
+    def prune(self, t_s: float) -> None:
+        with self._lock:
+            for tag_id in [k for k, tr in self._tracks.items() if t_s - tr.t > self.max_age_s]:
+                del self._tracks[tag_id]
@@ -0,0 +1,263 @@
+"""
+pose_pipeline.py
+
+Pipelined version of the detect_pose loop:
+
+  capture thread -> bounded drop-oldest frame queue -> N detection/pose workers -> display stage
+
+The capture thread only reads frames, so a slow detection never makes the camera
+buffer back up: when the workers fall behind, the oldest queued frame is dropped and
+the newest one is kept. The display stage runs on the calling thread (imshow must stay
+on the main thread on macOS) and only ever shows results newer than the last one shown.
+
+Every stage is timed, and each result carries the capture timestamp of its frame so the
+end-to-end latency (frame read -> pose ready, and frame read -> displayed) can be reported.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class CapturedFrame:
+    seq: int
+    timestamp: float  # time.perf_counter() when read() returned
+    image: np.ndarray
+    source_time_s: float = None  # frame time in the recording, for replayed sources
+
+
+@dataclass
+class FrameResult:
+    frame: CapturedFrame
+    detection: object
+    timings_ms: dict = field(default_factory=dict)
+    done_at: float = 0.0
+
+
+class DropOldestQueue:
+    """Bounded FIFO where put() never blocks: a full queue discards its oldest item."""
+
+    def __init__(self, maxsize: int):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item, block: bool = False) -> None:
+        """Append item; with block=True wait for room instead of dropping (file replay)."""
+        with self._cond:
+            if block:
+                self._cond.wait_for(lambda: len(self._items) < self._items.maxlen or self._closed)
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def get(self, timeout: float = None):
+        """Next item, or None once the queue is closed and empty (or on timeout)."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            item = self._items.popleft() if self._items else None
+            self._cond.notify_all()
+            return item
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class StageStats:
+    """Thread-safe rolling window of per-stage timings in milliseconds."""
+
+    def __init__(self, window: int = 300):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, ms: float) -> None:
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = deque(maxlen=self.window)
+                self._counts[stage] = 0
+            self._samples[stage].append(ms)
+            self._counts[stage] += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            snapshot = {k: (np.array(v), self._counts[k]) for k, v in self._samples.items() if v}
+        return {
+            stage: {
+                "count": count,
+                "mean_ms": float(v.mean()),
+                "p50_ms": float(np.percentile(v, 50)),
+                "p99_ms": float(np.percentile(v, 99)),
+                "max_ms": float(v.max()),
+            }
+            for stage, (v, count) in snapshot.items()
+        }
+
+    def format(self) -> str:
+        lines = [f"{'stage':<12}{'count':>8}{'mean':>9}{'p50':>9}{'p99':>9}{'max':>9}  (ms)"]
+        for stage, s in self.summary().items():
+            lines.append(
+                f"{stage:<12}{s['count']:>8}{s['mean_ms']:>9.2f}{s['p50_ms']:>9.2f}"
+                f"{s['p99_ms']:>9.2f}{s['max_ms']:>9.2f}"
+            )
+        return "\n".join(lines)
+
+
+class PosePipeline:
+    """
+    Runs capture, detection/pose and display as separate stages.
+
+    cap:            anything with read() -> (ok, frame), e.g. cv2.VideoCapture
+    make_processor: called once per worker thread; returns process(frame, timings_ms) -> detection,
+                    where frame is a CapturedFrame (image plus capture seq/timestamp).
+                    Each worker gets its own processor so detector objects are never shared.
+    display:        called on the calling thread as display(result, stats); return False to stop.
+                    None runs headless.
+    on_result:      called on the calling thread for every result, in arrival order
+                    (e.g. to log it), before the display stage drops stale ones.
+    drop_frames:    False makes capture wait for a free worker instead of dropping frames,
+                    so a replayed recording is processed frame by frame.
+    first_image:    a frame already read from cap (e.g. to size the intrinsics); it is
+                    queued first so it is not lost.
+    """
+
+    def __init__(self, cap, make_processor, display=None, workers: int = 2, queue_size: int = 1,
+                 stats_every_s: float = 5.0, on_result=None, drop_frames: bool = True, first_image=None):
+        self.cap = cap
+        self.first_image = first_image
+        self._first_source_time = getattr(cap, "frame_time_s", None)
+        self.make_processor = make_processor
+        self.display = display
+        self.on_result = on_result
+        self.drop_frames = drop_frames
+        self.workers = max(int(workers), 1)
+        self.frames = DropOldestQueue(queue_size)
+        # Results are only dropped if display falls a whole worker pool behind.
+        self.results = DropOldestQueue(self.workers * 2)
+        self.stats = StageStats()
+        self.stats_every_s = stats_every_s
+        self.captured = 0
+        self.processed = 0
+        self.shown = 0
+        self.stale = 0
+        self._stop = threading.Event()
+        self._threads = []
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _capture_loop(self) -> None:
+        seq = 0
+        if self.first_image is not None:
+            self.frames.put(CapturedFrame(seq, time.perf_counter(), self.first_image, self._first_source_time))
+            self.captured += 1
+            seq += 1
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            ok, image = self.cap.read()
+            t1 = time.perf_counter()
+            if not ok:
+                break
+            self.stats.add("capture", (t1 - t0) * 1000.0)
+            source_time = getattr(self.cap, "frame_time_s", None)
+            self.frames.put(CapturedFrame(seq, t1, image, source_time), block=not self.drop_frames)
+            self.captured += 1
+            seq += 1
+        self.frames.close()
+
+    def _worker_loop(self) -> None:
+        process = self.make_processor()
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            t0 = time.perf_counter()
+            self.stats.add("queue_wait", (t0 - frame.timestamp) * 1000.0)
+            timings = {}
+            detection = process(frame, timings)
+            done = time.perf_counter()
+            for stage, ms in timings.items():
+                self.stats.add(stage, ms)
+            self.stats.add("process", (done - t0) * 1000.0)
+            self.stats.add("pose_latency", (done - frame.timestamp) * 1000.0)
+            self.results.put(FrameResult(frame, detection, timings, done), block=not self.drop_frames)
+
+    def run(self, max_frames: int = None, duration_s: float = None) -> StageStats:
+        """Run until the source ends, display asks to stop, or a frame/time limit is reached."""
+        self._threads = [threading.Thread(target=self._capture_loop, name="capture", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._worker_loop, name=f"pose-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+        t_start = time.perf_counter()
+        t_report = t_start
+        last_seq = -1
+        try:
+            while True:
+                # Check the workers before the get: a worker can put its last result and exit
+                # while get() is timing out, so only a get that follows their exit proves the
+                # queue is drained.
+                workers_done = not any(t.is_alive() for t in self._threads[1:])
+                result = self.results.get(timeout=0.1)
+                if result is None:
+                    if workers_done:
+                        break
+                else:
+                    self.processed += 1
+                    if self.on_result is not None:
+                        self.on_result(result)
+                    # Workers can finish out of order; never show an older frame after a newer one.
+                    if result.frame.seq < last_seq:
+                        self.stale += 1
+                    else:
+                        last_seq = result.frame.seq
+                        if self.display is not None:
+                            t0 = time.perf_counter()
+                            keep_going = self.display(result, self.stats)
+                            t1 = time.perf_counter()
+                            self.stats.add("display", (t1 - t0) * 1000.0)
+                            self.stats.add("e2e_latency", (t1 - result.frame.timestamp) * 1000.0)
+                            if keep_going is False:
+                                break
+                        self.shown += 1
+
+                now = time.perf_counter()
+                if max_frames is not None and self.processed >= max_frames:
+                    break
+                if duration_s is not None and now - t_start >= duration_s:
+                    break
+                if self.stats_every_s and now - t_report >= self.stats_every_s:
+                    t_report = now
+                    print(self.report(now - t_start))
+        finally:
+            self._stop.set()
+            self.frames.close()
+            self.results.close()
+            for t in self._threads:
+                t.join(timeout=1.0)
+        self.elapsed_s = time.perf_counter() - t_start
+        return self.stats
+
+    def report(self, elapsed_s: float) -> str:
+        elapsed_s = max(elapsed_s, 1e-9)
+        return (
+            f"captured {self.captured} ({self.captured / elapsed_s:.1f} fps) | "
+            f"processed {self.processed} ({self.processed / elapsed_s:.1f} fps) | "
+            f"dropped {self.frames.dropped} | stale {self.stale}\n"
+            + self.stats.format()
+        )
@@ -0,0 +1,190 @@
+"""
+stereo.py
+
+Two-camera capture and tag-corner triangulation for detect_pose.py --stereo.
+
+Calibration: the left camera keeps the existing camera.yaml keys (camera_matrix,
+dist_coeffs). A stereo section adds the right camera and the extrinsics:
+
+  stereo:
+    camera_matrix: [[fx, 0, cx], [0, fy, cy], [0, 0, 1]]   # right camera
+    dist_coeffs: [k1, k2, p1, p2, k3]
+    R: [[...], [...], [...]]   # rotation left -> right camera (as from cv2.stereoCalibrate)
+    T: [tx, ty, tz]            # translation left -> right camera, meters
+
+so a point X in the left camera frame is R @ X + T in the right camera frame.
+Triangulated points and stereo poses are reported in the left camera frame.
+
+StereoCapture reads both cameras on their own threads, stamps every frame on arrival
+(or uses a file source's frame time), and hands out pairs whose timestamps are within
+max_skew_s. A frame whose partner never arrived is dropped and counted.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+
+
+@dataclass
+class StereoCalibration:
+    K1: np.ndarray
+    dist1: np.ndarray
+    K2: np.ndarray
+    dist2: np.ndarray
+    R: np.ndarray        # left -> right rotation
+    T: np.ndarray        # (3, 1) left -> right translation (m)
+
+    @property
+    def P1(self) -> np.ndarray:
+        return self.K1 @ np.hstack([np.eye(3), np.zeros((3, 1))])
+
+    @property
+    def P2(self) -> np.ndarray:
+        return self.K2 @ np.hstack([self.R, self.T])
+
+    @property
+    def baseline_m(self) -> float:
+        return float(np.linalg.norm(self.T))
+
+
+def load_stereo_calibration(yaml_path: Path):
+    """StereoCalibration from camera.yaml, or None when it has no stereo section."""
+    with open(yaml_path, "r") as f:
+        data = yaml.safe_load(f) or {}
+    st = data.get("stereo")
+    if not st:
+        return None
+    return StereoCalibration(
+        K1=np.array(data["camera_matrix"], dtype=np.float64),
+        dist1=np.array(data["dist_coeffs"], dtype=np.float64).reshape(-1, 1),
+        K2=np.array(st["camera_matrix"], dtype=np.float64),
+        dist2=np.array(st["dist_coeffs"], dtype=np.float64).reshape(-1, 1),
+        R=np.array(st["R"], dtype=np.float64).reshape(3, 3),
+        T=np.array(st["T"], dtype=np.float64).reshape(3, 1),
+    )
+
+
+def triangulate(calib: StereoCalibration, pts_left, pts_right) -> np.ndarray:
+    """(N, 3) points in the left camera frame from matching (N, 2) pixel points."""
+    ul = cv2.undistortPoints(np.asarray(pts_left, np.float64).reshape(-1, 1, 2), calib.K1, calib.dist1, P=calib.K1)
+    ur = cv2.undistortPoints(np.asarray(pts_right, np.float64).reshape(-1, 1, 2), calib.K2, calib.dist2, P=calib.K2)
+    X = cv2.triangulatePoints(calib.P1, calib.P2, ul.reshape(-1, 2).T, ur.reshape(-1, 2).T)
+    return (X[:3] / X[3]).T
+
+
+def fit_rigid(model_pts, measured_pts):
+    """
+    Least-squares rotation R and translation t with R @ model + t ~ measured (Kabsch).
+    Returns (R, t (3, 1), RMS residual in the units of the points).
+    """
+    model_pts = np.asarray(model_pts, np.float64)
+    measured_pts = np.asarray(measured_pts, np.float64)
+    mc = model_pts.mean(axis=0)
+    xc = measured_pts.mean(axis=0)
+    H = (model_pts - mc).T @ (measured_pts - xc)
+    U, _, Vt = np.linalg.svd(H)
+    D = np.diag([1.0, 1.0, np.sign(np.linalg.det(Vt.T @ U.T))])
+    R = Vt.T @ D @ U.T
+    t = xc - R @ mc
+    residual = measured_pts - (model_pts @ R.T + t)
+    return R, t.reshape(3, 1), float(np.sqrt((residual ** 2).sum(axis=1).mean()))
+
+
+def right_to_left(calib: StereoCalibration, R_right, t_right):
+    """A pose (rotation matrix, translation) in the right camera frame, moved to the left frame."""
+    R_left = calib.R.T @ R_right
+    t_left = calib.R.T @ (np.asarray(t_right, np.float64).reshape(3, 1) - calib.T)
+    return R_left, t_left
+
+
+class StereoCapture:
+    """
+    Concurrent capture from two read()-style sources with timestamp pairing.
+
+    drop_frames=True (live cameras) keeps at most two unpaired frames per camera, so pairs
+    stay fresh. drop_frames=False (file replay) makes the reader wait instead, so no
+    frame is lost to buffering.
+    """
+
+    def __init__(self, left, right, max_skew_s: float = 0.010, drop_frames: bool = True):
+        self.caps = (left, right)
+        self.max_skew_s = max_skew_s
+        self.drop_frames = drop_frames
+        self._maxlen = 2 if drop_frames else 4
+        self._bufs = (deque(), deque())
+        self._ended = [False, False]
+        self._closed = False
+        self._cond = threading.Condition()
+        self.pairs = 0
+        self.unpaired = 0
+        self.skews_ms = deque(maxlen=1000)
+        self._threads = [threading.Thread(target=self._reader, args=(i,), daemon=True) for i in (0, 1)]
+        for th in self._threads:
+            th.start()
+
+    def _reader(self, side: int) -> None:
+        cap, buf = self.caps[side], self._bufs[side]
+        while not self._closed:
+            ok, frame = cap.read()
+            t = time.perf_counter()
+            with self._cond:
+                if not ok:
+                    self._ended[side] = True
+                    self._cond.notify_all()
+                    return
+                source_t = getattr(cap, "frame_time_s", None)
+                if self.drop_frames:
+                    if len(buf) == self._maxlen:
+                        buf.popleft()
+                        self.unpaired += 1
+                else:
+                    self._cond.wait_for(lambda: len(buf) < self._maxlen or self._closed)
+                buf.append((t if source_t is None else source_t, frame))
+                self._cond.notify_all()
+
+    def read_pair(self, timeout: float = 2.0):
+        """(left frame, right frame, left time, right time), or None when a source ended or stalled."""
+        left, right = self._bufs
+        with self._cond:
+            while True:
+                ready = self._cond.wait_for(
+                    lambda: (left and right) or self._closed
+                    or (self._ended[0] and not left) or (self._ended[1] and not right),
+                    timeout,
+                )
+                if not ready or not (left and right):
+                    return None
+                (tl, fl), (tr, fr) = left[0], right[0]
+                if abs(tl - tr) <= self.max_skew_s:
+                    left.popleft()
+                    right.popleft()
+                    self.pairs += 1
+                    self.skews_ms.append(abs(tl - tr) * 1000.0)
+                    self._cond.notify_all()
+                    return fl, fr, tl, tr
+                # Every later frame from the other camera is newer still, so the older head
+                # can never be paired.
+                (left if tl < tr else right).popleft()
+                self.unpaired += 1
+                self._cond.notify_all()
+
+    def skew_summary(self) -> str:
+        if not self.skews_ms:
+            return "no pairs"
+        s = np.array(self.skews_ms)
+        return f"skew {s.mean():.2f} ms mean / {s.max():.2f} ms max, {self.unpaired} unpaired frames dropped"
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for th in self._threads:
+            th.join(timeout=1.0)
+        for cap in self.caps:
+            cap.release()
@@ -0,0 +1,145 @@
+"""
+tag_tracking.py
+
+ROI tracking for AprilTag detection. Once tags have been found, the next frame is
+only searched inside padded boxes around their last corners instead of the whole
+frame. A full-frame scan still runs every `full_every` frames (to pick up tags that
+just came into view) and whenever a tracked tag is missing from its ROI.
+"""
+
+import cv2
+import numpy as np
+
+
+def padded_box(corners, pad_frac, min_pad_px, width, height):
+    """Integer (x0, y0, x1, y1) box around (4, 2) corners, padded and clipped to the frame."""
+    x0, y0 = corners.min(axis=0)
+    x1, y1 = corners.max(axis=0)
+    pad = max(pad_frac * max(x1 - x0, y1 - y0), min_pad_px)
+    return (
+        int(max(x0 - pad, 0)),
+        int(max(y0 - pad, 0)),
+        int(min(x1 + pad + 1, width)),
+        int(min(y1 + pad + 1, height)),
+    )
+
+
+def merge_boxes(boxes):
+    """
+    Merge overlapping (x0, y0, x1, y1, perimeter) boxes until none overlap, so no tag is
+    searched twice. A merged box keeps the smallest tag perimeter of its members.
+    """
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        out = []
+        for b in boxes:
+            for i, o in enumerate(out):
+                if b[0] < o[2] and o[0] < b[2] and b[1] < o[3] and o[1] < b[3]:
+                    out[i] = (min(b[0], o[0]), min(b[1], o[1]), max(b[2], o[2]), max(b[3], o[3]), min(b[4], o[4]))
+                    merged = True
+                    break
+            else:
+                out.append(b)
+        boxes = out
+    return boxes
+
+
+class RoiTracker:
+    """
+    Wraps an ArucoDetector so detect() searches ROIs around the tags found last time.
+
+    pad_frac:   ROI padding as a fraction of the tag's pixel size (covers motion between frames)
+    min_pad_px: lower bound on the padding for small or distant tags
+    full_every: force a full-frame scan at least every this many frames
+    min_scale:  smallest size, relative to the last frame, a tracked tag may shrink to
+
+    ROIs are searched with a copy of the detector whose minMarkerPerimeterRate is set per
+    ROI from the tracked tags' perimeters. The rate is relative to the image size, so with
+    the default setting a small crop would accept far smaller contours than a full frame
+    does, and texture inside the crop would make the scan slower than expected.
+    """
+
+    def __init__(self, detector, pad_frac: float = 0.5, min_pad_px: int = 24, full_every: int = 15,
+                 min_scale: float = 0.5):
+        self.detector = detector
+        self._roi_params = detector.getDetectorParameters()
+        self._roi_detector = cv2.aruco.ArucoDetector(detector.getDictionary(), self._roi_params)
+        self.pad_frac = pad_frac
+        self.min_pad_px = min_pad_px
+        self.full_every = max(int(full_every), 1)
+        self.min_scale = min_scale
+        self._last = {}          # tag id -> (4, 2) corners from the previous frame
+        self._since_full = 0
+        self.full_scans = 0
+        self.roi_scans = 0
+        self.fallbacks = 0       # ROI scans that lost a tag and were redone full-frame
+        self.roi_pixels = 0
+        self.full_pixels = 0
+
+    def reset(self) -> None:
+        self._last = {}
+        self._since_full = 0
+
+    def _full(self, gray):
+        self.full_scans += 1
+        self.full_pixels += gray.shape[0] * gray.shape[1]
+        self._since_full = 0
+        corners_list, ids, _ = self.detector.detectMarkers(gray)
+        return list(corners_list), ids
+
+    def _in_rois(self, gray):
+        h, w = gray.shape[:2]
+        boxes = merge_boxes(
+            padded_box(c, self.pad_frac, self.min_pad_px, w, h) + (cv2.arcLength(c, True),)
+            for c in self._last.values()
+        )
+        corners_out = []
+        ids_out = []
+        for x0, y0, x1, y1, perimeter in boxes:
+            self.roi_pixels += (x1 - x0) * (y1 - y0)
+            self._roi_params.minMarkerPerimeterRate = self.min_scale * perimeter / max(x1 - x0, y1 - y0)
+            self._roi_detector.setDetectorParameters(self._roi_params)
+            corners_list, ids, _ = self._roi_detector.detectMarkers(gray[y0:y1, x0:x1])
+            if ids is None:
+                continue
+            offset = np.array([x0, y0], dtype=np.float32)
+            for c, tag_id in zip(corners_list, np.asarray(ids).reshape(-1)):
+                corners_out.append(c + offset)
+                ids_out.append(int(tag_id))
+        self.roi_scans += 1
+        self._since_full += 1
+        return corners_out, ids_out
+
+    def detect(self, gray):
+        """Same outputs as detectMarkers (corners list, ids or None) plus whether a full scan ran."""
+        full = not self._last or self._since_full + 1 >= self.full_every
+        if full:
+            corners_list, ids = self._full(gray)
+        else:
+            corners_list, ids = self._in_rois(gray)
+            if not set(self._last).issubset(ids):
+                # Track lost: rescan this same frame so no detection is missed.
+                self.fallbacks += 1
+                corners_list, ids = self._full(gray)
+                full = True
+
+        ids = np.asarray(ids, dtype=np.int32).reshape(-1, 1) if ids is not None and len(ids) else None
+        self._last = {} if ids is None else {
+            int(tag_id): c.reshape(4, 2) for c, tag_id in zip(corners_list, ids.reshape(-1))
+        }
+        return corners_list, ids, full
+
+    def stats(self) -> dict:
+        frames = self.full_scans + self.roi_scans - self.fallbacks
+        return {
+            "frames": frames,
+            "full_scans": self.full_scans,
+            "roi_scans": self.roi_scans,
+            "fallbacks": self.fallbacks,
+            "mean_roi_area_frac": (
+                self.roi_pixels / self.roi_scans / (self.full_pixels / self.full_scans)
+                if self.roi_scans and self.full_scans else 0.0
+            ),
+        }
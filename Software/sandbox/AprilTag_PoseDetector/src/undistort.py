@@ -0,0 +1,82 @@
+"""
+undistort.py
+
+Precomputed undistortion for the pose loop. cv2.initUndistortRectifyMap runs once per
+calibration and image size. Its fixed-point (CV_16SC2) maps are cached to disk, keyed by
+the SHA-256 of camera.yaml and the image size, so later runs just load them. Each frame
+then costs one cv2.remap. Detection and solvePnP run on the undistorted frame with the
+new camera matrix and zero distortion.
+"""
+
+import hashlib
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "cache"
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class UndistortMaps:
+    """Fixed-point remap tables plus the intrinsics that apply to the remapped image."""
+
+    def __init__(self, map1, map2, K, key: str = ""):
+        self.map1 = map1
+        self.map2 = map2
+        self.K = K
+        self.dist = np.zeros((5, 1), dtype=np.float64)
+        self.key = key
+
+    @property
+    def image_size(self):
+        h, w = self.map1.shape[:2]
+        return w, h
+
+    def remap(self, frame, out=None):
+        return cv2.remap(frame, self.map1, self.map2, cv2.INTER_LINEAR, dst=out)
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, map1=self.map1, map2=self.map2, K=self.K, key=np.array(self.key))
+
+    @classmethod
+    def load(cls, path: Path) -> "UndistortMaps":
+        with np.load(path) as data:
+            return cls(data["map1"], data["map2"], data["K"], str(data["key"]))
+
+
+def build_undistort_maps(K, dist, image_size, alpha: float = 0.0, key: str = "") -> UndistortMaps:
+    """
+    alpha = 0 crops the output to valid pixels only; alpha = 1 keeps every source pixel
+    (with black borders). See cv2.getOptimalNewCameraMatrix.
+    """
+    new_K, _ = cv2.getOptimalNewCameraMatrix(K, dist, image_size, alpha, image_size)
+    map1, map2 = cv2.initUndistortRectifyMap(K, dist, None, new_K, image_size, cv2.CV_16SC2)
+    return UndistortMaps(map1, map2, new_K, key)
+
+
+def load_or_build_undistort_maps(camera_yaml: Path, K, dist, image_size, alpha: float = 0.0,
+                                 cache_dir: Path = DEFAULT_CACHE_DIR, rebuild: bool = False):
+    """
+    Maps for the calibration in camera_yaml (K, dist as loaded from it) at image_size
+    (w, h), from the cache when the calibration file and size match.
+    Returns (maps, loaded_from_cache, seconds taken).
+    """
+    t0 = time.perf_counter()
+    w, h = image_size
+    key = f"{file_hash(camera_yaml)}:{w}x{h}:{alpha}"
+    path = Path(cache_dir) / f"undistort_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}.npz"
+    if path.exists() and not rebuild:
+        maps = UndistortMaps.load(path)
+        if maps.key == key:
+            return maps, True, time.perf_counter() - t0
+
+    maps = build_undistort_maps(K, dist, (w, h), alpha, key)
+    maps.save(path)
+    return maps, False, time.perf_counter() - t0
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+DETECTOR_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(DETECTOR_ROOT / "src"))
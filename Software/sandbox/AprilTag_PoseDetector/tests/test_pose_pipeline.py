@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+
+import pose_pipeline
+from pose_pipeline import PosePipeline
+
+
+class _Replay:
+    """A finite recording: read() returns n frames, then (False, None)."""
+
+    def __init__(self, n):
+        self.n = n
+        self.read_count = 0
+
+    def read(self):
+        if self.read_count >= self.n:
+            return False, None
+        self.read_count += 1
+        return True, np.zeros((4, 4), dtype=np.uint8)
+
+
+def _replay(n, workers, last_frame_s=0.0):
+    seen = []
+
+    def process(frame, timings):
+        if frame.seq == n - 1:
+            time.sleep(last_frame_s)
+        return frame.seq
+
+    def make_processor():
+        return process
+
+    pipeline = PosePipeline(_Replay(n), make_processor, workers=workers, stats_every_s=0,
+                            on_result=lambda r: seen.append(r.detection), drop_frames=False)
+    pipeline.run()
+    return pipeline, seen
+
+
+def test_replay_without_dropping_delivers_every_frame():
+    pipeline, seen = _replay(40, workers=3)
+    assert sorted(seen) == list(range(40))
+    assert pipeline.processed == 40
+
+
+def test_last_result_survives_worker_exit_during_get(monkeypatch):
+    # Widen the shutdown race: the last frame outlasts the 0.1 s get() timeout, and a
+    # timed-out get() then sleeps long enough for that worker to queue its result and exit
+    # before the loop looks at the workers.
+    real_get = pose_pipeline.DropOldestQueue.get
+
+    def slow_get(self, timeout=None):
+        item = real_get(self, timeout)
+        if item is None and timeout is not None:
+            time.sleep(0.1)
+        return item
+
+    monkeypatch.setattr(pose_pipeline.DropOldestQueue, "get", slow_get)
+    for _ in range(3):
+        _, seen = _replay(8, workers=2, last_frame_s=0.15)
+        assert sorted(seen) == list(range(8))
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+bench_coarse_detect.py
+
+Speed and accuracy of coarse-to-fine detection (src/coarse_detect.py) against plain
+full-resolution detectMarkers. Every frame is detected both ways. The report gives mean
+and p99 time, the share of full-resolution detections the coarse pass also found, and the
+corner distance between the two. With --synthetic, both are also scored against the true
+corners of the rendered tags.
+
+  python tools/bench_coarse_detect.py --video recording.mp4
+  python tools/bench_coarse_detect.py --synthetic 200 --target-px 32 48 64
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bench_roi_tracking import as_dict, synthetic_frames, video_frames  # noqa: E402
+from coarse_detect import CoarseToFineDetector  # noqa: E402
+from detect_pose import create_detector  # noqa: E402
+
+
+def corner_errors(found: dict, reference: dict):
+    """Per-corner distances (px) for tags present in both dicts."""
+    errs = [np.linalg.norm(found[k] - reference[k], axis=1) for k in found.keys() & reference.keys()]
+    return np.concatenate(errs) if errs else np.zeros(0)
+
+
+def stats(errs) -> dict:
+    if len(errs) == 0:
+        return {"mean_px": None, "p99_px": None, "max_px": None}
+    return {"mean_px": float(errs.mean()), "p99_px": float(np.percentile(errs, 99)), "max_px": float(errs.max())}
+
+
+def run(frames, target_px: float, min_scale: float) -> dict:
+    full_detector = create_detector()
+    coarse = CoarseToFineDetector(create_detector(), target_tag_px=target_px, min_scale=min_scale)
+    full_ms, coarse_ms, scales = [], [], []
+    full_found = coarse_found = both_found = 0
+    vs_full, full_vs_truth, coarse_vs_truth = [], [], []
+    for gray, truth in frames:
+        t0 = time.perf_counter()
+        corners_full, ids_full, _ = full_detector.detectMarkers(gray)
+        t1 = time.perf_counter()
+        corners_c, ids_c, _ = coarse.detectMarkers(gray)
+        t2 = time.perf_counter()
+        full_ms.append((t1 - t0) * 1000.0)
+        coarse_ms.append((t2 - t1) * 1000.0)
+        scales.append(coarse.last_scale)
+
+        a, b = as_dict(corners_full, ids_full), as_dict(corners_c, ids_c)
+        full_found += len(a)
+        coarse_found += len(b)
+        both_found += len(a.keys() & b.keys())
+        vs_full.append(corner_errors(b, a))
+        if truth is not None:
+            full_vs_truth.append(corner_errors(a, truth))
+            coarse_vs_truth.append(corner_errors(b, truth))
+
+    full = np.array(full_ms)
+    fast = np.array(coarse_ms)
+    out = {
+        "target_px": target_px,
+        "frames": len(full),
+        "mean_scale": float(np.mean(scales)),
+        "full_mean_ms": float(full.mean()),
+        "full_p99_ms": float(np.percentile(full, 99)),
+        "coarse_mean_ms": float(fast.mean()),
+        "coarse_p99_ms": float(np.percentile(fast, 99)),
+        "speedup": float(full.sum() / fast.sum()),
+        "full_detections": full_found,
+        "coarse_detections": coarse_found,
+        "recall_vs_full": both_found / full_found if full_found else None,
+        "corner_diff_vs_full": stats(np.concatenate(vs_full)),
+    }
+    if full_vs_truth:
+        out["full_vs_truth"] = stats(np.concatenate(full_vs_truth))
+        out["coarse_vs_truth"] = stats(np.concatenate(coarse_vs_truth))
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Coarse-to-fine vs full-resolution AprilTag detection")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--video", type=Path, help="Recorded video file")
+    src.add_argument("--synthetic", type=int, metavar="N", help="Generate N synthetic 1080p frames")
+    ap.add_argument("--max-frames", type=int, default=None)
+    ap.add_argument("--target-px", type=float, nargs="+", default=[48.0],
+                    help="One or more target tag sizes (px) in the downscaled frame")
+    ap.add_argument("--min-scale", type=float, default=0.25)
+    ap.add_argument("--out", type=Path, help="Write the results as JSON")
+    args = ap.parse_args()
+
+    results = []
+    for target_px in args.target_px:
+        if args.video:
+            frames = ((g, None) for g in video_frames(args.video, args.max_frames))
+        else:
+            frames = synthetic_frames(args.synthetic, with_truth=True)
+        r = run(frames, target_px, args.min_scale)
+        results.append(r)
+
+        def fmt(s):
+            return "n/a" if s["mean_px"] is None else f"{s['mean_px']:.2f} mean / {s['p99_px']:.2f} p99 / {s['max_px']:.2f} max px"
+        print(f"target {target_px:.0f} px (mean scale {r['mean_scale']:.2f}), {r['frames']} frames")
+        print(f"  full-res: {r['full_mean_ms']:.2f} ms mean, {r['full_p99_ms']:.2f} ms p99")
+        print(f"  coarse:   {r['coarse_mean_ms']:.2f} ms mean, {r['coarse_p99_ms']:.2f} ms p99 "
+              f"({r['speedup']:.2f}x)")
+        recall = r["recall_vs_full"]
+        print(f"  found {r['coarse_detections']} vs {r['full_detections']} tags "
+              f"(recall {recall * 100:.1f}% of full-res)" if recall is not None else "  no tags found at full res")
+        print(f"  corner diff vs full-res: {fmt(r['corner_diff_vs_full'])}")
+        if "full_vs_truth" in r:
+            print(f"  vs truth: full-res {fmt(r['full_vs_truth'])}")
+            print(f"            coarse   {fmt(r['coarse_vs_truth'])}")
+
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Wrote: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
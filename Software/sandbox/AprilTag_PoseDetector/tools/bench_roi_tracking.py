@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+bench_roi_tracking.py
+
+Measures the detection time saved by ROI tracking (src/tag_tracking.py) on recorded
+video. Every frame is detected twice, once full-frame and once through RoiTracker, so
+both timings and the detections themselves can be compared frame by frame.
+
+  python tools/bench_roi_tracking.py --video recording.mp4
+  python tools/bench_roi_tracking.py --synthetic 300     # moving tags on a 1080p frame
+
+Without a recording, --synthetic renders tags drifting across a 1920x1080 frame.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from detect_pose import create_detector  # noqa: E402
+from tag_tracking import RoiTracker  # noqa: E402
+
+
+def video_frames(path: Path, max_frames: int):
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise FileNotFoundError(f"Could not open video: {path}")
+    try:
+        n = 0
+        while max_frames is None or n < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            n += 1
+    finally:
+        cap.release()
+
+
+def synthetic_frames(n: int, size=(1920, 1080), tag_ids=(0, 1, 2), seed: int = 0, with_truth: bool = False):
+    """
+    Tags of different sizes drifting across a textured background.
+    with_truth=True yields (frame, {id: (4, 2) true corners}) instead of just frames; corners
+    are the black square's outer edges in pixel-center coordinates, in detectMarkers order.
+    """
+    rng = np.random.default_rng(seed)
+    w, h = size
+    background = cv2.GaussianBlur(rng.integers(90, 230, (h, w), dtype=np.uint8), (0, 0), 3)
+    dictionary = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_APRILTAG_36h11)
+    tags = []
+    for tag_id in tag_ids:
+        side = int(rng.integers(80, 220))
+        img = cv2.aruco.generateImageMarker(dictionary, int(tag_id), side)
+        # White quiet zone around the black square, as on a printed tag.
+        img = cv2.copyMakeBorder(img, side // 8, side // 8, side // 8, side // 8, cv2.BORDER_CONSTANT, value=255)
+        pos = rng.uniform([0, 0], [w - img.shape[1], h - img.shape[0]])
+        vel = rng.uniform(-6.0, 6.0, 2)
+        tags.append([img, pos, vel, int(tag_id), side])
+    for _ in range(n):
+        frame = background.copy()
+        truth = {}
+        for tag in tags:
+            img, pos, vel, tag_id, side = tag
+            th, tw = img.shape
+            pos += vel
+            for k, limit in ((0, w - tw), (1, h - th)):
+                if not 0 <= pos[k] <= limit:
+                    vel[k] = -vel[k]
+                    pos[k] = min(max(pos[k], 0), limit)
+            x, y = int(pos[0]), int(pos[1])
+            frame[y:y + th, x:x + tw] = img
+            x0, y0 = x + side // 8 - 0.5, y + side // 8 - 0.5
+            truth[tag_id] = np.array([[x0, y0], [x0 + side, y0], [x0 + side, y0 + side], [x0, y0 + side]])
+        yield (frame, truth) if with_truth else frame
+
+
+def as_dict(corners_list, ids):
+    if ids is None:
+        return {}
+    return {int(i): c.reshape(4, 2) for c, i in zip(corners_list, np.asarray(ids).reshape(-1))}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Full-frame vs ROI-tracked AprilTag detection time")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--video", type=Path, help="Recorded video file")
+    src.add_argument("--synthetic", type=int, metavar="N", help="Generate N synthetic 1080p frames")
+    ap.add_argument("--max-frames", type=int, default=None)
+    ap.add_argument("--full-every", type=int, default=15)
+    ap.add_argument("--roi-pad", type=float, default=0.5)
+    ap.add_argument("--out", type=Path, help="Write the summary as JSON")
+    args = ap.parse_args()
+
+    frames = video_frames(args.video, args.max_frames) if args.video else synthetic_frames(args.synthetic)
+    full_detector = create_detector()
+    tracker = RoiTracker(create_detector(), pad_frac=args.roi_pad, full_every=args.full_every)
+
+    full_ms, tracked_ms = [], []
+    agree = 0
+    max_corner_diff = 0.0
+    for gray in frames:
+        t0 = time.perf_counter()
+        corners_full, ids_full, _ = full_detector.detectMarkers(gray)
+        t1 = time.perf_counter()
+        corners_trk, ids_trk, _ = tracker.detect(gray)
+        t2 = time.perf_counter()
+        full_ms.append((t1 - t0) * 1000.0)
+        tracked_ms.append((t2 - t1) * 1000.0)
+
+        a, b = as_dict(corners_full, ids_full), as_dict(corners_trk, ids_trk)
+        if a.keys() == b.keys():
+            agree += 1
+            for k in a:
+                max_corner_diff = max(max_corner_diff, float(np.abs(a[k] - b[k]).max()))
+
+    if not full_ms:
+        print("No frames read.")
+        return 1
+    full = np.array(full_ms)
+    tracked = np.array(tracked_ms)
+    summary = {
+        "source": str(args.video) if args.video else f"synthetic:{args.synthetic}",
+        "frames": len(full),
+        "full_mean_ms": float(full.mean()),
+        "full_p99_ms": float(np.percentile(full, 99)),
+        "tracked_mean_ms": float(tracked.mean()),
+        "tracked_p99_ms": float(np.percentile(tracked, 99)),
+        "saving_pct": float((1.0 - tracked.sum() / full.sum()) * 100.0),
+        "same_ids_rate": agree / len(full),
+        "max_corner_diff_px": max_corner_diff,
+        "tracker": tracker.stats(),
+    }
+
+    print(f"Frames:            {summary['frames']}")
+    print(f"Full-frame detect: {summary['full_mean_ms']:.2f} ms mean, {summary['full_p99_ms']:.2f} ms p99")
+    print(f"ROI-tracked:       {summary['tracked_mean_ms']:.2f} ms mean, {summary['tracked_p99_ms']:.2f} ms p99")
+    print(f"Detection time saved: {summary['saving_pct']:.1f}%")
+    print(f"Same tag IDs as full-frame: {summary['same_ids_rate'] * 100:.1f}% of frames "
+          f"(max corner difference {max_corner_diff:.2f} px)")
+    print(f"Tracker: {summary['tracker']}")
+    if args.out:
+        args.out.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        print(f"Wrote: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
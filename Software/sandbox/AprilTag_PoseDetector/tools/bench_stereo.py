@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+bench_stereo.py
+
+Depth accuracy of stereo triangulation (detect_pose.py --stereo) against monocular
+solvePnP, on synthetic renders with a known pose. A tag is rendered into a rectified
+pair of virtual cameras at several distances, with random tilt, blur and sensor noise.
+Each pair is then solved both ways:
+  - mono:   IPPE_SQUARE on the left view (depth from the tag's apparent size),
+  - stereo: both views detected in parallel, corners triangulated, tag model fitted.
+The report gives depth (z) error per distance and the paired throughput.
+
+--write-dump also writes a short moving-tag clip as left.npz / right.npz plus a
+camera.yaml with the stereo section, for replaying through detect_pose.py:
+
+  python tools/bench_stereo.py --distances 0.5 1 2 3 --per-distance 30
+  python tools/bench_stereo.py --write-dump /tmp/stereo
+  cp /tmp/stereo/camera.yaml src/camera.yaml
+  python src/detect_pose.py --stereo --source /tmp/stereo/left.npz --right-source /tmp/stereo/right.npz --no-display
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from detect_pose import (TagSizes, create_detector, estimate_stereo_tag_poses, estimate_tag_poses,  # noqa: E402
+                         tag_object_points)
+from stereo import StereoCalibration  # noqa: E402
+
+IMAGE_SIZE = (1280, 720)
+MARKER_PX = 240
+
+
+def make_rig(baseline_m: float, focal_px: float) -> StereoCalibration:
+    w, h = IMAGE_SIZE
+    K = np.array([[focal_px, 0, w / 2.0], [0, focal_px, h / 2.0], [0, 0, 1]])
+    zero = np.zeros((5, 1))
+    # Right camera baseline_m to the right of the left one, same orientation.
+    return StereoCalibration(K, zero, K.copy(), zero.copy(), np.eye(3), np.array([[-baseline_m], [0.0], [0.0]]))
+
+
+def marker_image(tag_id: int):
+    """Tag image with a white quiet zone; returns (image, border px, black-square side px)."""
+    dictionary = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_APRILTAG_36h11)
+    img = cv2.aruco.generateImageMarker(dictionary, tag_id, MARKER_PX)
+    border = MARKER_PX // 4
+    return cv2.copyMakeBorder(img, border, border, border, border, cv2.BORDER_CONSTANT, value=255), border, MARKER_PX
+
+
+def render(marker, border, side, size_m, K, R, t, rng, blur_sigma=0.8, noise_std=3.0):
+    """Gray frame of the tag at pose (R, t) (IPPE model frame -> camera) over a flat background."""
+    w, h = IMAGE_SIZE
+    k = size_m / side
+    c = border + side / 2.0
+    # Marker pixel (u, v) -> tag plane (X, Y): pixel centers, +y up.
+    A = np.array([[k, 0, k * (0.5 - c)], [0, -k, -k * (0.5 - c)], [0, 0, 1]])
+    H = K @ np.column_stack([R[:, 0], R[:, 1], t.reshape(3)]) @ A
+    warped = cv2.warpPerspective(marker, H, (w, h), flags=cv2.INTER_LINEAR, borderValue=0)
+    mask = cv2.warpPerspective(np.full_like(marker, 255), H, (w, h), flags=cv2.INTER_LINEAR, borderValue=0)
+    frame = np.full((h, w), 110, np.float32)
+    alpha = mask.astype(np.float32) / 255.0
+    frame = frame * (1.0 - alpha) + warped.astype(np.float32) * alpha
+    frame = cv2.GaussianBlur(frame, (0, 0), blur_sigma) + rng.normal(0.0, noise_std, frame.shape)
+    return cv2.cvtColor(np.clip(frame, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+
+
+def random_pose(z, rng, max_tilt_deg=30.0, focal_px=900.0):
+    """Tag facing the camera at depth z, tilted randomly, offset so it stays in both views."""
+    tilt = np.deg2rad(rng.uniform(-max_tilt_deg, max_tilt_deg, 3))
+    tilt[2] = rng.uniform(-np.pi, np.pi)
+    R = cv2.Rodrigues(tilt)[0] @ np.diag([1.0, -1.0, -1.0])
+    w, h = IMAGE_SIZE
+    x = rng.uniform(-0.25, 0.15) * w / focal_px * z
+    y = rng.uniform(-0.2, 0.2) * h / focal_px * z
+    return R, np.array([[x], [y], [z]])
+
+
+def pair_poses(rig, R, t):
+    return (R, t), (rig.R @ R, rig.R @ t + rig.T)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Stereo vs monocular tag depth accuracy on synthetic pairs")
+    ap.add_argument("--distances", type=float, nargs="+", default=[0.5, 1.0, 1.5, 2.0, 3.0])
+    ap.add_argument("--per-distance", type=int, default=20)
+    ap.add_argument("--baseline", type=float, default=0.12, help="Camera baseline (m)")
+    ap.add_argument("--focal-px", type=float, default=900.0)
+    ap.add_argument("--tag-size", type=float, default=0.10)
+    ap.add_argument("--write-dump", type=Path, help="Write left.npz, right.npz and camera.yaml here")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    rig = make_rig(args.baseline, args.focal_px)
+    marker, border, side = marker_image(0)
+    tag_sizes = TagSizes(default_m=args.tag_size, by_id={})
+    obj_pts = tag_object_points(args.tag_size)
+
+    if args.write_dump:
+        return write_dump(args, rig, marker, border, side, rng)
+
+    detectors = [create_detector(), create_detector()]
+
+    def detect(i, frame):
+        corners_list, ids, _ = detectors[i].detectMarkers(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        return corners_list, ids
+
+    print(f"Baseline {args.baseline * 100:.0f} cm, f = {args.focal_px:.0f} px, tag {args.tag_size * 100:.0f} cm, "
+          f"{IMAGE_SIZE[0]}x{IMAGE_SIZE[1]}")
+    print(f"{'z (m)':>6} {'found':>7} {'mono |dz| mm':>14} {'stereo |dz| mm':>15} {'mono p90':>9} {'stereo p90':>11}")
+    pair_ms = []
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for z in args.distances:
+            mono_err, stereo_err = [], []
+            for _ in range(args.per_distance):
+                R, t = random_pose(z, rng, focal_px=args.focal_px)
+                (Rl, tl), (Rr, tr) = pair_poses(rig, R, t)
+                left = render(marker, border, side, args.tag_size, rig.K1, Rl, tl, rng)
+                right = render(marker, border, side, args.tag_size, rig.K2, Rr, tr, rng)
+
+                t0 = time.perf_counter()
+                right_job = pool.submit(detect, 1, right)
+                left_det = detect(0, left)
+                right_det = right_job.result()
+                stereo_poses = estimate_stereo_tag_poses(left_det, right_det, rig, tag_sizes)
+                pair_ms.append((time.perf_counter() - t0) * 1000.0)
+
+                mono_poses = estimate_tag_poses(*left_det, rig.K1, rig.dist1, tag_sizes)
+                stereo_poses = [p for p in stereo_poses if p.view == "stereo"]
+                if mono_poses and stereo_poses:
+                    mono_err.append(abs(mono_poses[0].tvec[2, 0] - z) * 1000.0)
+                    stereo_err.append(abs(stereo_poses[0].tvec[2, 0] - z) * 1000.0)
+            if not mono_err:
+                print(f"{z:6.2f} {0:>3}/{args.per_distance:<3}")
+                continue
+            m, s = np.array(mono_err), np.array(stereo_err)
+            print(f"{z:6.2f} {len(m):>3}/{args.per_distance:<3} {m.mean():14.2f} {s.mean():15.2f} "
+                  f"{np.percentile(m, 90):9.2f} {np.percentile(s, 90):11.2f}")
+    ms = np.array(pair_ms)
+    print(f"Pair detect + triangulate: {ms.mean():.2f} ms mean, {np.percentile(ms, 99):.2f} ms p99 "
+          f"({1000.0 / ms.mean():.1f} pairs/s, excluding capture)")
+    return 0
+
+
+def write_dump(args, rig, marker, border, side, rng, n=90, fps=30.0) -> int:
+    out = args.write_dump
+    out.mkdir(parents=True, exist_ok=True)
+    left, right = [], []
+    for i in range(n):
+        phase = i / n * 2 * np.pi
+        R = cv2.Rodrigues(np.array([0.3 * np.sin(phase), 0.4 * np.cos(phase), 0.2]))[0] @ np.diag([1.0, -1.0, -1.0])
+        t = np.array([[0.1 * np.sin(phase) - 0.05], [0.05 * np.cos(phase)], [1.0 + 0.4 * np.sin(phase)]])
+        (Rl, tl), (Rr, tr) = pair_poses(rig, R, t)
+        left.append(render(marker, border, side, args.tag_size, rig.K1, Rl, tl, rng))
+        right.append(render(marker, border, side, args.tag_size, rig.K2, Rr, tr, rng))
+    times = np.arange(n) / fps
+    np.savez_compressed(out / "left.npz", frames=np.array(left), timestamps=times)
+    # The right camera's clock runs 2 ms behind, as two USB cameras would.
+    np.savez_compressed(out / "right.npz", frames=np.array(right), timestamps=times + 0.002)
+    data = {
+        "camera_matrix": rig.K1.tolist(),
+        "dist_coeffs": rig.dist1.flatten().tolist(),
+        "image_size": list(IMAGE_SIZE),
+        "stereo": {
+            "camera_matrix": rig.K2.tolist(),
+            "dist_coeffs": rig.dist2.flatten().tolist(),
+            "R": rig.R.tolist(),
+            "T": rig.T.flatten().tolist(),
+        },
+    }
+    (out / "camera.yaml").write_text(yaml.safe_dump(data), encoding="utf-8")
+    print(f"Wrote {n} stereo pairs and camera.yaml to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
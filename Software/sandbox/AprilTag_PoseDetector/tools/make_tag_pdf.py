@@ -11,12 +11,13 @@ Important: User must print at 100% scale ("Actual Size") in Preview.
 import argparse
 from pathlib import Path
 
-from PIL import Image
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import mm
-
 
 def generate_pdf(png_path: Path, out_pdf: Path, tag_size_mm: float = 100.0, dpi: int = 600) -> None:
+    # Imported here so `--help` and argument errors don't pay for PIL and reportlab.
+    from PIL import Image
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import mm
+
     if not png_path.exists():
         raise FileNotFoundError(f"Input PNG not found: {png_path}")
 
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+tune_detector.py
+
+Offline sweep of the detector parameters that matter most for speed:
+  - adaptive threshold window range and step (adaptiveThreshWinSizeMin/Max/Step)
+  - corner refinement method (cornerRefinementMethod)
+  - minimum marker perimeter (minMarkerPerimeterRate)
+  - AprilTag quad decimation (aprilTagQuadDecimate, only used with APRILTAG refinement)
+
+Every combination is run over the same frame set. Each is scored by detection rate and
+mean ms/frame. A tag counts as expected in a frame when any combination found it there
+(with --synthetic, the rendered tags are expected as well). From the Pareto front of
+(rate, ms/frame) it picks three profiles:
+  accurate: the highest detection rate (the fastest such combination)
+  balanced: the fastest within --balanced-drop of that rate
+  fast:     the fastest within --fast-drop of that rate
+and writes them in the format src/detector_profiles.py loads.
+
+  python tools/tune_detector.py --source recording.mp4 --out src/detector_profiles.yaml
+  python tools/tune_detector.py --synthetic 60 --out /tmp/profiles.yaml --csv /tmp/sweep.csv
+"""
+
+import argparse
+import csv
+import itertools
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bench_roi_tracking import synthetic_frames  # noqa: E402
+from detect_pose import create_detector  # noqa: E402
+from detector_profiles import CORNER_REFINE, detector_parameters, save_profiles  # noqa: E402
+from frame_sources import open_source  # noqa: E402
+
+WINDOWS = [(3, 23, 10), (3, 23, 20), (5, 15, 10), (7, 7, 10), (3, 33, 15)]
+REFINEMENTS = ["NONE", "SUBPIX", "APRILTAG"]
+DECIMATES = [0.0, 1.5, 2.0]
+PERIMETER_RATES = [0.01, 0.03, 0.05]
+
+
+def parameter_grid():
+    """Every combination to try, as profile dicts."""
+    for (wmin, wmax, wstep), refine, rate in itertools.product(WINDOWS, REFINEMENTS, PERIMETER_RATES):
+        for decimate in DECIMATES if refine == "APRILTAG" else [0.0]:
+            yield {
+                "adaptiveThreshWinSizeMin": wmin,
+                "adaptiveThreshWinSizeMax": wmax,
+                "adaptiveThreshWinSizeStep": wstep,
+                "cornerRefinementMethod": CORNER_REFINE[refine],
+                "minMarkerPerimeterRate": rate,
+                "aprilTagQuadDecimate": decimate,
+            }
+
+
+def load_frames(args):
+    """(gray frames, per-frame sets of expected tag IDs)."""
+    frames, expected = [], []
+    if args.synthetic:
+        for gray, truth in synthetic_frames(args.synthetic, with_truth=True):
+            frames.append(gray)
+            expected.append(set(truth))
+        return frames, expected
+    cap = open_source(args.source, as_fast_as_possible=True)
+    try:
+        while args.max_frames is None or len(frames) < args.max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame)
+            expected.append(set())
+    finally:
+        cap.release()
+    return frames, expected
+
+
+def run_profile(profile, frames):
+    """(mean ms/frame, per-frame sets of detected IDs)."""
+    detector = create_detector(detector_parameters(profile))
+    detector.detectMarkers(frames[0])  # warm-up, not timed
+    found = []
+    t0 = time.perf_counter()
+    for gray in frames:
+        _, ids, _ = detector.detectMarkers(gray)
+        found.append(set() if ids is None else {int(i) for i in np.asarray(ids).reshape(-1)})
+    ms = (time.perf_counter() - t0) * 1000.0 / len(frames)
+    return ms, found
+
+
+def pareto_front(results):
+    """Results not beaten on both detection rate and ms/frame, fastest first."""
+    front = []
+    for r in sorted(results, key=lambda r: (r["ms_per_frame"], -r["detection_rate"])):
+        if not front or r["detection_rate"] > front[-1]["detection_rate"]:
+            front.append(r)
+    return front
+
+
+def pick_profiles(front, balanced_drop: float, fast_drop: float) -> dict:
+    best = max(r["detection_rate"] for r in front)
+    accurate = next(r for r in front if r["detection_rate"] >= best)
+    balanced = next(r for r in front if r["detection_rate"] >= best - balanced_drop)
+    fast = next(r for r in front if r["detection_rate"] >= best - fast_drop)
+    return {"fast": fast, "balanced": balanced, "accurate": accurate}
+
+
+def describe(r) -> str:
+    p = r["profile"]
+    refine = next(k for k, v in CORNER_REFINE.items() if v == p["cornerRefinementMethod"])
+    return (f"{r['detection_rate'] * 100:6.2f}%  {r['ms_per_frame']:7.2f} ms  "
+            f"win {p['adaptiveThreshWinSizeMin']}-{p['adaptiveThreshWinSizeMax']}/{p['adaptiveThreshWinSizeStep']}  "
+            f"refine {refine:<8}  perimeter {p['minMarkerPerimeterRate']:.2f}  decimate {p['aprilTagQuadDecimate']:.1f}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Sweep AprilTag detector parameters and pick Pareto-optimal profiles")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--source", type=Path, help="Recorded video file, image directory or .npz frame dump")
+    src.add_argument("--synthetic", type=int, metavar="N", help="Generate N synthetic 1080p frames")
+    ap.add_argument("--max-frames", type=int, default=None)
+    ap.add_argument("--balanced-drop", type=float, default=0.01,
+                    help="Detection-rate loss allowed for the balanced profile (fraction)")
+    ap.add_argument("--fast-drop", type=float, default=0.05,
+                    help="Detection-rate loss allowed for the fast profile (fraction)")
+    ap.add_argument("--out", type=Path, help="Write the picked profiles as YAML")
+    ap.add_argument("--csv", type=Path, help="Write every combination's results as CSV")
+    args = ap.parse_args()
+
+    frames, expected = load_frames(args)
+    if not frames:
+        print("No frames read.")
+        return 1
+    grid = list(parameter_grid())
+    print(f"{len(frames)} frames, {len(grid)} parameter combinations")
+
+    runs = []
+    for i, profile in enumerate(grid, 1):
+        ms, found = run_profile(profile, frames)
+        runs.append((profile, ms, found))
+        print(f"\r  {i}/{len(grid)}", end="", flush=True)
+    print()
+
+    # Expected tags: everything any combination found, plus the rendered tags when known.
+    for profile, _, found in runs:
+        for exp, f in zip(expected, found):
+            exp |= f
+    total = sum(len(e) for e in expected)
+    if total == 0:
+        print("No tags detected by any combination.")
+        return 1
+    results = [
+        {"profile": profile, "ms_per_frame": ms,
+         "detection_rate": sum(len(f & e) for f, e in zip(found, expected)) / total}
+        for profile, ms, found in runs
+    ]
+
+    front = pareto_front(results)
+    print("Pareto front (detection rate vs ms/frame):")
+    for r in front:
+        print("  " + describe(r))
+    picked = pick_profiles(front, args.balanced_drop, args.fast_drop)
+    print("Picked:")
+    for name, r in picked.items():
+        print(f"  {name:<9}" + describe(r))
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(grid[0]) + ["ms_per_frame", "detection_rate", "pareto"])
+            w.writeheader()
+            for r in results:
+                w.writerow(dict(r["profile"], ms_per_frame=r["ms_per_frame"], detection_rate=r["detection_rate"],
+                                pareto=any(r is p for p in front)))
+        print(f"Wrote: {args.csv}")
+    if args.out:
+        source = args.source if args.source else f"synthetic:{args.synthetic}"
+        header = "\n".join(
+            [f"Detector parameter profiles picked by tools/tune_detector.py from {source} ({len(frames)} frames).",
+             "Measured detection rate and mean detectMarkers time per frame:"]
+            + [f"  {name}: {r['detection_rate'] * 100:.2f}%, {r['ms_per_frame']:.2f} ms" for name, r in picked.items()]
+        )
+        save_profiles(args.out, {name: r["profile"] for name, r in picked.items()}, header)
+        print(f"Wrote: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+bench_kinematics.py
+
+Times the kinematics hot paths on the shipped robot_arm.yaml and on synthetic 7-12 DOF
+chains, records peak allocation per call and IK iterations-to-converge over a fixed seeded
+target set, and writes the results as JSON.
+
+  python benchmarks/bench_kinematics.py run --out bench.json
+  python benchmarks/bench_kinematics.py compare --baseline base.json --current bench.json
+  python benchmarks/bench_kinematics.py run --out bench.json --baseline base.json --threshold-pct 15
+
+`compare` (and `run --baseline`) exits with status 1 when any function's ns/op, or any
+config's mean IK iterations, is worse than the baseline by more than the threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+SIM_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SIM_ROOT / "src"))
+
+from collision import CollisionChecker  # noqa: E402
+from kinematics import (  # noqa: E402
+    JointSpec,
+    build_range_trajectory,
+    ee_position_batch,
+    fk,
+    fk_batch,
+    fk_chain_points,
+    ik_dls_position_only,
+    ik_dls_position_only_batch,
+    load_joint_specs,
+    numerical_jacobian,
+    random_joint_angles_deg,
+)
+
+DEFAULT_CONFIG = SIM_ROOT / "configs" / "robot_arm.yaml"
+SYNTHETIC_DOFS = (7, 9, 12)
+SEED = 1234
+
+
+def synthetic_chain(dof: int, seed: int = SEED) -> List[JointSpec]:
+    """Random but fixed DH chain with alternating twists, roughly arm-sized."""
+    rng = np.random.default_rng(seed + dof)
+    alphas = (math.pi / 2, 0.0, -math.pi / 2)
+    joints = []
+    for i in range(dof):
+        joints.append(
+            JointSpec(
+                name=f"joint_{i + 1}",
+                joint_type="revolute",
+                rotation_axis_local="z",
+                a_m=float(rng.uniform(0.0, 0.25)),
+                alpha_rad=alphas[i % len(alphas)],
+                d_m=float(rng.uniform(0.0, 0.15)),
+                theta_offset_rad=0.0,
+                initial_deg=0.0,
+                min_deg=-120.0,
+                max_deg=120.0,
+            )
+        )
+    return joints
+
+
+def time_ns_per_op(fn: Callable[[int], object], ops: int, repeats: int) -> Dict[str, float]:
+    fn(0)  # warm-up
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter_ns()
+        for i in range(ops):
+            fn(i)
+        samples.append((time.perf_counter_ns() - t0) / ops)
+    return {"ns_per_op": statistics.median(samples), "ns_per_op_min": min(samples)}
+
+
+def peak_alloc_bytes(fn: Callable[[int], object]) -> int:
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn(0)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return int(peak - base)
+
+
+def bench_config(name: str, joints: Sequence[JointSpec], ops: int, repeats: int, ik_targets: int) -> Dict:
+    rng = np.random.default_rng(SEED)
+    qs = random_joint_angles_deg(joints, 256, rng)
+    targets = ee_position_batch(joints, random_joint_angles_deg(joints, ik_targets, rng))
+    batch_q = random_joint_angles_deg(joints, 10_000, rng)
+    checker = CollisionChecker(joints)
+    traj_1000 = build_range_trajectory(joints, 1000)
+
+    cases: Dict[str, tuple] = {
+        "fk": (lambda i: fk(joints, qs[i % len(qs)]), ops),
+        "fk_chain_points": (lambda i: fk_chain_points(joints, qs[i % len(qs)]), ops),
+        "numerical_jacobian": (lambda i: numerical_jacobian(joints, qs[i % len(qs)]), ops),
+        "ik_dls_position_only": (
+            lambda i: ik_dls_position_only(joints, targets[i % len(targets)]),
+            max(ops // 20, 5),
+        ),
+        "build_range_trajectory": (lambda i: build_range_trajectory(joints, 100), max(ops // 10, 5)),
+        # Whole 10k-pose batch per op; compare against fk * 10k.
+        "fk_batch_10k": (lambda i: fk_batch(joints, batch_q), max(ops // 200, 3)),
+        # Self-collision check of a whole 1000-sample trajectory per op.
+        "collision_check_1000": (lambda i: checker.collides_batch(traj_1000), max(ops // 100, 3)),
+    }
+
+    functions = {}
+    for fname, (fn, n_ops) in cases.items():
+        entry = time_ns_per_op(fn, n_ops, repeats)
+        entry["ops"] = n_ops
+        entry["peak_alloc_bytes"] = peak_alloc_bytes(fn)
+        functions[fname] = entry
+        print(f"  {name:>16} {fname:<24} {entry['ns_per_op']:>14,.0f} ns/op  {entry['peak_alloc_bytes']:>10,} B peak")
+
+    _, converged, iterations = ik_dls_position_only_batch(joints, targets)
+    ik = {
+        "targets": int(len(targets)),
+        "converged_rate": float(converged.mean()),
+        "mean_iterations": float(iterations.mean()),
+        "p50_iterations": float(np.percentile(iterations, 50)),
+        "p90_iterations": float(np.percentile(iterations, 90)),
+        "p99_iterations": float(np.percentile(iterations, 99)),
+        "max_iterations": int(iterations.max()),
+        "histogram": np.bincount(iterations).tolist(),
+    }
+    print(
+        f"  {name:>16} IK iterations: mean {ik['mean_iterations']:.1f}, p50 {ik['p50_iterations']:.0f}, "
+        f"p90 {ik['p90_iterations']:.0f}, p99 {ik['p99_iterations']:.0f}, converged {ik['converged_rate'] * 100:.1f}%"
+    )
+    return {"dof": len(joints), "functions": functions, "ik": ik}
+
+
+def run(args: argparse.Namespace) -> Dict:
+    configs = {"robot_arm.yaml": load_joint_specs(args.config)}
+    if not args.no_synthetic:
+        for n in SYNTHETIC_DOFS:
+            configs[f"synthetic_{n}dof"] = synthetic_chain(n)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "seed": SEED,
+            "ops": args.ops,
+            "repeats": args.repeats,
+        },
+        "configs": {},
+    }
+    for name, joints in configs.items():
+        report["configs"][name] = bench_config(name, joints, args.ops, args.repeats, args.ik_targets)
+    return report
+
+
+def compare(current: Dict, baseline: Dict, threshold_pct: float) -> List[str]:
+    """Return one message per metric that regressed by more than threshold_pct."""
+    regressions = []
+    for cname, base_cfg in baseline["configs"].items():
+        cur_cfg = current["configs"].get(cname)
+        if cur_cfg is None:
+            continue
+        metrics = [
+            (f"{cname}/{fname}", base["ns_per_op"], cur_cfg["functions"][fname]["ns_per_op"], "ns/op")
+            for fname, base in base_cfg["functions"].items()
+            if fname in cur_cfg["functions"]
+        ]
+        metrics.append(
+            (f"{cname}/ik", base_cfg["ik"]["mean_iterations"], cur_cfg["ik"]["mean_iterations"], "mean iters")
+        )
+        for label, base_val, cur_val, unit in metrics:
+            change_pct = (cur_val - base_val) / base_val * 100.0 if base_val > 0 else 0.0
+            flag = "REGRESSION" if change_pct > threshold_pct else "ok"
+            print(f"  {label:<44} {base_val:>14,.1f} -> {cur_val:>14,.1f} {unit:<10} {change_pct:+7.1f}%  {flag}")
+            if change_pct > threshold_pct:
+                regressions.append(f"{label}: {change_pct:+.1f}% ({unit})")
+    return regressions
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Kinematics benchmark suite")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="Run the benchmarks and write JSON")
+    run_p.add_argument("--config", type=Path, default=DEFAULT_CONFIG)
+    run_p.add_argument("--out", type=Path, default=Path("bench_kinematics.json"))
+    run_p.add_argument("--ops", type=int, default=2000, help="Calls per timing repeat for the cheap functions")
+    run_p.add_argument("--repeats", type=int, default=5)
+    run_p.add_argument("--ik-targets", type=int, default=500)
+    run_p.add_argument("--no-synthetic", action="store_true", help="Only benchmark the shipped config")
+    run_p.add_argument("--baseline", type=Path, help="Compare against this JSON after running")
+    run_p.add_argument("--threshold-pct", type=float, default=10.0)
+
+    cmp_p = sub.add_parser("compare", help="Compare two result files")
+    cmp_p.add_argument("--baseline", type=Path, required=True)
+    cmp_p.add_argument("--current", type=Path, required=True)
+    cmp_p.add_argument("--threshold-pct", type=float, default=10.0)
+    args = ap.parse_args()
+
+    if args.command == "run":
+        print("Benchmarking kinematics:")
+        report = run(args)
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Wrote: {args.out}")
+        if args.baseline is None:
+            return 0
+        current = report
+    else:
+        current = json.loads(args.current.read_text(encoding="utf-8"))
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    print(f"Comparing against {args.baseline} (threshold {args.threshold_pct:.1f}%):")
+    regressions = compare(current, baseline, args.threshold_pct)
+    if regressions:
+        print(f"{len(regressions)} regression(s):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
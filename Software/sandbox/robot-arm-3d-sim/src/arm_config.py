@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from kinematics import JointSpec
+from trajectory import PROFILES
+
+SIM_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CONFIG = SIM_ROOT / "configs" / "robot_arm.yaml"
+DEFAULT_CACHE_DIR = SIM_ROOT / "cache"
+# Bump when the parsed layout below changes, so stale caches are rebuilt.
+CACHE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class IkSettings:
+    max_iters: int = 120
+    damping: float = 0.04
+    tolerance_m: float = 1e-3
+    cache_grid_m: float = 0.001
+    cache_seed_region_deg: float = 15.0
+    cache_max_entries: int = 4096
+    stream_max_age_s: float = 0.1
+
+
+@dataclass(frozen=True)
+class TrajectorySettings:
+    profile: str = "quintic"
+    cartesian_line: bool = True
+    max_speed_m_s: float = 0.25
+    max_acc_m_s2: float = 1.0
+
+
+@dataclass(frozen=True)
+class CollisionSettings:
+    link_radius_m: float | Tuple[float, ...] = 0.03
+    min_link_gap: int = 2
+    margin_m: float = 0.0
+    obstacles: Tuple[dict, ...] = ()
+
+
+@dataclass
+class ArmConfig:
+    """Everything robot_arm.yaml configures, parsed and validated once."""
+
+    name: str
+    joints: List[JointSpec]
+    ik: IkSettings
+    control_dt_s: float
+    trajectory: TrajectorySettings
+    collision: CollisionSettings
+    # "yaml", "cache" or "memory": where load_arm_config got it from (for startup profiling).
+    loaded_from: str = field(default="yaml", compare=False)
+
+
+def _parse_joint(j: dict) -> JointSpec:
+    spec = JointSpec(
+        name=j["name"],
+        joint_type=j["type"],
+        rotation_axis_local=str(j.get("rotation_axis_local", "z")),
+        a_m=float(j["a_m"]),
+        alpha_rad=float(j["alpha_rad"]),
+        d_m=float(j["d_m"]),
+        theta_offset_rad=float(j["theta_offset_rad"]),
+        initial_deg=float(j.get("initial_deg", 0.0)),
+        min_deg=float(j["min_deg"]),
+        max_deg=float(j["max_deg"]),
+        max_vel_deg_s=float(j.get("max_vel_deg_s", 90.0)),
+        max_acc_deg_s2=float(j.get("max_acc_deg_s2", 360.0)),
+    )
+    if spec.joint_type != "revolute":
+        raise ValueError(f"Joint {spec.name!r}: only revolute joints are implemented")
+    if spec.min_deg > spec.max_deg:
+        raise ValueError(f"Joint {spec.name!r}: min_deg is above max_deg")
+    if not spec.min_deg <= spec.initial_deg <= spec.max_deg:
+        raise ValueError(f"Joint {spec.name!r}: initial_deg is outside [min_deg, max_deg]")
+    if spec.max_vel_deg_s <= 0.0 or spec.max_acc_deg_s2 <= 0.0:
+        raise ValueError(f"Joint {spec.name!r}: max_vel_deg_s and max_acc_deg_s2 must be positive")
+    return spec
+
+
+def _positive(section: str, name: str, value) -> float:
+    value = float(value)
+    if not value > 0.0:
+        raise ValueError(f"{section}.{name} must be positive")
+    return value
+
+
+def parse_arm_config(data: dict) -> ArmConfig:
+    """Build and validate an ArmConfig from the loaded YAML mapping."""
+    robot = (data or {}).get("robot") or {}
+    joints = [_parse_joint(j) for j in robot.get("joints") or []]
+    if not joints:
+        raise ValueError("robot.joints must list at least one joint")
+    names = [j.name for j in joints]
+    if len(set(names)) != len(names):
+        raise ValueError("robot.joints names must be unique")
+
+    sim = data.get("simulation") or {}
+    ik_cfg = sim.get("ik") or {}
+    cache_cfg = ik_cfg.get("cache") or {}
+    stream_cfg = ik_cfg.get("stream") or {}
+    ik = IkSettings(
+        max_iters=int(_positive("simulation.ik", "max_iters", ik_cfg.get("max_iters", 120))),
+        damping=_positive("simulation.ik", "damping", ik_cfg.get("damping", 0.04)),
+        tolerance_m=_positive("simulation.ik", "tolerance_m", ik_cfg.get("tolerance_m", 1e-3)),
+        cache_grid_m=_positive("simulation.ik.cache", "grid_m", cache_cfg.get("grid_m", 0.001)),
+        cache_seed_region_deg=_positive(
+            "simulation.ik.cache", "seed_region_deg", cache_cfg.get("seed_region_deg", 15.0)
+        ),
+        cache_max_entries=int(_positive("simulation.ik.cache", "max_entries", cache_cfg.get("max_entries", 4096))),
+        stream_max_age_s=_positive("simulation.ik.stream", "max_age_s", stream_cfg.get("max_age_s", 0.1)),
+    )
+
+    traj_cfg = sim.get("trajectory") or {}
+    trajectory = TrajectorySettings(
+        profile=str(traj_cfg.get("profile", "quintic")),
+        cartesian_line=bool(traj_cfg.get("cartesian_line", True)),
+        max_speed_m_s=_positive("simulation.trajectory", "max_speed_m_s", traj_cfg.get("max_speed_m_s", 0.25)),
+        max_acc_m_s2=_positive("simulation.trajectory", "max_acc_m_s2", traj_cfg.get("max_acc_m_s2", 1.0)),
+    )
+    if trajectory.profile not in PROFILES:
+        raise ValueError(f"simulation.trajectory.profile must be one of {PROFILES}")
+
+    col_cfg = sim.get("collision") or {}
+    radius = col_cfg.get("link_radius_m", 0.03)
+    radius = tuple(float(r) for r in radius) if isinstance(radius, (list, tuple)) else float(radius)
+    if isinstance(radius, tuple) and len(radius) != len(joints):
+        raise ValueError("simulation.collision.link_radius_m must be one value or one per joint")
+    obstacles = tuple(dict(o) for o in col_cfg.get("obstacles") or [])
+    for o in obstacles:
+        if o.get("type", "box") not in ("box", "sphere") or "center_m" not in o:
+            raise ValueError(f"simulation.collision.obstacles: bad entry {o!r}")
+    collision = CollisionSettings(
+        link_radius_m=radius,
+        min_link_gap=int(col_cfg.get("min_link_gap", 2)),
+        margin_m=float(col_cfg.get("margin_m", 0.0)),
+        obstacles=obstacles,
+    )
+
+    return ArmConfig(
+        name=str(robot.get("name", "")),
+        joints=joints,
+        ik=ik,
+        control_dt_s=_positive("simulation.control", "dt_s", (sim.get("control") or {}).get("dt_s", 0.01)),
+        trajectory=trajectory,
+        collision=collision,
+    )
+
+
+# Resolved path -> (mtime_ns, size, pickled ArmConfig); each load unpickles a fresh copy,
+# so callers may modify what they get.
+_MEMO: Dict[str, Tuple[int, int, bytes]] = {}
+
+
+def _cache_path(cache_dir: Path, config_path: Path) -> Path:
+    return cache_dir / f"config_{hashlib.sha256(str(config_path).encode('utf-8')).hexdigest()[:16]}.pickle"
+
+
+def load_arm_config(
+    config_path: str | Path = DEFAULT_CONFIG,
+    cache_dir: str | Path | None = DEFAULT_CACHE_DIR,
+) -> ArmConfig:
+    """Parsed config, from memory or the binary cache when the YAML file is unchanged.
+
+    The cache entry records the file's mtime, size and SHA-256. A matching mtime and size
+    skip reading the YAML at all; otherwise the file is hashed, and only a changed hash
+    re-parses it (a touched but identical file just refreshes the recorded mtime). YAML
+    itself is only imported on a re-parse. `cache_dir=None` disables the on-disk cache.
+    """
+    path = Path(config_path).resolve()
+    st = path.stat()
+    memo = _MEMO.get(str(path))
+    if memo is not None and memo[:2] == (st.st_mtime_ns, st.st_size):
+        return _unpickle(memo[2], "memory")
+
+    cache_file = _cache_path(Path(cache_dir), path) if cache_dir is not None else None
+    entry = None
+    if cache_file is not None and cache_file.exists():
+        try:
+            entry = pickle.loads(cache_file.read_bytes())
+            if entry.get("version") != CACHE_VERSION:
+                entry = None
+        except Exception:  # truncated or written by an incompatible version
+            entry = None
+    if entry is not None and (entry["mtime_ns"], entry["size"]) == (st.st_mtime_ns, st.st_size):
+        _MEMO[str(path)] = (st.st_mtime_ns, st.st_size, entry["config"])
+        return _unpickle(entry["config"], "cache")
+
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    if entry is not None and entry["sha256"] == digest:
+        blob, source = entry["config"], "cache"
+    else:
+        import yaml  # only needed when the file really changed
+
+        blob, source = pickle.dumps(parse_arm_config(yaml.safe_load(raw)), pickle.HIGHEST_PROTOCOL), "yaml"
+    if cache_file is not None:
+        _write_cache(cache_file, {
+            "version": CACHE_VERSION,
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "sha256": digest,
+            "config": blob,
+        })
+    _MEMO[str(path)] = (st.st_mtime_ns, st.st_size, blob)
+    return _unpickle(blob, source)
+
+
+def _unpickle(blob: bytes, source: str) -> ArmConfig:
+    config = pickle.loads(blob)
+    config.loaded_from = source
+    return config
+
+
+def _write_cache(cache_file: Path, entry: dict) -> None:
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp, cache_file)  # readers never see a half-written cache
+    except OSError:
+        pass  # read-only checkout: run uncached
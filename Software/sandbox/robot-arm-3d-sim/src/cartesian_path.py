@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+from kinematics import JointSpec, as_kinematic_model, ik_dls_position_only
+from trajectory import cartesian_trajectory
+
+
+@dataclass
+class CartesianPlan:
+    q_deg: np.ndarray
+    waypoints_m: np.ndarray
+    errors_m: np.ndarray
+    solve_time_s: float
+    budget_s: float
+    converged: bool
+
+    @property
+    def max_error_m(self) -> float:
+        return float(self.errors_m.max())
+
+    @property
+    def final_error_m(self) -> float:
+        return float(self.errors_m[-1])
+
+    @property
+    def within_budget(self) -> bool:
+        return self.solve_time_s <= self.budget_s
+
+
+def plan_cartesian_line(
+    joints: Sequence[JointSpec],
+    q_start_deg: Sequence[float],
+    target_xyz_m: Sequence[float],
+    dt_s: float,
+    profile: str = "quintic",
+    max_speed_m_s: float = 0.25,
+    max_acc_m_s2: float = 1.0,
+    iters_per_waypoint: int = 2,
+    final_max_iters: int = 120,
+    damping: float = 0.04,
+    tolerance_m: float = 1e-3,
+) -> CartesianPlan:
+    """Follow the straight line from the current EE position to the target.
+
+    The line is sampled at `dt_s` and each waypoint is solved with IK warm-started from the
+    previous waypoint's solution, capped at `iters_per_waypoint` iterations so each step costs
+    about one control period or less. The final waypoint gets up to `final_max_iters` so the
+    move still ends on the target. `budget_s` is the duration of the motion itself; the plan
+    can run in real time when `solve_time_s` stays below it.
+    """
+    model = as_kinematic_model(joints)
+    q = model.clamp(np.array(q_start_deg, dtype=float))
+    waypoints = cartesian_trajectory(
+        model.ee_position(q),
+        target_xyz_m,
+        dt_s,
+        profile=profile,
+        max_speed_m_s=max_speed_m_s,
+        max_acc_m_s2=max_acc_m_s2,
+    )
+
+    q_path = np.empty((len(waypoints), model.dof), dtype=float)
+    q_path[0] = q
+    converged = True
+    t0 = time.perf_counter()
+    for i in range(1, len(waypoints)):
+        last = i == len(waypoints) - 1
+        q, converged = ik_dls_position_only(
+            model,
+            waypoints[i],
+            q_init_deg=q,
+            max_iters=final_max_iters if last else iters_per_waypoint,
+            damping=damping,
+            tolerance_m=tolerance_m,
+        )
+        q_path[i] = q
+    solve_time_s = time.perf_counter() - t0
+
+    errors = np.linalg.norm(model.ee_position_batch(q_path) - waypoints, axis=1)
+    return CartesianPlan(
+        q_deg=q_path,
+        waypoints_m=waypoints,
+        errors_m=errors,
+        solve_time_s=solve_time_s,
+        budget_s=(len(waypoints) - 1) * dt_s,
+        converged=converged,
+    )
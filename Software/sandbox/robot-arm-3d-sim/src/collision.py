@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from arm_config import ArmConfig, load_arm_config
+from kinematics import JointSpec, as_kinematic_model
+
+_EPS = 1e-12
+
+
+@dataclass
+class Obstacle:
+    """Static box (axis-aligned in the base frame) or sphere."""
+
+    name: str
+    kind: str  # "box" | "sphere"
+    center_m: np.ndarray
+    half_extents_m: np.ndarray | None = None  # box
+    radius_m: float = 0.0  # sphere
+    ignore_links: Tuple[str, ...] = field(default_factory=tuple)
+
+    @property
+    def lo(self) -> np.ndarray:
+        return self.center_m - (self.half_extents_m if self.kind == "box" else self.radius_m)
+
+    @property
+    def hi(self) -> np.ndarray:
+        return self.center_m + (self.half_extents_m if self.kind == "box" else self.radius_m)
+
+
+def obstacle_from_dict(data: dict) -> Obstacle:
+    kind = str(data.get("type", "box"))
+    name = str(data.get("name", kind))
+    center = np.array(data["center_m"], dtype=float).reshape(3)
+    ignore = tuple(str(n) for n in data.get("ignore_links", ()))
+    if kind == "box":
+        half = np.array(data["half_extents_m"], dtype=float).reshape(3)
+        if np.any(half < 0.0):
+            raise ValueError(f"Obstacle {name!r}: half_extents_m must be non-negative")
+        return Obstacle(name, kind, center, half_extents_m=half, ignore_links=ignore)
+    if kind == "sphere":
+        return Obstacle(name, kind, center, radius_m=float(data["radius_m"]), ignore_links=ignore)
+    raise ValueError(f"Obstacle {name!r}: unsupported type {kind!r} (use 'box' or 'sphere')")
+
+
+def segment_segment_distance(
+    p1: np.ndarray, q1: np.ndarray, p2: np.ndarray, q2: np.ndarray
+) -> np.ndarray:
+    """Closest distance between segments p1-q1 and p2-q2, broadcast over leading axes (..., 3).
+
+    Vectorized form of the clamped closest-point solution (Ericson, Real-Time Collision
+    Detection, 5.1.9); degenerate (zero-length) segments are handled as points.
+    """
+    d1 = q1 - p1
+    d2 = q2 - p2
+    r = p1 - p2
+    a = np.einsum("...k,...k->...", d1, d1)
+    e = np.einsum("...k,...k->...", d2, d2)
+    b = np.einsum("...k,...k->...", d1, d2)
+    c = np.einsum("...k,...k->...", d1, r)
+    f = np.einsum("...k,...k->...", d2, r)
+    a_safe = np.maximum(a, _EPS)
+    e_safe = np.maximum(e, _EPS)
+    denom = a * e - b * b
+
+    # Closest point on the infinite lines, s clamped to segment 1 (0 for parallel lines).
+    s = np.where(denom > _EPS, np.clip((b * f - c * e) / np.maximum(denom, _EPS), 0.0, 1.0), 0.0)
+    s = np.where(e <= _EPS, np.clip(-c / a_safe, 0.0, 1.0), s)
+    t = (b * s + f) / e_safe
+    # t outside segment 2: clamp it and recompute s for the clamped end.
+    s = np.where(t < 0.0, np.clip(-c / a_safe, 0.0, 1.0), np.where(t > 1.0, np.clip((b - c) / a_safe, 0.0, 1.0), s))
+    t = np.clip(t, 0.0, 1.0)
+    diff = (p1 + s[..., None] * d1) - (p2 + t[..., None] * d2)
+    return np.sqrt(np.einsum("...k,...k->...", diff, diff))
+
+
+def segment_point_distance(p: np.ndarray, q: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Distance from point(s) x to segment p-q, broadcast over leading axes (..., 3)."""
+    d = q - p
+    t = np.einsum("...k,...k->...", x - p, d) / np.maximum(np.einsum("...k,...k->...", d, d), _EPS)
+    closest = p + np.clip(t, 0.0, 1.0)[..., None] * d
+    return np.linalg.norm(x - closest, axis=-1)
+
+
+def segment_box_distance(p: np.ndarray, q: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Distance from segments p-q (M, 3) to the axis-aligned box [lo, hi] (0 when touching).
+
+    Along the segment, the squared distance to the box is a sum of per-axis quadratics whose
+    active bound only changes where the segment crosses one of the six slab planes. Between
+    consecutive crossings the minimum has a closed form, so the exact distance is the smallest
+    of those seven piecewise minima.
+    """
+    p = np.asarray(p, dtype=float).reshape(-1, 3)
+    d = np.asarray(q, dtype=float).reshape(-1, 3) - p
+    m = p.shape[0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossings = np.concatenate([(lo - p) / d, (hi - p) / d], axis=1)
+    crossings = np.where(np.isfinite(crossings), np.clip(crossings, 0.0, 1.0), 0.0)
+    breaks = np.sort(np.concatenate([np.zeros((m, 1)), np.ones((m, 1)), crossings], axis=1), axis=1)
+    t0, t1 = breaks[:, :-1], breaks[:, 1:]
+
+    # Which bound (if any) each axis is clamped to inside each interval.
+    x_mid = p[:, None] + (0.5 * (t0 + t1))[..., None] * d[:, None]
+    below = x_mid < lo
+    above = x_mid > hi
+    active = below | above
+    bound = np.where(below, lo, hi)
+    e = np.where(active, p[:, None] - bound, 0.0)
+    dd = np.where(active, d[:, None], 0.0)
+    den = np.einsum("mik,mik->mi", dd, dd)
+    num = -np.einsum("mik,mik->mi", e, dd)
+    t = np.clip(np.where(den > _EPS, num / np.maximum(den, _EPS), t0), t0, t1)
+    resid = e + t[..., None] * dd
+    return np.sqrt(np.einsum("mik,mik->mi", resid, resid).min(axis=1))
+
+
+class CollisionChecker:
+    """Capsule model of the arm for self-collision and obstacle checks on joint batches.
+
+    Each link between consecutive `fk_chain_points` is a capsule of the link's radius;
+    zero-length links (pure rotations in the DH chain) are dropped. Links fewer than
+    `min_link_gap` apart in the remaining chain are never checked against each other, since
+    neighbours always touch at their shared joint. A link is named after the joint that moves
+    it (the link from chain point i to i+1 is `joints[i].name`).
+
+    `collides_batch` runs a broad phase first: capsule AABBs are tested against each other
+    and against the obstacle AABBs, and only overlapping pairs reach the exact
+    segment-distance test. Configurations far from everything never leave the broad phase.
+    """
+
+    def __init__(
+        self,
+        joints: Sequence[JointSpec],
+        link_radius_m: float | Sequence[float] = 0.03,
+        obstacles: Sequence[Obstacle] = (),
+        min_link_gap: int = 2,
+        margin_m: float = 0.0,
+    ) -> None:
+        self.model = as_kinematic_model(joints)
+        dof = self.model.dof
+        radii = np.asarray(link_radius_m, dtype=float)
+        if radii.ndim == 0:
+            radii = np.full(dof, float(radii))
+        elif radii.shape != (dof,):
+            raise ValueError("link_radius_m must be a scalar or one value per joint")
+        lengths = np.array([np.hypot(j.a_m, j.d_m) for j in self.model], dtype=float)
+        self.links = np.flatnonzero((lengths > 1e-9) & (radii > 0.0))
+        self.link_names = [self.model[i].name for i in self.links]
+        self.radii = radii[self.links].copy()
+        self.margin_m = float(margin_m)
+        self.obstacles = list(obstacles)
+
+        n_links = len(self.links)
+        pairs = [(i, j) for i in range(n_links) for j in range(i + min_link_gap, n_links)]
+        self.pairs = np.array(pairs, dtype=int).reshape(-1, 2)
+        self._pair_reach = self.radii[self.pairs[:, 0]] + self.radii[self.pairs[:, 1]] + self.margin_m
+        self._obstacle_links = []
+        for ob in self.obstacles:
+            unknown = set(ob.ignore_links) - {j.name for j in self.model}
+            if unknown:
+                raise ValueError(f"Obstacle {ob.name!r}: unknown ignore_links {sorted(unknown)}")
+            self._obstacle_links.append(
+                np.array([k for k, name in enumerate(self.link_names) if name not in ob.ignore_links], dtype=int)
+            )
+
+    @classmethod
+    def from_config(cls, config: str | Path | ArmConfig, **kwargs) -> "CollisionChecker":
+        """Checker using the joints and `simulation.collision` settings of a robot_arm.yaml."""
+        cfg = config if isinstance(config, ArmConfig) else load_arm_config(config)
+        kwargs.setdefault("link_radius_m", cfg.collision.link_radius_m)
+        kwargs.setdefault("min_link_gap", cfg.collision.min_link_gap)
+        kwargs.setdefault("margin_m", cfg.collision.margin_m)
+        kwargs.setdefault("obstacles", [obstacle_from_dict(o) for o in cfg.collision.obstacles])
+        return cls(cfg.joints, **kwargs)
+
+    def capsules(self, q_deg: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Link segment start and end points, each (N, L, 3)."""
+        chain = self.model.chain_batch(np.atleast_2d(np.asarray(q_deg, dtype=float)))
+        return chain[:, self.links], chain[:, self.links + 1]
+
+    def _bounds(self, a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        r = self.radii[None, :, None]
+        return np.minimum(a, b) - r, np.maximum(a, b) + r
+
+    def collides_batch(self, q_deg: np.ndarray) -> np.ndarray:
+        """(N,) True where a configuration self-collides or touches an obstacle."""
+        a, b = self.capsules(q_deg)
+        lo, hi = self._bounds(a, b)
+        hit = np.zeros(a.shape[0], dtype=bool)
+
+        if len(self.pairs):
+            i, j = self.pairs[:, 0], self.pairs[:, 1]
+            overlap = np.all((lo[:, i] <= hi[:, j] + self.margin_m) & (lo[:, j] <= hi[:, i] + self.margin_m), axis=2)
+            n, k = np.nonzero(overlap)
+            if n.size:
+                dist = segment_segment_distance(a[n, i[k]], b[n, i[k]], a[n, j[k]], b[n, j[k]])
+                hit[n[dist < self._pair_reach[k]]] = True
+
+        for ob, links in zip(self.obstacles, self._obstacle_links):
+            overlap = np.all(
+                (lo[:, links] <= ob.hi + self.margin_m) & (hi[:, links] >= ob.lo - self.margin_m), axis=2
+            )
+            overlap &= ~hit[:, None]
+            n, k = np.nonzero(overlap)
+            if not n.size:
+                continue
+            dist = self._obstacle_distance(ob, a[n, links[k]], b[n, links[k]])
+            hit[n[dist < self.radii[links[k]] + self.margin_m]] = True
+        return hit
+
+    def clearance_batch(self, q_deg: np.ndarray) -> np.ndarray:
+        """(N,) smallest surface gap (m) over all checked link pairs and obstacles; < 0 is a collision.
+
+        Exact for every pair (no broad phase), for planners that need a distance, not a flag.
+        """
+        a, b = self.capsules(q_deg)
+        clearance = np.full(a.shape[0], np.inf)
+        if len(self.pairs):
+            i, j = self.pairs[:, 0], self.pairs[:, 1]
+            dist = segment_segment_distance(a[:, i], b[:, i], a[:, j], b[:, j])
+            clearance = np.minimum(clearance, (dist - self._pair_reach).min(axis=1))
+        for ob, links in zip(self.obstacles, self._obstacle_links):
+            if not len(links):
+                continue
+            n = a.shape[0]
+            dist = self._obstacle_distance(ob, a[:, links].reshape(-1, 3), b[:, links].reshape(-1, 3)).reshape(n, -1)
+            clearance = np.minimum(clearance, (dist - self.radii[links] - self.margin_m).min(axis=1))
+        return clearance
+
+    def first_collision(self, q_deg: np.ndarray, chunk: int = 256) -> int | None:
+        """Index of the first colliding sample of a trajectory, checked in chunks, or None."""
+        q_deg = np.atleast_2d(np.asarray(q_deg, dtype=float))
+        for start in range(0, q_deg.shape[0], chunk):
+            hit = np.flatnonzero(self.collides_batch(q_deg[start : start + chunk]))
+            if hit.size:
+                return start + int(hit[0])
+        return None
+
+    def contacts(self, q_deg: Sequence[float]) -> List[Tuple[str, str, float]]:
+        """(link, other link or obstacle, surface gap m) for every contact of one configuration."""
+        a, b = self.capsules(np.asarray(q_deg, dtype=float).reshape(1, -1))
+        a, b = a[0], b[0]
+        found = []
+        for (i, j), reach in zip(self.pairs, self._pair_reach):
+            gap = float(segment_segment_distance(a[i], b[i], a[j], b[j]) - reach)
+            if gap < 0.0:
+                found.append((self.link_names[i], self.link_names[j], gap))
+        for ob, links in zip(self.obstacles, self._obstacle_links):
+            if not len(links):
+                continue
+            gaps = self._obstacle_distance(ob, a[links], b[links]) - self.radii[links] - self.margin_m
+            found += [(self.link_names[k], ob.name, float(g)) for k, g in zip(links, gaps) if g < 0.0]
+        return found
+
+    @staticmethod
+    def _obstacle_distance(ob: Obstacle, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Segment distance to the obstacle's surface (0 inside a box, negative inside a sphere)."""
+        if ob.kind == "sphere":
+            return segment_point_distance(a, b, ob.center_m) - ob.radius_m
+        return segment_box_distance(a, b, ob.lo, ob.hi)
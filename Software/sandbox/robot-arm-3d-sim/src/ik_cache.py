@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from kinematics import JointSpec, as_kinematic_model, ik_dls_position_only, initial_joint_angles_deg
+
+CacheKey = Tuple[Tuple[int, ...], Tuple[int, ...]]
+
+
+@dataclass
+class IkCacheStats:
+    hits: int = 0
+    warm_starts: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.warm_starts + self.misses
+
+
+class IkSolutionCache:
+    """LRU cache in front of `ik_dls_position_only`.
+
+    Entries are keyed on the target quantized to `grid_m` and the seed quantized to
+    `seed_region_deg`, so commands that revisit nearly the same target from the same
+    region of joint space share an entry. A cached solution that is already within
+    `tolerance_m` of the exact (unquantized) target is returned as-is (a hit); otherwise it
+    is used as the IK warm start. Only converged solutions are stored, under both the seed's
+    region and the solution's own region.
+
+    Memory is bounded by `max_entries`; `nbytes` reports the payload currently held.
+    """
+
+    def __init__(
+        self,
+        joints: Sequence[JointSpec],
+        grid_m: float = 0.001,
+        seed_region_deg: float = 15.0,
+        max_entries: int = 4096,
+        max_iters: int = 120,
+        damping: float = 0.04,
+        tolerance_m: float = 1e-3,
+    ) -> None:
+        if grid_m <= 0.0 or seed_region_deg <= 0.0:
+            raise ValueError("grid_m and seed_region_deg must be positive")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.model = as_kinematic_model(joints)
+        self.grid_m = grid_m
+        self.seed_region_deg = seed_region_deg
+        self.max_entries = max_entries
+        self.max_iters = max_iters
+        self.damping = damping
+        self.tolerance_m = tolerance_m
+        self.stats = IkCacheStats()
+        self._entries: OrderedDict[CacheKey, np.ndarray] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(q.nbytes for q in {id(q): q for q in self._entries.values()}.values())
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def key(self, target_xyz_m: Sequence[float], q_seed_deg: Sequence[float]) -> CacheKey:
+        cell = np.round(np.asarray(target_xyz_m, dtype=float) / self.grid_m).astype(int)
+        region = np.floor(np.asarray(q_seed_deg, dtype=float) / self.seed_region_deg).astype(int)
+        return tuple(cell.tolist()), tuple(region.tolist())
+
+    def solve(
+        self, target_xyz_m: Sequence[float], q_init_deg: Sequence[float] | None = None
+    ) -> Tuple[np.ndarray, bool]:
+        target = np.asarray(target_xyz_m, dtype=float)
+        seed = (
+            np.asarray(q_init_deg, dtype=float)
+            if q_init_deg is not None
+            else initial_joint_angles_deg(self.model)
+        )
+        key = self.key(target, seed)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            if np.linalg.norm(self.model.ee_position(cached) - target) < self.tolerance_m:
+                self.stats.hits += 1
+                return cached.copy(), True
+            self.stats.warm_starts += 1
+            seed = cached
+        else:
+            self.stats.misses += 1
+
+        q, converged = ik_dls_position_only(
+            self.model,
+            target,
+            q_init_deg=seed,
+            max_iters=self.max_iters,
+            damping=self.damping,
+            tolerance_m=self.tolerance_m,
+        )
+        if converged:
+            self._entries[key] = q.copy()
+            self._entries.move_to_end(key)
+            # Also file it under the solution's own region: the next command usually starts
+            # from where this one ended.
+            self._entries[self.key(target, q)] = self._entries[key]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return q, converged
@@ -3,10 +3,9 @@ from __future__ import annotations
 import math
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Sequence, Tuple
+from typing import Iterator, List, Sequence, Tuple
 
 import numpy as np
-import yaml
 
 
 @dataclass
@@ -21,31 +20,15 @@ class JointSpec:
     initial_deg: float
     min_deg: float
     max_deg: float
+    max_vel_deg_s: float = 90.0
+    max_acc_deg_s2: float = 360.0
 
 
 def load_joint_specs(config_path: str | Path) -> List[JointSpec]:
-    path = Path(config_path)
-    with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-
-    joints = data["robot"]["joints"]
-    specs: List[JointSpec] = []
-    for j in joints:
-        specs.append(
-            JointSpec(
-                name=j["name"],
-                joint_type=j["type"],
-                rotation_axis_local=str(j.get("rotation_axis_local", "z")),
-                a_m=float(j["a_m"]),
-                alpha_rad=float(j["alpha_rad"]),
-                d_m=float(j["d_m"]),
-                theta_offset_rad=float(j["theta_offset_rad"]),
-                initial_deg=float(j.get("initial_deg", 0.0)),
-                min_deg=float(j["min_deg"]),
-                max_deg=float(j["max_deg"]),
-            )
-        )
-    return specs
+    """Joints of a robot_arm.yaml, via the validated and cached config (see arm_config.py)."""
+    from arm_config import load_arm_config  # arm_config imports this module
+
+    return load_arm_config(config_path).joints
 
 
 def dof(joints: Sequence[JointSpec]) -> int:
@@ -83,6 +66,282 @@ def fk(joints: Sequence[JointSpec], q_deg: Sequence[float]) -> np.ndarray:
     return t
 
 
+def _dh_step_batch(
+    frame: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+    a: float,
+    d: float,
+    cal: float,
+    sal: float,
+    theta: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Columns of T_{i-1} @ A_i stored as (3, N) arrays, written out so only the
+    # non-constant DH terms are evaluated per sample.
+    x, y, z, p = frame
+    cth, sth = np.cos(theta), np.sin(theta)
+    u = cth * x + sth * y
+    v = cth * y - sth * x
+    if a != 0.0:
+        p = p + a * u
+    if d != 0.0:
+        p = p + d * z
+    if sal == 0.0:
+        return u, cal * v, cal * z, p
+    return u, cal * v + sal * z, cal * z - sal * v, p
+
+
+def _identity_frame_batch(n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    eye = np.eye(3, dtype=float)
+    return (
+        np.broadcast_to(eye[:, :1], (3, n)),
+        np.broadcast_to(eye[:, 1:2], (3, n)),
+        np.broadcast_to(eye[:, 2:], (3, n)),
+        np.zeros((3, n), dtype=float),
+    )
+
+
+class KinematicModel:
+    """DH chain compiled once from a JointSpec list.
+
+    Per-joint constants live in `params` (one row per joint, see `PARAM_COLUMNS`), so the
+    hot paths never recompute cos/sin of alpha or re-check joint types. Single-configuration
+    methods work in preallocated scratch buffers and accept an optional `out` array; they are
+    therefore not safe to share across threads (build one model per thread instead).
+
+    The model also behaves as a read-only sequence of its JointSpecs, so it can be passed
+    anywhere a `Sequence[JointSpec]` is accepted.
+    """
+
+    PARAM_COLUMNS = ("a_m", "d_m", "cos_alpha", "sin_alpha", "theta_offset_rad", "min_rad", "max_rad")
+
+    def __init__(self, joints: Sequence[JointSpec]) -> None:
+        for joint in joints:
+            if joint.joint_type != "revolute":
+                raise NotImplementedError("Only revolute joints are implemented")
+        self.joints: Tuple[JointSpec, ...] = tuple(joints)
+        self.dof = len(self.joints)
+
+        self.params = np.array(
+            [
+                [
+                    j.a_m,
+                    j.d_m,
+                    math.cos(j.alpha_rad),
+                    math.sin(j.alpha_rad),
+                    j.theta_offset_rad,
+                    math.radians(j.min_deg),
+                    math.radians(j.max_deg),
+                ]
+                for j in self.joints
+            ],
+            dtype=float,
+        ).reshape(self.dof, len(self.PARAM_COLUMNS))
+        self.params.setflags(write=False)
+        (
+            self.a,
+            self.d,
+            self.cos_alpha,
+            self.sin_alpha,
+            self.theta_offset,
+            self.min_rad,
+            self.max_rad,
+        ) = self.params.T
+        self.min_deg = np.array([j.min_deg for j in self.joints], dtype=float)
+        self.max_deg = np.array([j.max_deg for j in self.joints], dtype=float)
+        self.max_vel_deg_s = np.array([j.max_vel_deg_s for j in self.joints], dtype=float)
+        self.max_acc_deg_s2 = np.array([j.max_acc_deg_s2 for j in self.joints], dtype=float)
+        self._neg_cos_alpha = -self.cos_alpha
+        self._neg_sin_alpha = -self.sin_alpha
+
+        # Scratch buffers. The constant rows of every A_i are filled once here.
+        self._theta = np.zeros(self.dof, dtype=float)
+        self._cth = np.zeros(self.dof, dtype=float)
+        self._sth = np.zeros(self.dof, dtype=float)
+        self._dh = np.zeros((self.dof, 4, 4), dtype=float)
+        self._dh[:, 2, 1] = self.sin_alpha
+        self._dh[:, 2, 2] = self.cos_alpha
+        self._dh[:, 2, 3] = self.d
+        self._dh[:, 3, 3] = 1.0
+        self._frames = np.zeros((self.dof + 1, 4, 4), dtype=float)
+        self._eye = np.eye(4, dtype=float)
+        self._r = np.zeros((self.dof, 3), dtype=float)
+        self._tmp = np.zeros(self.dof, dtype=float)
+
+    def __len__(self) -> int:
+        return self.dof
+
+    def __iter__(self) -> Iterator[JointSpec]:
+        return iter(self.joints)
+
+    def __getitem__(self, index: int) -> JointSpec:
+        return self.joints[index]
+
+    def _check_q(self, q_deg: Sequence[float]) -> np.ndarray:
+        q = np.asarray(q_deg, dtype=float)
+        if q.shape != (self.dof,):
+            raise ValueError("q_deg size must match robot DOF")
+        return q
+
+    def frames(self, q_deg: Sequence[float], out: np.ndarray | None = None) -> np.ndarray:
+        """Return all frames T_0i for i = 0..DOF as a (DOF+1, 4, 4) array."""
+        q = self._check_q(q_deg)
+        frames = out if out is not None else np.empty((self.dof + 1, 4, 4), dtype=float)
+        cth, sth, dh = self._cth, self._sth, self._dh
+
+        np.radians(q, out=self._theta)
+        self._theta += self.theta_offset
+        np.cos(self._theta, out=cth)
+        np.sin(self._theta, out=sth)
+        dh[:, 0, 0] = cth
+        np.multiply(sth, self._neg_cos_alpha, out=dh[:, 0, 1])
+        np.multiply(sth, self.sin_alpha, out=dh[:, 0, 2])
+        np.multiply(cth, self.a, out=dh[:, 0, 3])
+        dh[:, 1, 0] = sth
+        np.multiply(cth, self.cos_alpha, out=dh[:, 1, 1])
+        np.multiply(cth, self._neg_sin_alpha, out=dh[:, 1, 2])
+        np.multiply(sth, self.a, out=dh[:, 1, 3])
+
+        frames[0] = self._eye
+        for i in range(self.dof):
+            np.matmul(frames[i], dh[i], out=frames[i + 1])
+        return frames
+
+    def fk(self, q_deg: Sequence[float], out: np.ndarray | None = None) -> np.ndarray:
+        frames = self.frames(q_deg, out=self._frames)
+        if out is None:
+            return frames[-1].copy()
+        out[...] = frames[-1]
+        return out
+
+    def ee_position(self, q_deg: Sequence[float], out: np.ndarray | None = None) -> np.ndarray:
+        frames = self.frames(q_deg, out=self._frames)
+        if out is None:
+            return frames[-1, :3, 3].copy()
+        out[...] = frames[-1, :3, 3]
+        return out
+
+    def chain(self, q_deg: Sequence[float], out: np.ndarray | None = None) -> np.ndarray:
+        """Return the (DOF+1, 3) joint origins from base to end effector."""
+        frames = self.frames(q_deg, out=self._frames)
+        if out is None:
+            return frames[:, :3, 3].copy()
+        out[...] = frames[:, :3, 3]
+        return out
+
+    def jacobian_from_frames(
+        self, frames: np.ndarray, include_orientation: bool = False, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        rows = 6 if include_orientation else 3
+        jac = out if out is not None else np.empty((rows, self.dof), dtype=float)
+        z = frames[:-1, :3, 2]
+        r, tmp = self._r, self._tmp
+        np.subtract(frames[-1, :3, 3], frames[:-1, :3, 3], out=r)
+        # z x r written out; np.cross has a large fixed cost for arrays this small.
+        for row, (i, k) in enumerate(((1, 2), (2, 0), (0, 1))):
+            np.multiply(z[:, i], r[:, k], out=jac[row])
+            np.multiply(z[:, k], r[:, i], out=tmp)
+            jac[row] -= tmp
+        if include_orientation:
+            jac[3:] = z.T
+        return jac
+
+    def jacobian(
+        self, q_deg: Sequence[float], include_orientation: bool = False, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        frames = self.frames(q_deg, out=self._frames)
+        return self.jacobian_from_frames(frames, include_orientation, out=out)
+
+    def clamp(self, q_deg: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Clip (DOF,) or (N, DOF) joint angles in degrees to the joint limits."""
+        return np.clip(q_deg, self.min_deg, self.max_deg, out=out)
+
+    def _theta_batch(self, q_deg: np.ndarray) -> np.ndarray:
+        q = np.asarray(q_deg, dtype=float)
+        if q.ndim != 2 or q.shape[1] != self.dof:
+            raise ValueError("q_deg must have shape (N, DOF)")
+        # Joint-major (DOF, N) layout keeps each joint's angles contiguous for the trig calls.
+        return np.radians(q.T) + self.theta_offset[:, None]
+
+    def _step_batch(
+        self, frame: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray], i: int, theta: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        return _dh_step_batch(
+            frame, self.a[i], self.d[i], self.cos_alpha[i], self.sin_alpha[i], theta[i]
+        )
+
+    def fk_batch(self, q_deg: np.ndarray) -> np.ndarray:
+        theta = self._theta_batch(q_deg)
+        n = theta.shape[1]
+        frame = _identity_frame_batch(n)
+        for i in range(self.dof):
+            frame = self._step_batch(frame, i, theta)
+
+        t = np.zeros((n, 4, 4), dtype=float)
+        for col, vec in enumerate(frame):
+            t[:, :3, col] = vec.T
+        t[:, 3, 3] = 1.0
+        return t
+
+    def ee_position_batch(self, q_deg: np.ndarray) -> np.ndarray:
+        theta = self._theta_batch(q_deg)
+        frame = _identity_frame_batch(theta.shape[1])
+        for i in range(self.dof):
+            frame = self._step_batch(frame, i, theta)
+        return frame[3].T.copy()
+
+    def chain_batch(self, q_deg: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        theta = self._theta_batch(q_deg)
+        n = theta.shape[1]
+        points = out if out is not None else np.empty((n, self.dof + 1, 3), dtype=float)
+        points[:, 0] = 0.0
+        frame = _identity_frame_batch(n)
+        for i in range(self.dof):
+            frame = self._step_batch(frame, i, theta)
+            points[:, i + 1] = frame[3].T
+        return points
+
+    def position_and_jacobian_batch(self, q_deg: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return EE positions (N, 3) and position Jacobians (N, 3, DOF)."""
+        theta = self._theta_batch(q_deg)
+        n = theta.shape[1]
+        z_axes = np.empty((self.dof, 3, n), dtype=float)
+        origins = np.empty((self.dof, 3, n), dtype=float)
+        frame = _identity_frame_batch(n)
+        for i in range(self.dof):
+            z_axes[i] = frame[2]
+            origins[i] = frame[3]
+            frame = self._step_batch(frame, i, theta)
+
+        p = frame[3]
+        r = p[None] - origins
+        jv = np.empty_like(r)
+        jv[:, 0] = z_axes[:, 1] * r[:, 2] - z_axes[:, 2] * r[:, 1]
+        jv[:, 1] = z_axes[:, 2] * r[:, 0] - z_axes[:, 0] * r[:, 2]
+        jv[:, 2] = z_axes[:, 0] * r[:, 1] - z_axes[:, 1] * r[:, 0]
+        return p.T.copy(), jv.transpose(2, 1, 0).copy()
+
+
+def as_kinematic_model(joints: Sequence[JointSpec]) -> KinematicModel:
+    if isinstance(joints, KinematicModel):
+        return joints
+    return KinematicModel(joints)
+
+
+def fk_batch(joints: Sequence[JointSpec], q_deg: np.ndarray) -> np.ndarray:
+    return as_kinematic_model(joints).fk_batch(q_deg)
+
+
+def ee_position_batch(joints: Sequence[JointSpec], q_deg: np.ndarray) -> np.ndarray:
+    return as_kinematic_model(joints).ee_position_batch(q_deg)
+
+
+def fk_chain_points_batch(joints: Sequence[JointSpec], q_deg: np.ndarray) -> np.ndarray:
+    return as_kinematic_model(joints).chain_batch(q_deg)
+
+
+def geometric_jacobian_batch(joints: Sequence[JointSpec], q_deg: np.ndarray) -> np.ndarray:
+    return as_kinematic_model(joints).position_and_jacobian_batch(q_deg)[1]
+
+
 def ee_position(joints: Sequence[JointSpec], q_deg: Sequence[float]) -> np.ndarray:
     return fk(joints, q_deg)[:3, 3]
 
@@ -114,11 +373,21 @@ def numerical_jacobian(
     return j
 
 
+def fk_frames(joints: Sequence[JointSpec], q_deg: Sequence[float]) -> np.ndarray:
+    return as_kinematic_model(joints).frames(q_deg)
+
+
+def geometric_jacobian(
+    joints: Sequence[JointSpec], q_deg: Sequence[float], include_orientation: bool = False
+) -> np.ndarray:
+    return as_kinematic_model(joints).jacobian(q_deg, include_orientation)
+
+
 def clamp_to_limits(joints: Sequence[JointSpec], q_deg: np.ndarray) -> np.ndarray:
-    out = q_deg.copy()
-    for i, joint in enumerate(joints):
-        out[i] = min(max(out[i], joint.min_deg), joint.max_deg)
-    return out
+    # Works on a single (DOF,) configuration or a whole (N, DOF) trajectory.
+    lo = np.array([j.min_deg for j in joints], dtype=float)
+    hi = np.array([j.max_deg for j in joints], dtype=float)
+    return np.clip(q_deg, lo, hi)
 
 
 def ik_dls_position_only(
@@ -128,35 +397,109 @@ def ik_dls_position_only(
     max_iters: int = 120,
     damping: float = 0.04,
     tolerance_m: float = 1e-3,
+    jacobian: str = "analytic",
 ) -> Tuple[np.ndarray, bool]:
+    if jacobian not in ("analytic", "numeric"):
+        raise ValueError("jacobian must be 'analytic' or 'numeric'")
+
+    model = as_kinematic_model(joints)
     q = (
         np.array(q_init_deg, dtype=float)
         if q_init_deg is not None
-        else initial_joint_angles_deg(joints)
+        else initial_joint_angles_deg(model)
     )
     target = np.array(target_xyz_m, dtype=float)
+    damp_ident = (damping**2) * np.eye(3, dtype=float)
+    frames = np.empty((model.dof + 1, 4, 4), dtype=float)
+    jac = np.empty((3, model.dof), dtype=float)
 
     for _ in range(max_iters):
-        p = ee_position(joints, q)
+        if jacobian == "analytic":
+            # One FK pass yields both the EE position and every joint axis.
+            model.frames(q, out=frames)
+            p = frames[-1, :3, 3]
+        else:
+            p = model.ee_position(q)
         err = target - p
         if np.linalg.norm(err) < tolerance_m:
-            return clamp_to_limits(joints, q), True
+            return model.clamp(q, out=q), True
 
-        jac = numerical_jacobian(joints, q)
+        if jacobian == "analytic":
+            model.jacobian_from_frames(frames, out=jac)
+        else:
+            jac = numerical_jacobian(model, q)
         jt = jac.T
-        ident = np.eye(jac.shape[0], dtype=float)
-        dq_rad = jt @ np.linalg.inv(jac @ jt + (damping**2) * ident) @ err
+        dq_rad = jt @ np.linalg.solve(jac @ jt + damp_ident, err)
         q += np.degrees(dq_rad)
-        q = clamp_to_limits(joints, q)
+        model.clamp(q, out=q)
 
     return q, False
 
 
+def ik_dls_position_only_batch(
+    joints: Sequence[JointSpec],
+    targets_xyz_m: np.ndarray,
+    q_init_deg: np.ndarray | None = None,
+    max_iters: int = 120,
+    damping: float = 0.04,
+    tolerance_m: float = 1e-3,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    targets = np.asarray(targets_xyz_m, dtype=float)
+    if targets.ndim != 2 or targets.shape[1] != 3:
+        raise ValueError("targets_xyz_m must have shape (N, 3)")
+    model = as_kinematic_model(joints)
+    n = targets.shape[0]
+    if q_init_deg is None:
+        q = np.tile(initial_joint_angles_deg(model), (n, 1))
+    else:
+        q = np.array(q_init_deg, dtype=float)
+        if q.shape != (n, model.dof):
+            raise ValueError("q_init_deg must have shape (N, DOF)")
+
+    ident = np.eye(3, dtype=float)
+    converged = np.zeros(n, dtype=bool)
+    iterations = np.full(n, max_iters, dtype=int)
+    # Rows still being solved; converged rows drop out so later iterations get cheaper.
+    active = np.arange(n)
+
+    for it in range(max_iters):
+        if active.size == 0:
+            break
+        p, jac = model.position_and_jacobian_batch(q[active])
+        err = targets[active] - p
+        done = np.linalg.norm(err, axis=1) < tolerance_m
+        if done.any():
+            rows = active[done]
+            converged[rows] = True
+            iterations[rows] = it
+            q[rows] = model.clamp(q[rows])
+            keep = ~done
+            active, err, jac = active[keep], err[keep], jac[keep]
+            if active.size == 0:
+                break
+
+        jt = jac.transpose(0, 2, 1)
+        step = np.linalg.solve(jac @ jt + (damping**2) * ident, err[..., None])
+        dq_rad = (jt @ step)[..., 0]
+        q[active] = model.clamp(q[active] + np.degrees(dq_rad))
+
+    return q, converged, iterations
+
+
+def random_joint_angles_deg(
+    joints: Sequence[JointSpec], n: int, rng: np.random.Generator | None = None
+) -> np.ndarray:
+    rng = rng if rng is not None else np.random.default_rng()
+    lo = np.array([j.min_deg for j in joints], dtype=float)
+    hi = np.array([j.max_deg for j in joints], dtype=float)
+    return rng.uniform(lo, hi, size=(n, len(joints)))
+
+
 def build_range_trajectory(joints: Sequence[JointSpec], steps: int = 100) -> np.ndarray:
     q0 = np.array([j.min_deg for j in joints], dtype=float)
     q1 = np.array([j.max_deg for j in joints], dtype=float)
-    traj = np.array([q0 + (q1 - q0) * (k / max(steps - 1, 1)) for k in range(steps)], dtype=float)
-    return np.array([clamp_to_limits(joints, q) for q in traj], dtype=float)
+    frac = np.arange(steps, dtype=float)[:, None] / max(steps - 1, 1)
+    return clamp_to_limits(joints, q0 + (q1 - q0) * frac)
 
 
 # Backward-compatible alias.
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import List, Tuple
+
+# Modules whose import dominates startup; the report says which ones a run ended up loading.
+HEAVY_MODULES = ("numpy", "yaml", "matplotlib", "cv2", "reportlab")
+
+
+def process_age_s() -> float | None:
+    """Seconds since this process started (interpreter start-up included), Linux only."""
+    try:
+        with open("/proc/self/stat", "r", encoding="ascii") as f:
+            # Field 22 (starttime, clock ticks after boot); fields are counted after the ")"
+            # that closes the command name, which may itself contain spaces.
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r", encoding="ascii") as f:
+            uptime_s = float(f.read().split()[0])
+        return uptime_s - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupProfile:
+    """Wall-clock time between named start-up steps, for `--startup-profile`.
+
+    Create it first thing in main(); everything imported before that point (interpreter and
+    module imports) is reported as one "imports" step measured from process start.
+    """
+
+    def __init__(self) -> None:
+        age = process_age_s()
+        self._t0 = time.perf_counter() - (age or 0.0)
+        self.steps: List[Tuple[str, float]] = []
+        if age is not None:
+            self.steps.append(("imports (since process start)", age))
+        self._last = time.perf_counter()
+
+    def mark(self, name: str) -> None:
+        now = time.perf_counter()
+        self.steps.append((name, now - self._last))
+        self._last = now
+
+    def total_s(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def report(self) -> str:
+        lines = ["Startup profile:"]
+        lines += [f"  {name:<32} {dt * 1000.0:8.1f} ms" for name, dt in self.steps]
+        lines.append(f"  {'total':<32} {self.total_s() * 1000.0:8.1f} ms")
+        loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+        lines.append(f"  heavy modules loaded: {', '.join(loaded) or 'none'}")
+        return "\n".join(lines)
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Sequence
+
+import numpy as np
+
+from arm_config import ArmConfig, load_arm_config
+from ik_cache import IkSolutionCache
+from kinematics import initial_joint_angles_deg
+
+
+@dataclass
+class TargetSample:
+    target_xyz_m: np.ndarray
+    created_at: float  # time.perf_counter() when the source frame was captured
+    stages_ms: Dict[str, float] = field(default_factory=dict)  # upstream stage durations
+    submitted_at: float = 0.0
+
+
+@dataclass
+class TargetSolution:
+    sample: TargetSample
+    q_deg: np.ndarray
+    converged: bool
+    stages_ms: Dict[str, float]  # upstream stages plus ik_wait, ik and total
+
+    @property
+    def latency_ms(self) -> float:
+        return self.stages_ms["total"]
+
+
+class LatencyLog:
+    """Rolling per-stage latency samples (ms) with percentile reporting."""
+
+    def __init__(self, window: int = 10000) -> None:
+        self.window = window
+        self._stages: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stages_ms: Dict[str, float]) -> None:
+        with self._lock:
+            for name, ms in stages_ms.items():
+                self._stages.setdefault(name, deque(maxlen=self.window)).append(float(ms))
+
+    def percentiles(self, pcts: Sequence[float] = (50.0, 99.0)) -> Dict[str, np.ndarray]:
+        with self._lock:
+            return {name: np.percentile(np.asarray(v), pcts) for name, v in self._stages.items() if v}
+
+    def format(self) -> str:
+        rows = self.percentiles((50.0, 99.0))
+        if not rows:
+            return "no samples"
+        lines = [f"{'stage':<18} {'p50 ms':>8} {'p99 ms':>8}"]
+        lines += [f"{name:<18} {p50:8.2f} {p99:8.2f}" for name, (p50, p99) in rows.items()]
+        return "\n".join(lines)
+
+
+class IkTargetStream:
+    """Solves a stream of XYZ targets on a worker thread, always working on the newest one.
+
+    Only one target waits at a time: submitting while one is pending replaces it
+    (`superseded`), and a target that waited longer than `max_age_s` for the worker after
+    being submitted is skipped (`stale`). Both cases mean IK fell behind the camera, and
+    solving the old target would only delay the fresh one. Staleness is measured from
+    submission, not capture, so detection latency upstream (pipelined workers, replay
+    queues) does not throw away the freshest target there is. A target captured before one
+    already submitted arrives out of order (parallel detection) and is dropped (`reordered`).
+    Each solve is warm-started from the previous solution through `IkSolutionCache`.
+
+    Every solved sample's stage latencies (upstream stages, `ik_wait`, `ik`, and `total`
+    from capture to solution) go into `latency`. An exception from a solve or `on_solution`
+    does not stop the worker; `wait_idle` or `close` re-raises it.
+    """
+
+    def __init__(
+        self,
+        ik_cache: IkSolutionCache,
+        q_start_deg: Sequence[float] | None = None,
+        max_age_s: float = 0.1,
+        on_solution: Callable[[TargetSolution], None] | None = None,
+        start: bool = True,
+    ) -> None:
+        self.ik_cache = ik_cache
+        self.q_deg = (
+            np.array(q_start_deg, dtype=float)
+            if q_start_deg is not None
+            else initial_joint_angles_deg(ik_cache.model)
+        )
+        self.max_age_s = max_age_s
+        self.on_solution = on_solution
+        self.latency = LatencyLog()
+        self.latest: TargetSolution | None = None
+        self.solved = 0
+        self.superseded = 0
+        self.reordered = 0
+        self.stale = 0
+        self._newest_created_at = float("-inf")
+        self._pending: TargetSample | None = None
+        self._busy = False
+        self._closed = False
+        self._error: BaseException | None = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="ik-target-stream", daemon=True)
+        if start:
+            self.start()
+
+    @classmethod
+    def from_config(cls, config: str | Path | ArmConfig, **kwargs) -> "IkTargetStream":
+        """Stream using the joints and `simulation.ik` settings of a robot_arm.yaml."""
+        cfg = config if isinstance(config, ArmConfig) else load_arm_config(config)
+        cache = IkSolutionCache(
+            cfg.joints,
+            grid_m=cfg.ik.cache_grid_m,
+            seed_region_deg=cfg.ik.cache_seed_region_deg,
+            max_entries=cfg.ik.cache_max_entries,
+            max_iters=cfg.ik.max_iters,
+            damping=cfg.ik.damping,
+            tolerance_m=cfg.ik.tolerance_m,
+        )
+        kwargs.setdefault("max_age_s", cfg.ik.stream_max_age_s)
+        return cls(cache, **kwargs)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(
+        self,
+        target_xyz_m: Sequence[float],
+        created_at: float | None = None,
+        stages_ms: Dict[str, float] | None = None,
+    ) -> None:
+        now = time.perf_counter()
+        sample = TargetSample(
+            np.asarray(target_xyz_m, dtype=float).reshape(3),
+            now if created_at is None else created_at,
+            dict(stages_ms or {}),
+            now,
+        )
+        with self._cond:
+            if sample.created_at < self._newest_created_at:
+                self.reordered += 1
+                return  # an older frame finished late (parallel detection); keep the newer one
+            self._newest_created_at = sample.created_at
+            if self._pending is not None:
+                self.superseded += 1
+            self._pending = sample
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+                sample, self._pending = self._pending, None
+                self._busy = True
+            t0 = time.perf_counter()
+            if t0 - sample.submitted_at > self.max_age_s:
+                with self._cond:
+                    self.stale += 1
+                    self._busy = False
+                    self._cond.notify_all()
+                continue
+            try:
+                q, converged = self.ik_cache.solve(sample.target_xyz_m, q_init_deg=self.q_deg)
+                t1 = time.perf_counter()
+                if converged:
+                    self.q_deg = q
+                stages = dict(sample.stages_ms)
+                stages["ik_wait"] = (t0 - sample.submitted_at) * 1000.0
+                stages["ik"] = (t1 - t0) * 1000.0
+                stages["total"] = (t1 - sample.created_at) * 1000.0
+                solution = TargetSolution(sample, q, converged, stages)
+                self.latency.add(stages)
+                self.latest = solution
+                with self._cond:
+                    self.solved += 1
+                if self.on_solution is not None:
+                    self.on_solution(solution)
+            except Exception as exc:  # keep solving; wait_idle()/close() re-raise it
+                with self._cond:
+                    if self._error is None:
+                        self._error = exc
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Block until no target is pending or being solved.
+
+        Re-raises the first error a solve or `on_solution` raised since the last call.
+        """
+        with self._cond:
+            idle = self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+        self._raise_error()
+        return idle
+
+    def close(self) -> None:
+        """Stop after the target being solved; a pending one is discarded.
+
+        Re-raises a worker error that `wait_idle` has not reported yet.
+        """
+        with self._cond:
+            self._closed = True
+            self._pending = None
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        with self._cond:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def report(self) -> str:
+        return (
+            f"IK targets: {self.solved} solved, {self.superseded} superseded, {self.reordered} reordered, "
+            f"{self.stale} stale (max wait {self.max_age_s * 1000:.0f} ms)\n{self.latency.format()}"
+        )
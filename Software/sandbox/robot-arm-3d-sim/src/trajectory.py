@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import math
+from typing import Iterator, Sequence, Tuple
+
+import numpy as np
+
+from kinematics import JointSpec, as_kinematic_model
+
+PROFILES = ("linear", "cubic", "quintic", "trapezoidal")
+
+# Peak ds/dtau and d2s/dtau2 of each polynomial time scaling s(tau) on tau in [0, 1].
+_POLY_PEAKS = {
+    "linear": (1.0, 0.0),
+    "cubic": (1.5, 6.0),
+    "quintic": (1.875, 10.0 / math.sqrt(3.0)),
+}
+
+
+def _check_profile(profile: str) -> None:
+    if profile not in PROFILES:
+        raise ValueError(f"profile must be one of {PROFILES}")
+
+
+def _rate_limits(delta: np.ndarray, vel: np.ndarray, acc: np.ndarray) -> Tuple[float, float]:
+    """Largest path-parameter velocity/acceleration that keeps every axis inside its limits."""
+    moving = np.abs(delta) > 1e-12
+    if not np.any(moving):
+        return math.inf, math.inf
+    dist = np.abs(delta[moving])
+    return float(np.min(vel[moving] / dist)), float(np.min(acc[moving] / dist))
+
+
+def min_duration_s(profile: str, s_vel_max: float, s_acc_max: float) -> float:
+    """Shortest duration of a unit move (s: 0 -> 1) under path-rate limits."""
+    _check_profile(profile)
+    if math.isinf(s_vel_max):
+        return 0.0
+    if profile == "trapezoidal":
+        if s_vel_max * s_vel_max >= s_acc_max:
+            # Never reaches cruise speed: triangular profile.
+            return 2.0 * math.sqrt(1.0 / s_acc_max)
+        return 1.0 / s_vel_max + s_vel_max / s_acc_max
+    peak_v, peak_a = _POLY_PEAKS[profile]
+    t_vel = peak_v / s_vel_max
+    t_acc = math.sqrt(peak_a / s_acc_max) if peak_a > 0.0 else 0.0
+    return max(t_vel, t_acc)
+
+
+def time_scaling(
+    profile: str, t_s: np.ndarray, duration_s: float, s_vel_max: float = math.inf, s_acc_max: float = math.inf
+) -> np.ndarray:
+    """Path parameter s(t) in [0, 1] for every time in `t_s`."""
+    _check_profile(profile)
+    if duration_s <= 0.0:
+        return np.ones_like(t_s, dtype=float)
+    tau = np.clip(np.asarray(t_s, dtype=float) / duration_s, 0.0, 1.0)
+    if profile == "linear":
+        return tau
+    if profile == "cubic":
+        return tau * tau * (3.0 - 2.0 * tau)
+    if profile == "quintic":
+        return tau * tau * tau * (10.0 + tau * (-15.0 + 6.0 * tau))
+
+    # Trapezoidal velocity with the acceleration the duration allows: solve for the cruise
+    # speed v so that accel/cruise/decel covers s = 1 in duration_s at acceleration a.
+    a = s_acc_max if math.isfinite(s_acc_max) else 4.0 / (duration_s * duration_s)
+    disc = max(a * a * duration_s * duration_s - 4.0 * a, 0.0)
+    v = (a * duration_s - math.sqrt(disc)) / 2.0
+    t_acc = v / a
+    t = tau * duration_s
+    t_dec = duration_s - t
+    return np.where(
+        t < t_acc,
+        0.5 * a * t * t,
+        np.where(t_dec < t_acc, 1.0 - 0.5 * a * t_dec * t_dec, 0.5 * a * t_acc * t_acc + v * (t - t_acc)),
+    )
+
+
+def _plan(
+    profile: str,
+    delta: np.ndarray,
+    vel: np.ndarray,
+    acc: np.ndarray,
+    dt_s: float,
+    duration_s: float | None,
+) -> Tuple[float, float, float, int]:
+    _check_profile(profile)
+    if dt_s <= 0.0:
+        raise ValueError("dt_s must be positive")
+    s_vel, s_acc = _rate_limits(delta, vel, acc)
+    t_min = min_duration_s(profile, s_vel, s_acc)
+    # A requested duration shorter than the limits allow is stretched to the minimum.
+    duration = t_min if duration_s is None else max(float(duration_s), t_min)
+    steps = int(math.ceil(duration / dt_s - 1e-9)) + 1
+    return duration, s_vel, s_acc, steps
+
+
+def _sample_times(start: int, stop: int, dt_s: float, duration: float) -> np.ndarray:
+    return np.minimum(np.arange(start, stop, dtype=float) * dt_s, duration)
+
+
+def joint_trajectory(
+    joints: Sequence[JointSpec],
+    q_start_deg: Sequence[float],
+    q_goal_deg: Sequence[float],
+    dt_s: float,
+    profile: str = "quintic",
+    duration_s: float | None = None,
+) -> np.ndarray:
+    """Sample a joint-space move at `dt_s` as one (T, DOF) array.
+
+    Without `duration_s` the move takes the shortest time that keeps every joint inside its
+    `max_vel_deg_s` / `max_acc_deg_s2`. The last row is exactly the (clamped) goal.
+    """
+    model = as_kinematic_model(joints)
+    q0 = model.clamp(np.asarray(q_start_deg, dtype=float))
+    q1 = model.clamp(np.asarray(q_goal_deg, dtype=float))
+    delta = q1 - q0
+    duration, s_vel, s_acc, steps = _plan(
+        profile, delta, model.max_vel_deg_s, model.max_acc_deg_s2, dt_s, duration_s
+    )
+    s = time_scaling(profile, _sample_times(0, steps, dt_s, duration), duration, s_vel, s_acc)
+    return model.clamp(q0 + s[:, None] * delta)
+
+
+def stream_joint_trajectory(
+    joints: Sequence[JointSpec],
+    q_start_deg: Sequence[float],
+    q_goal_deg: Sequence[float],
+    dt_s: float,
+    profile: str = "quintic",
+    duration_s: float | None = None,
+    chunk_steps: int = 100,
+) -> Iterator[np.ndarray]:
+    """Same samples as `joint_trajectory`, yielded as (<= chunk_steps, DOF) chunks on demand."""
+    model = as_kinematic_model(joints)
+    q0 = model.clamp(np.asarray(q_start_deg, dtype=float))
+    q1 = model.clamp(np.asarray(q_goal_deg, dtype=float))
+    delta = q1 - q0
+    duration, s_vel, s_acc, steps = _plan(
+        profile, delta, model.max_vel_deg_s, model.max_acc_deg_s2, dt_s, duration_s
+    )
+    for start in range(0, steps, chunk_steps):
+        t = _sample_times(start, min(start + chunk_steps, steps), dt_s, duration)
+        s = time_scaling(profile, t, duration, s_vel, s_acc)
+        yield model.clamp(q0 + s[:, None] * delta)
+
+
+def cartesian_trajectory(
+    p_start_m: Sequence[float],
+    p_goal_m: Sequence[float],
+    dt_s: float,
+    profile: str = "quintic",
+    duration_s: float | None = None,
+    max_speed_m_s: float = 0.25,
+    max_acc_m_s2: float = 1.0,
+) -> np.ndarray:
+    """Sample a straight-line Cartesian move at `dt_s` as one (T, 3) array of positions."""
+    p0 = np.asarray(p_start_m, dtype=float)
+    p1 = np.asarray(p_goal_m, dtype=float)
+    delta = p1 - p0
+    dist = float(np.linalg.norm(delta))
+    # Limits apply along the path, so plan on the scalar distance.
+    duration, s_vel, s_acc, steps = _plan(
+        profile, np.array([dist]), np.array([max_speed_m_s]), np.array([max_acc_m_s2]), dt_s, duration_s
+    )
+    s = time_scaling(profile, _sample_times(0, steps, dt_s, duration), duration, s_vel, s_acc)
+    return p0 + s[:, None] * delta
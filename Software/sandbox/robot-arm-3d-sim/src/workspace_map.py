@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from kinematics import (
+    JointSpec,
+    as_kinematic_model,
+    ee_position_batch,
+    ik_dls_position_only,
+    ik_dls_position_only_batch,
+    load_joint_specs,
+    random_joint_angles_deg,
+)
+
+SIM_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_DIR = SIM_ROOT / "cache"
+
+
+def config_hash(joints: Sequence[JointSpec]) -> str:
+    """Hash of everything that changes which EE position a joint vector maps to."""
+    fields = [
+        [j.joint_type, j.a_m, j.alpha_rad, j.d_m, j.theta_offset_rad, j.min_deg, j.max_deg]
+        for j in joints
+    ]
+    return hashlib.sha256(json.dumps(fields).encode("utf-8")).hexdigest()
+
+
+class WorkspaceMap:
+    """Sampled (EE position -> joint vector) table with a uniform voxel index.
+
+    Samples are sorted by voxel key so each occupied voxel is one contiguous slice; a lookup
+    scans the voxels in growing cubes around the target until the best match found is closer
+    than anything outside the cube can be.
+    """
+
+    def __init__(
+        self,
+        positions: np.ndarray,
+        joint_angles_deg: np.ndarray,
+        voxel_size_m: float,
+        key: str,
+    ) -> None:
+        positions = np.asarray(positions, dtype=float)
+        joint_angles_deg = np.asarray(joint_angles_deg, dtype=float)
+        if positions.ndim != 2 or positions.shape[1] != 3:
+            raise ValueError("positions must have shape (M, 3)")
+        if joint_angles_deg.shape[0] != positions.shape[0]:
+            raise ValueError("positions and joint_angles_deg must have the same length")
+
+        self.voxel_size_m = float(voxel_size_m)
+        self.key = key
+        self.origin = positions.min(axis=0)
+        cells = self._cell_of(positions)
+        self.dims = cells.max(axis=0) + 1
+        keys = self._key_of(cells)
+        order = np.argsort(keys, kind="stable")
+        self.positions = positions[order]
+        self.joint_angles_deg = joint_angles_deg[order]
+        self.cell_keys, self.cell_start, self.cell_count = np.unique(
+            keys[order], return_index=True, return_counts=True
+        )
+
+    def __len__(self) -> int:
+        return self.positions.shape[0]
+
+    def _cell_of(self, xyz: np.ndarray) -> np.ndarray:
+        return np.floor((xyz - self.origin) / self.voxel_size_m).astype(np.int64)
+
+    def _key_of(self, cells: np.ndarray) -> np.ndarray:
+        return (cells[..., 0] * self.dims[1] + cells[..., 1]) * self.dims[2] + cells[..., 2]
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _shell_offsets(ring: int) -> np.ndarray:
+        # Only the shell of the cube; the inner cells were scanned on earlier rings.
+        span = np.arange(-ring, ring + 1)
+        offsets = np.stack(np.meshgrid(span, span, span, indexing="ij"), axis=-1).reshape(-1, 3)
+        return offsets[np.abs(offsets).max(axis=1) == ring]
+
+    def _candidates(self, center: np.ndarray, ring: int) -> np.ndarray:
+        cells = center + self._shell_offsets(ring)
+        inside = np.all((cells >= 0) & (cells < self.dims), axis=1)
+        keys = self._key_of(cells[inside])
+        slots = np.searchsorted(self.cell_keys, keys)
+        valid = slots < self.cell_keys.size
+        slots, keys = slots[valid], keys[valid]
+        hit = slots[self.cell_keys[slots] == keys]
+        starts, counts = self.cell_start[hit], self.cell_count[hit]
+        # Expand each (start, count) run into sample indices without a Python loop.
+        run_offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return np.arange(run_offsets.size) + run_offsets
+
+    def nearest(self, target_xyz_m: Sequence[float]) -> Tuple[np.ndarray, float]:
+        """Return (joint_angles_deg, distance_m) of the stored sample closest to the target."""
+        target = np.asarray(target_xyz_m, dtype=float)
+        center = self._cell_of(target)
+        # Targets outside the sampled box start from the nearest boundary voxel.
+        center = np.clip(center, 0, self.dims - 1)
+        box_max = self.origin + self.dims * self.voxel_size_m
+        outside_m = float(np.linalg.norm(target - np.clip(target, self.origin, box_max)))
+
+        best_i, best_d = -1, math.inf
+        for ring in range(int(self.dims.max()) + 1):
+            idx = self._candidates(center, ring)
+            if idx.size:
+                d = np.linalg.norm(self.positions[idx] - target, axis=1)
+                k = int(np.argmin(d))
+                if d[k] < best_d:
+                    best_i, best_d = int(idx[k]), float(d[k])
+            # Unscanned samples are at least `ring` whole voxels beyond the target's voxel.
+            if best_i >= 0 and best_d <= math.hypot(outside_m, ring * self.voxel_size_m):
+                break
+        return self.joint_angles_deg[best_i].copy(), best_d
+
+    def nearest_batch(self, targets_xyz_m: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        targets = np.asarray(targets_xyz_m, dtype=float)
+        q = np.empty((targets.shape[0], self.joint_angles_deg.shape[1]), dtype=float)
+        dist = np.empty(targets.shape[0], dtype=float)
+        for i, target in enumerate(targets):
+            q[i], dist[i] = self.nearest(target)
+        return q, dist
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            positions=self.positions,
+            joint_angles_deg=self.joint_angles_deg,
+            origin=self.origin,
+            dims=self.dims,
+            cell_keys=self.cell_keys,
+            cell_start=self.cell_start,
+            cell_count=self.cell_count,
+            voxel_size_m=np.array(self.voxel_size_m),
+            key=np.array(self.key),
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "WorkspaceMap":
+        with np.load(path) as data:
+            wmap = cls.__new__(cls)
+            wmap.positions = data["positions"]
+            wmap.joint_angles_deg = data["joint_angles_deg"]
+            wmap.origin = data["origin"]
+            wmap.dims = data["dims"]
+            wmap.cell_keys = data["cell_keys"]
+            wmap.cell_start = data["cell_start"]
+            wmap.cell_count = data["cell_count"]
+            wmap.voxel_size_m = float(data["voxel_size_m"])
+            wmap.key = str(data["key"])
+        return wmap
+
+
+def build_workspace_map(
+    joints: Sequence[JointSpec],
+    samples: int = 200_000,
+    voxel_size_m: float = 0.02,
+    seed: int = 0,
+) -> WorkspaceMap:
+    model = as_kinematic_model(joints)
+    q = random_joint_angles_deg(model, samples, np.random.default_rng(seed))
+    positions = model.ee_position_batch(q)
+    key = f"{config_hash(model)}:{samples}:{voxel_size_m}:{seed}"
+    return WorkspaceMap(positions, q, voxel_size_m, key)
+
+
+def load_or_build_workspace_map(
+    joints: Sequence[JointSpec],
+    cache_dir: str | Path = DEFAULT_CACHE_DIR,
+    samples: int = 200_000,
+    voxel_size_m: float = 0.02,
+    seed: int = 0,
+    rebuild: bool = False,
+) -> WorkspaceMap:
+    """Load the cached map for this config, rebuilding only when the DH hash or build settings change."""
+    key = f"{config_hash(joints)}:{samples}:{voxel_size_m}:{seed}"
+    path = Path(cache_dir) / f"workspace_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}.npz"
+    if path.exists() and not rebuild:
+        wmap = WorkspaceMap.load(path)
+        if wmap.key == key:
+            return wmap
+
+    wmap = build_workspace_map(joints, samples, voxel_size_m, seed)
+    wmap.save(path)
+    return wmap
+
+
+def ik_with_workspace_seed(
+    joints: Sequence[JointSpec],
+    wmap: WorkspaceMap,
+    target_xyz_m: Sequence[float],
+    q_init_deg: Sequence[float] | None = None,
+    **ik_kwargs,
+) -> Tuple[np.ndarray, bool]:
+    """Run `ik_dls_position_only` from the nearest stored configuration.
+
+    When `q_init_deg` is given and already lands closer to the target than the map seed,
+    it is kept so consecutive solves stay on the same branch.
+    """
+    model = as_kinematic_model(joints)
+    seed, seed_dist = wmap.nearest(target_xyz_m)
+    if q_init_deg is not None:
+        init_dist = float(np.linalg.norm(model.ee_position(q_init_deg) - np.asarray(target_xyz_m)))
+        if init_dist <= seed_dist:
+            seed = np.array(q_init_deg, dtype=float)
+    return ik_dls_position_only(model, target_xyz_m, q_init_deg=seed, **ik_kwargs)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Build/load the workspace map and report IK seeding stats.")
+    ap.add_argument("--config", type=Path, default=SIM_ROOT / "configs" / "robot_arm.yaml")
+    ap.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR)
+    ap.add_argument("--samples", type=int, default=200_000)
+    ap.add_argument("--voxel-m", type=float, default=0.02)
+    ap.add_argument("--targets", type=int, default=2000, help="Harness targets used for the IK comparison")
+    ap.add_argument("--rebuild", action="store_true", help="Ignore any cached map")
+    args = ap.parse_args()
+
+    joints = load_joint_specs(args.config)
+    model = as_kinematic_model(joints)
+
+    t0 = time.perf_counter()
+    wmap = load_or_build_workspace_map(
+        model, args.cache_dir, args.samples, args.voxel_m, rebuild=args.rebuild
+    )
+    print(f"Workspace map: {len(wmap)} samples, {wmap.cell_keys.size} voxels ({time.perf_counter() - t0:.3f} s)")
+
+    # Harness targets are reachable by construction (FK of in-limit joint samples).
+    targets = ee_position_batch(model, random_joint_angles_deg(model, args.targets, np.random.default_rng(1)))
+
+    t0 = time.perf_counter()
+    seeds, seed_dist = wmap.nearest_batch(targets)
+    lookup_us = (time.perf_counter() - t0) / len(targets) * 1e6
+    print(f"Seed lookup: {lookup_us:.1f} us/target, mean seed distance {seed_dist.mean() * 1000:.1f} mm")
+
+    for label, q0 in (("default seed", None), ("map seed", seeds)):
+        _, converged, iterations = ik_dls_position_only_batch(model, targets, q_init_deg=q0)
+        print(
+            f"IK from {label}: converged {converged.mean() * 100:.1f}%, "
+            f"mean iterations {iterations.mean():.1f}, p90 {np.percentile(iterations, 90):.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
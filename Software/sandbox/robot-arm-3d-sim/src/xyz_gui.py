@@ -1,42 +1,84 @@
 from __future__ import annotations
 
+import argparse
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
-import yaml
-from matplotlib.widgets import Button, Slider, TextBox
 
+from arm_config import DEFAULT_CONFIG, ArmConfig, load_arm_config
+from cartesian_path import plan_cartesian_line
+from collision import CollisionChecker
+from ik_cache import IkSolutionCache
 from kinematics import (
-    clamp_to_limits,
-    dh_transform,
-    dof,
-    ee_position,
-    fk_chain_points,
-    initial_joint_angles_deg,
+    KinematicModel,
+    build_range_trajectory,
     ik_dls_position_only,
-    load_joint_specs,
+    initial_joint_angles_deg,
 )
+from startup_profile import StartupProfile
+from trajectory import joint_trajectory
 
 
 class ArmGui:
-    def __init__(self, config_path: Path) -> None:
+    def __init__(
+        self,
+        config_path: Path,
+        backend: str | None = None,
+        profile: StartupProfile | None = None,
+    ) -> None:
+        # Matplotlib is only imported once a window (or offscreen canvas) is really wanted.
+        import matplotlib
+
+        if backend is not None:
+            matplotlib.use(backend)
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import Button, Slider, TextBox
+
+        self._plt = plt
+        if profile is not None:
+            profile.mark("import matplotlib")
+
         self.config_path = config_path
-        self.joints = load_joint_specs(config_path)
-        self.dof = dof(self.joints)
+        self.config: ArmConfig = load_arm_config(config_path)
+        if profile is not None:
+            profile.mark(f"load config ({self.config.loaded_from})")
+        self.joints = self.config.joints
+        self.model = KinematicModel(self.joints)
+        self.dof = self.model.dof
+        self._frames = np.zeros((self.dof + 1, 4, 4), dtype=float)
+        # The IK worker thread gets its own model; KinematicModel scratch buffers are per-thread.
+        self._solver_model = KinematicModel(self.joints)
         self.q_current = initial_joint_angles_deg(self.joints)
 
-        with config_path.open("r", encoding="utf-8") as f:
-            cfg = yaml.safe_load(f)
-        ik_cfg = cfg.get("simulation", {}).get("ik", {})
-        control_cfg = cfg.get("simulation", {}).get("control", {})
-        self.ik_max_iters = int(ik_cfg.get("max_iters", 120))
-        self.ik_damping = float(ik_cfg.get("damping", 0.04))
-        self.ik_tol = float(ik_cfg.get("tolerance_m", 1e-3))
-        self.dt_s = float(control_cfg.get("dt_s", 0.01))
+        ik = self.config.ik
+        self.ik_max_iters = ik.max_iters
+        self.ik_damping = ik.damping
+        self.ik_tol = ik.tolerance_m
+        self.dt_s = self.config.control_dt_s
+        self.traj_profile = self.config.trajectory.profile
+        self.cartesian_line = self.config.trajectory.cartesian_line
+        self.max_speed_m_s = self.config.trajectory.max_speed_m_s
+        self.max_acc_m_s2 = self.config.trajectory.max_acc_m_s2
+        self.ik_cache = IkSolutionCache(
+            self._solver_model,
+            grid_m=ik.cache_grid_m,
+            seed_region_deg=ik.cache_seed_region_deg,
+            max_entries=ik.cache_max_entries,
+            max_iters=self.ik_max_iters,
+            damping=self.ik_damping,
+            tolerance_m=self.ik_tol,
+        )
+
+        # Batch checks allocate their own arrays, so the IK worker can share this checker.
+        self.collision = CollisionChecker.from_config(self.config)
+        if profile is not None:
+            profile.mark("kinematics, IK cache, collision")
 
         self.reach = sum(abs(j.a_m) + abs(j.d_m) for j in self.joints) + 0.1
-        self.target_xyz = ee_position(self.joints, self.q_current)
+        self.target_xyz = self.model.ee_position(self.q_current)
         self.view_rot_deg = np.array([0.0, 0.0, 0.0], dtype=float)
 
         self.fig = plt.figure(figsize=(11, 7))
@@ -52,12 +94,7 @@ class ArmGui:
         if hasattr(self.ax, "mouse_init"):
             self.ax.mouse_init(rotate_btn=[], zoom_btn=[])
 
-        self.line = None
-        self.joint_scatter = None
-        self.ee_scatter = None
-        self.target_scatter = None
-        self.joint_range_lines = []
-        self.joint_angle_markers = []
+        self._create_artists()
 
         self.x_box = TextBox(self.fig.add_axes([0.72, 0.75, 0.23, 0.06]), "X (m)", initial="0.0")
         self.y_box = TextBox(self.fig.add_axes([0.72, 0.66, 0.23, 0.06]), "Y (m)", initial="0.0")
@@ -97,9 +134,38 @@ class ArmGui:
             va="top",
         )
         self.ee_text = self.fig.text(0.72, 0.14, "", va="top")
+        self._dynamic_artists = [
+            self.line,
+            self.joint_scatter,
+            self.ee_scatter,
+            self.target_scatter,
+            self.arc_line,
+            self.joint_angle_markers,
+            self.ee_text,
+        ]
+        self._blit_background = None
+
+        # Motion state driven by the frame timer; IK runs on a single worker thread.
+        self._solver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ik")
+        self._pending: Future | None = None
+        self._request_id = 0
+        self._motion: np.ndarray | None = None
+        self._motion_t0 = 0.0
+        self._motion_idx = 0
+        self._motion_summary = ""
+        self._last_solve_ms = 0.0
+        self._frame_ms: deque[float] = deque(maxlen=100)
+        self._dropped_frames = 0
+        self.latency_text = self.fig.text(0.47, 0.20, "", va="top", family="monospace", fontsize=8)
+        self._timer = self.fig.canvas.new_timer(interval=max(int(self.dt_s * 1000), 1))
+        self._timer.add_callback(self._on_frame)
+        self._timer.start()
+        self.fig.canvas.mpl_connect("close_event", self._on_close)
 
         self._set_boxes_to_current_ee()
         self._draw_robot(self.q_current)
+        if profile is not None:
+            profile.mark("build figure")
 
     def _setup_axes(self) -> None:
         self.ax.set_title(f"{self.dof}-DOF Arm Target Tracking")
@@ -113,7 +179,7 @@ class ArmGui:
         self.ax.grid(True)
 
     def _set_boxes_to_current_ee(self) -> None:
-        p = ee_position(self.joints, self.q_current)
+        p = self.model.ee_position(self.q_current)
         self.x_box.set_val(f"{p[0]:.3f}")
         self.y_box.set_val(f"{p[1]:.3f}")
         self.z_box.set_val(f"{p[2]:.3f}")
@@ -127,97 +193,227 @@ class ArmGui:
         except TypeError:
             self.ax.view_init(elev=elev, azim=azim)
 
-    def _draw_robot(self, q_deg: np.ndarray) -> None:
-        points = fk_chain_points(self.joints, q_deg)
-        self._apply_camera_view()
-        if self.line is None:
-            (self.line,) = self.ax.plot(points[:, 0], points[:, 1], points[:, 2], "-o", linewidth=3)
-        else:
-            self.line.set_data(points[:, 0], points[:, 1])
-            self.line.set_3d_properties(points[:, 2])
+    def _create_artists(self) -> None:
+        # Every artist is created once here and only has its data replaced afterwards.
+        zeros = np.zeros(self.dof + 1, dtype=float)
+        (self.line,) = self.ax.plot(zeros, zeros, zeros, "-o", linewidth=3)
+        self.joint_scatter = self.ax.scatter(zeros[:-1], zeros[:-1], zeros[:-1], s=35, c="black")
+        # Real end-effector location is always shown in red.
+        self.ee_scatter = self.ax.scatter([0.0], [0.0], [0.0], s=90, c="red")
+        self.target_scatter = self.ax.scatter([0.0], [0.0], [0.0], marker="x", s=120, c="blue")
+        # All joint-range arcs share one line; a NaN row after each arc breaks it into segments.
+        (self.arc_line,) = self.ax.plot([0.0], [0.0], [0.0], color="orange", linewidth=1.6)
+        self.joint_angle_markers = self.ax.scatter(zeros[:-1], zeros[:-1], zeros[:-1], s=26, c="orange")
 
-        if self.joint_scatter is not None:
-            self.joint_scatter.remove()
-        self.joint_scatter = self.ax.scatter(
-            points[:-1, 0], points[:-1, 1], points[:-1, 2], s=35, c="black"
+        samples = 40
+        arc_angles = np.radians(
+            np.linspace(self.model.min_deg, self.model.max_deg, samples, axis=1)
         )
-
-        if self.ee_scatter is not None:
-            self.ee_scatter.remove()
-        # Real end-effector location is always shown in red.
-        self.ee_scatter = self.ax.scatter([points[-1, 0]], [points[-1, 1]], [points[-1, 2]], s=90, c="red")
-
-        if self.target_scatter is not None:
-            self.target_scatter.remove()
-        self.target_scatter = self.ax.scatter(
-            [self.target_xyz[0]],
-            [self.target_xyz[1]],
-            [self.target_xyz[2]],
-            marker="x",
-            s=120,
-            c="blue",
+        self._arc_cos = np.cos(arc_angles)[:, :, None]
+        self._arc_sin = np.sin(arc_angles)[:, :, None]
+        self._arc_points = np.full((self.dof, samples + 1, 3), np.nan, dtype=float)
+        self._arc_radius = 0.07 * self.reach
+
+    def _joint_range_geometry(self, frames: np.ndarray, q_deg: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Arc polyline (NaN-separated) and current-angle marker points for every joint at once."""
+        centers = frames[:-1, :3, 3]
+        # Frame i's x/y columns span the plane joint i+1 turns in (z is the joint axis).
+        ref = frames[:-1, :3, 0]
+        ortho = frames[:-1, :3, 1]
+        self._arc_points[:, :-1] = centers[:, None, :] + self._arc_radius * (
+            self._arc_cos * ref[:, None, :] + self._arc_sin * ortho[:, None, :]
         )
-        self._draw_joint_range_overlays(q_deg)
-
-        ee = ee_position(self.joints, q_deg)
+        a_cur = np.radians(q_deg)[:, None]
+        markers = centers + self._arc_radius * (np.cos(a_cur) * ref + np.sin(a_cur) * ortho)
+        return self._arc_points.reshape(-1, 3), markers
+
+    def _update_artists(self, q_deg: np.ndarray) -> None:
+        frames = self.model.frames(q_deg, out=self._frames)
+        points = frames[:, :3, 3].copy()
+        self.line.set_data_3d(points[:, 0], points[:, 1], points[:, 2])
+        self.joint_scatter._offsets3d = (points[:-1, 0], points[:-1, 1], points[:-1, 2])
+        self.ee_scatter._offsets3d = (points[-1:, 0], points[-1:, 1], points[-1:, 2])
+        target = np.asarray(self.target_xyz, dtype=float)
+        self.target_scatter._offsets3d = (target[:1], target[1:2], target[2:3])
+
+        arcs, markers = self._joint_range_geometry(frames, q_deg)
+        self.arc_line.set_data_3d(arcs[:, 0], arcs[:, 1], arcs[:, 2])
+        self.joint_angle_markers._offsets3d = (markers[:, 0], markers[:, 1], markers[:, 2])
+
+        ee = points[-1]
         self.ee_text.set_text(f"Real EE XYZ (m)\nX: {ee[0]: .4f}\nY: {ee[1]: .4f}\nZ: {ee[2]: .4f}")
+
+    def _draw_robot(self, q_deg: np.ndarray) -> None:
+        self._apply_camera_view()
+        self._update_artists(q_deg)
         for i, box in enumerate(self.joint_angle_boxes):
             box.set_val(f"{q_deg[i]:.2f}")
-
         self.fig.canvas.draw_idle()
 
-    def _draw_joint_range_overlays(self, q_deg: np.ndarray) -> None:
-        for line in self.joint_range_lines:
-            line.remove()
-        for marker in self.joint_angle_markers:
-            marker.remove()
-        self.joint_range_lines = []
-        self.joint_angle_markers = []
-
-        t = np.eye(4, dtype=float)
-        radius = 0.07 * self.reach
-        samples = 40
+    def _begin_blit(self) -> bool:
+        canvas = self.fig.canvas
+        if not getattr(canvas, "supports_blit", False):
+            return False
+        for artist in self._dynamic_artists:
+            artist.set_animated(True)
+        canvas.draw()
+        self._blit_background = canvas.copy_from_bbox(self.fig.bbox)
+        return True
+
+    def _end_blit(self) -> None:
+        for artist in self._dynamic_artists:
+            artist.set_animated(False)
+        self._blit_background = None
+
+    def _render_frame(self, q_deg: np.ndarray) -> None:
+        """Draw one animation frame, blitting only the moving artists when possible."""
+        self._update_artists(q_deg)
+        canvas = self.fig.canvas
+        if self._blit_background is None:
+            canvas.draw()
+            return
+        canvas.restore_region(self._blit_background)
+        for artist in self._dynamic_artists:
+            if hasattr(artist, "do_3d_projection"):
+                artist.do_3d_projection()
+            self.fig.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+
+    def _start_motion(self, traj: np.ndarray, summary: str) -> None:
+        self._end_blit()
+        self._motion = traj
+        self._motion_t0 = time.perf_counter()
+        self._motion_idx = 0
+        self._motion_summary = summary
+        self._apply_camera_view()
+        self._begin_blit()
+
+    def _stop_motion(self) -> None:
+        """Freeze at the current interpolated pose (q_current is updated every frame)."""
+        self._motion = None
+        self._end_blit()
+
+    def _on_frame(self) -> None:
+        """Timer callback: pick up finished IK solves and advance the active motion."""
+        t_start = time.perf_counter()
+        if self._pending is not None and self._pending.done():
+            future, self._pending = self._pending, None
+            try:
+                request_id, traj, summary, solve_s = future.result()
+            except Exception as exc:  # the worker's error would otherwise escape the timer callback
+                self.status_text.set_text(f"IK solve failed: {exc}")
+                self.fig.canvas.draw_idle()
+                return
+            # Results from pre-empted requests are dropped.
+            if request_id == self._request_id:
+                self._last_solve_ms = solve_s * 1000.0
+                self._start_motion(traj, summary)
+
+        if self._motion is None:
+            return
+        last = len(self._motion) - 1
+        # Show the sample due now; skipped samples count as dropped frames.
+        idx = min(int((t_start - self._motion_t0) / self.dt_s), last)
+        self._dropped_frames += max(idx - self._motion_idx - 1, 0)
+        self._motion_idx = idx
+        self.q_current = self._motion[idx].copy()
+        self._render_frame(self.q_current)
+        self._frame_ms.append((time.perf_counter() - t_start) * 1000.0)
+
+        if idx == last:
+            self._stop_motion()
+            final_err = np.linalg.norm(self.target_xyz - self.model.ee_position(self.q_current))
+            self.status_text.set_text(f"Move complete.\nFinal position error: {final_err:.4f} m\n{self._motion_summary}")
+            self._update_latency_text()
+            self._draw_robot(self.q_current)
+        elif idx % 10 == 0:
+            self._update_latency_text()
+
+    def _update_latency_text(self) -> None:
+        frame_ms = np.array(self._frame_ms) if self._frame_ms else np.zeros(1)
+        self.latency_text.set_text(
+            f"solve  {self._last_solve_ms:7.1f} ms\n"
+            f"frame  {frame_ms.mean():7.1f} ms avg / {frame_ms.max():.1f} max\n"
+            f"dropped frames {self._dropped_frames}"
+        )
 
-        for i, joint in enumerate(self.joints):
-            center = t[:3, 3].copy()
-            axis = t[:3, :3] @ np.array([0.0, 0.0, 1.0], dtype=float)
-            axis = axis / (np.linalg.norm(axis) + 1e-12)
-
-            ref = t[:3, :3] @ np.array([1.0, 0.0, 0.0], dtype=float)
-            ref = ref - axis * np.dot(ref, axis)
-            if np.linalg.norm(ref) < 1e-9:
-                ref = np.array([1.0, 0.0, 0.0], dtype=float) - axis * axis[0]
-            ref = ref / (np.linalg.norm(ref) + 1e-12)
-            ortho = np.cross(axis, ref)
-            ortho = ortho / (np.linalg.norm(ortho) + 1e-12)
-
-            arc_angles = np.radians(np.linspace(joint.min_deg, joint.max_deg, samples))
-            arc = np.array(
-                [
-                    center + radius * (np.cos(a) * ref + np.sin(a) * ortho)
-                    for a in arc_angles
-                ],
-                dtype=float,
+    def _solve_move(self, request_id: int, target: np.ndarray, q_start: np.ndarray):
+        """Runs on the IK worker thread; touches only the solver model and IK cache."""
+        t0 = time.perf_counter()
+        if self.cartesian_line:
+            plan = plan_cartesian_line(
+                self._solver_model,
+                q_start,
+                target,
+                self.dt_s,
+                profile=self.traj_profile,
+                max_speed_m_s=self.max_speed_m_s,
+                max_acc_m_s2=self.max_acc_m_s2,
+                final_max_iters=self.ik_max_iters,
+                damping=self.ik_damping,
+                tolerance_m=self.ik_tol,
+            )
+            traj = plan.q_deg
+            summary = (
+                f"Converged: {plan.converged}\nMax path deviation: {plan.max_error_m:.4f} m\n"
+                f"Solve {plan.solve_time_s * 1000:.1f} ms / budget {plan.budget_s * 1000:.0f} ms"
             )
-            (arc_line,) = self.ax.plot(arc[:, 0], arc[:, 1], arc[:, 2], color="orange", linewidth=1.6)
-            self.joint_range_lines.append(arc_line)
-
-            a_cur = np.radians(float(q_deg[i]))
-            cur = center + radius * (np.cos(a_cur) * ref + np.sin(a_cur) * ortho)
-            marker = self.ax.scatter([cur[0]], [cur[1]], [cur[2]], s=26, c="orange")
-            self.joint_angle_markers.append(marker)
-
-            theta_i = np.radians(float(q_deg[i])) + joint.theta_offset_rad
-            t = t @ dh_transform(joint.a_m, joint.alpha_rad, joint.d_m, theta_i)
-
-    def _animate_to(self, q_goal: np.ndarray) -> None:
-        q_goal = clamp_to_limits(self.joints, q_goal)
-        steps = max(25, int(np.max(np.abs(q_goal - self.q_current)) // 2) + 1)
-        for t in np.linspace(0.0, 1.0, steps):
-            q_step = self.q_current + t * (q_goal - self.q_current)
-            self._draw_robot(q_step)
-            plt.pause(self.dt_s)
-        self.q_current = q_goal.copy()
+        else:
+            q_goal, converged = self.ik_cache.solve(target, q_init_deg=q_start)
+            traj = joint_trajectory(self._solver_model, q_start, q_goal, self.dt_s, profile=self.traj_profile)
+            stats = self.ik_cache.stats
+            summary = (
+                f"Converged: {converged}\n"
+                f"IK cache: {stats.hits} hit / {stats.warm_starts} warm / {stats.misses} miss"
+            )
+        traj, note = self._stop_before_collision(traj)
+        return request_id, traj, summary + note, time.perf_counter() - t0
+
+    def _stop_before_collision(self, traj: np.ndarray) -> tuple[np.ndarray, str]:
+        """Cut a trajectory just before its first colliding sample.
+
+        A move that starts in collision may only be used to get out: it is refused if it never
+        leaves collision, and otherwise cut before the first collision after it has left.
+        """
+        idx = self.collision.first_collision(traj)
+        if idx is None:
+            return traj, ""
+        what = ", ".join(f"{a} / {b}" for a, b, _ in self.collision.contacts(traj[idx]))
+        if idx > 0:
+            return traj[:idx], f"\nStopped before collision at {idx * self.dt_s:.2f} s ({what})"
+        free = np.flatnonzero(~self.collision.collides_batch(traj))
+        if not free.size:
+            return traj[:1], f"\nRefused: move never leaves collision ({what})"
+        again = self.collision.first_collision(traj[free[0]:])
+        if again is None:
+            return traj, f"\nWarning: started in collision ({what})"
+        cut = int(free[0]) + again
+        return traj[:cut], (
+            f"\nStarted in collision ({what}); stopped before the next collision at {cut * self.dt_s:.2f} s"
+        )
+
+    def _on_close(self, _event) -> None:
+        self._timer.stop()
+        self._solver.shutdown(wait=False, cancel_futures=True)
+
+    def benchmark_render(self, frames: int = 200) -> None:
+        """Render a joint sweep as fast as possible and print the achieved frame rates."""
+        traj = build_range_trajectory(self.model, frames)
+        self._apply_camera_view()
+        results = []
+        for label, blit in (("full redraw", False), ("blit", True)):
+            if blit and not self._begin_blit():
+                continue
+            t0 = time.perf_counter()
+            for q in traj:
+                self._render_frame(q)
+            elapsed = time.perf_counter() - t0
+            self._end_blit()
+            results.append((label, frames / elapsed))
+        print(f"Renderer benchmark ({frames} frames, backend {self._plt.get_backend()}):")
+        for label, fps in results:
+            print(f"  {label:<12} {fps:8.1f} FPS")
+        print(f"  control rate {1.0 / self.dt_s:8.1f} FPS (1 / dt_s)")
 
     def on_move_clicked(self, _event) -> None:
         try:
@@ -229,21 +425,13 @@ class ArmGui:
             self.fig.canvas.draw_idle()
             return
 
-        q_goal, converged = ik_dls_position_only(
-            self.joints,
-            target_xyz_m=target,
-            q_init_deg=self.q_current,
-            max_iters=self.ik_max_iters,
-            damping=self.ik_damping,
-            tolerance_m=self.ik_tol,
-        )
+        # A new target pre-empts the current motion and re-plans from the pose shown now.
+        self._stop_motion()
+        self._request_id += 1
         self.target_xyz = target
-        self._animate_to(q_goal)
-        final_err = np.linalg.norm(target - ee_position(self.joints, self.q_current))
-        self.status_text.set_text(
-            f"Move complete.\nConverged: {converged}\nFinal position error: {final_err:.4f} m"
-        )
-        self.fig.canvas.draw_idle()
+        self._pending = self._solver.submit(self._solve_move, self._request_id, target, self.q_current.copy())
+        self.status_text.set_text("Solving IK...")
+        self._draw_robot(self.q_current)
 
     def on_set_joint_clicked(self, _event) -> None:
         try:
@@ -253,19 +441,22 @@ class ArmGui:
             self.fig.canvas.draw_idle()
             return
 
-        q_goal = clamp_to_limits(self.joints, q_goal)
-        self._animate_to(q_goal)
-
-        ee = ee_position(self.joints, self.q_current)
-        self.target_xyz = ee.copy()
-        self.status_text.set_text("Applied joint angle fields (with limit clamping).")
-        self.fig.canvas.draw_idle()
+        q_goal = self.model.clamp(q_goal)
+        self._stop_motion()
+        self._request_id += 1
+        self.target_xyz = self.model.ee_position(q_goal)
+        traj = joint_trajectory(self.model, self.q_current, q_goal, self.dt_s, profile=self.traj_profile)
+        traj, note = self._stop_before_collision(traj)
+        self._start_motion(traj, "Applied joint angle fields (with limit clamping)." + note)
+        self.status_text.set_text("Moving to joint angles...")
 
     def on_view_slider_changed(self, _val) -> None:
         self.view_rot_deg = np.array(
             [self.view_rx_slider.val, self.view_ry_slider.val, self.view_rz_slider.val], dtype=float
         )
         self._draw_robot(self.q_current)
+        if self._motion is not None:
+            self._begin_blit()
         self.status_text.set_text(f"View Rx={self.view_rot_deg[0]:.0f}, Ry={self.view_rot_deg[1]:.0f}, Rz={self.view_rot_deg[2]:.0f}")
         self.fig.canvas.draw_idle()
 
@@ -275,18 +466,62 @@ class ArmGui:
         self.view_ry_slider.set_val(0.0)
         self.view_rz_slider.set_val(0.0)
         self._draw_robot(self.q_current)
+        if self._motion is not None:
+            self._begin_blit()
         self.status_text.set_text("View rotation reset to Rx=Ry=Rz=0.")
         self.fig.canvas.draw_idle()
 
     def run(self) -> None:
-        plt.show()
-
-
-def main() -> None:
-    config_path = Path(__file__).resolve().parent.parent / "configs" / "robot_arm.yaml"
-    gui = ArmGui(config_path=config_path)
+        self._plt.show()
+
+
+def solve_headless(config_path: Path, target_xyz_m: np.ndarray, profile: StartupProfile | None = None) -> bool:
+    """Load the arm and solve one IK target without building (or importing) the GUI."""
+    config = load_arm_config(config_path)
+    if profile is not None:
+        profile.mark(f"load config ({config.loaded_from})")
+    model = KinematicModel(config.joints)
+    q, converged = ik_dls_position_only(
+        model,
+        target_xyz_m,
+        max_iters=config.ik.max_iters,
+        damping=config.ik.damping,
+        tolerance_m=config.ik.tolerance_m,
+    )
+    if profile is not None:
+        profile.mark("first IK solve")
+    err = np.linalg.norm(model.ee_position(q) - target_xyz_m)
+    print(f"Converged: {converged}, error {err:.4f} m")
+    print("Joint angles (deg): " + " ".join(f"{a:.2f}" for a in q))
+    return converged
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Robot arm XYZ GUI")
+    ap.add_argument("--config", type=Path, default=DEFAULT_CONFIG)
+    ap.add_argument("--offscreen", action="store_true", help="Render with Agg and report FPS instead of opening a window")
+    ap.add_argument("--frames", type=int, default=200, help="Frames rendered by --offscreen")
+    ap.add_argument("--solve", type=float, nargs=3, metavar=("X", "Y", "Z"),
+                    help="Solve IK for one target and print the joint angles, without the GUI")
+    ap.add_argument("--startup-profile", action="store_true", help="Print an import/init timing breakdown")
+    args = ap.parse_args()
+
+    profile = StartupProfile() if args.startup_profile else None
+    if args.solve is not None:
+        converged = solve_headless(args.config, np.array(args.solve, dtype=float), profile)
+        if profile is not None:
+            print(profile.report())
+        return 0 if converged else 1
+
+    gui = ArmGui(config_path=args.config, backend="Agg" if args.offscreen else None, profile=profile)
+    if profile is not None:
+        print(profile.report())
+    if args.offscreen:
+        gui.benchmark_render(args.frames)
+        return 0
     gui.run()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
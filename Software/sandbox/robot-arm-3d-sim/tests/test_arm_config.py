@@ -0,0 +1,57 @@
+import os
+import shutil
+
+import pytest
+
+import arm_config
+from arm_config import load_arm_config
+from conftest import SIM_ROOT
+
+CONFIG_PATH = SIM_ROOT / "configs" / "robot_arm.yaml"
+
+
+def _reload(path, cache_dir):
+    arm_config._MEMO.clear()  # behave like a fresh process
+    return load_arm_config(path, cache_dir)
+
+
+def test_cache_reused_until_file_content_changes(tmp_path):
+    path = tmp_path / "robot_arm.yaml"
+    shutil.copy(CONFIG_PATH, path)
+    cache_dir = tmp_path / "cache"
+
+    first = _reload(path, cache_dir)
+    assert first.loaded_from == "yaml"
+    assert len(list(cache_dir.glob("*.pickle"))) == 1
+    assert load_arm_config(path, cache_dir).loaded_from == "memory"
+    assert _reload(path, cache_dir) == first
+
+    # Same bytes, new mtime: the hash still matches, so no re-parse.
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    touched = _reload(path, cache_dir)
+    assert touched.loaded_from == "cache"
+    assert touched == first
+
+    path.write_text(path.read_text(encoding="utf-8").replace("a_m: 0.280", "a_m: 0.3000"), encoding="utf-8")
+    changed = load_arm_config(path, cache_dir)
+    assert changed.loaded_from == "yaml"
+    assert changed.joints[1].a_m == pytest.approx(0.300)
+    assert len(list(cache_dir.glob("*.pickle"))) == 1
+
+
+def test_loads_return_independent_copies(tmp_path):
+    a = load_arm_config(CONFIG_PATH, tmp_path)
+    a.joints[0].min_deg = -10.0
+    assert load_arm_config(CONFIG_PATH, tmp_path).joints[0].min_deg == -90.0
+
+
+def test_invalid_config_rejected(tmp_path):
+    path = tmp_path / "robot_arm.yaml"
+    text = CONFIG_PATH.read_text(encoding="utf-8")
+    path.write_text(text.replace("min_deg: -90.0", "min_deg: 120.0", 1), encoding="utf-8")
+    with pytest.raises(ValueError, match="joint_1"):
+        load_arm_config(path, None)
+    path.write_text(text.replace('profile: "quintic"', 'profile: "sigmoid"'), encoding="utf-8")
+    with pytest.raises(ValueError, match="profile"):
+        load_arm_config(path, None)
@@ -0,0 +1,21 @@
+import numpy as np
+
+from cartesian_path import plan_cartesian_line
+from conftest import SIM_ROOT
+from kinematics import ee_position, load_joint_specs
+
+CONFIG_PATH = SIM_ROOT / "configs" / "robot_arm.yaml"
+
+
+def test_plan_follows_straight_line_and_ends_on_target():
+    joints = load_joint_specs(CONFIG_PATH)
+    q_start = np.array([0.0, 30.0, 20.0, 0.0, 10.0, 0.0])
+    target = ee_position(joints, [20.0, 45.0, 10.0, 5.0, 5.0, 0.0])
+    plan = plan_cartesian_line(joints, q_start, target, dt_s=0.01)
+
+    assert plan.converged
+    assert plan.final_error_m < 1e-3
+    assert plan.max_error_m < 5e-3
+    np.testing.assert_allclose(plan.waypoints_m[-1], target)
+    assert plan.q_deg.shape == (len(plan.waypoints_m), len(joints))
+    assert plan.budget_s > 0.0
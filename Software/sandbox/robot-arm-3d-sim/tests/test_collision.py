@@ -0,0 +1,71 @@
+import numpy as np
+
+from collision import (
+    CollisionChecker,
+    Obstacle,
+    segment_box_distance,
+    segment_segment_distance,
+)
+from conftest import SIM_ROOT
+from kinematics import build_range_trajectory, ee_position, initial_joint_angles_deg, load_joint_specs
+
+CONFIG_PATH = SIM_ROOT / "configs" / "robot_arm.yaml"
+
+
+def _sample_segment(p, q, n=401):
+    s = np.linspace(0.0, 1.0, n)[:, None]
+    return p + s * (q - p)
+
+
+def test_segment_distances_match_dense_sampling():
+    rng = np.random.default_rng(5)
+    p1, q1, p2, q2 = (rng.normal(size=(100, 3)) for _ in range(4))
+    q2[:10] = p2[:10]  # point vs segment
+    lo, hi = np.array([-0.3, -0.2, -0.1]), np.array([0.2, 0.4, 0.1])
+    seg_seg = segment_segment_distance(p1, q1, p2, q2)
+    seg_box = segment_box_distance(p1, q1, lo, hi)
+    for m in range(100):
+        a, b = _sample_segment(p1[m], q1[m]), _sample_segment(p2[m], q2[m])
+        brute = np.linalg.norm(a[:, None] - b[None], axis=2).min()
+        assert seg_seg[m] <= brute + 1e-12
+        np.testing.assert_allclose(seg_seg[m], brute, atol=2e-3)
+        brute_box = np.linalg.norm(a - np.clip(a, lo, hi), axis=1).min()
+        assert seg_box[m] <= brute_box + 1e-12
+        np.testing.assert_allclose(seg_box[m], brute_box, atol=2e-3)
+
+
+def test_broad_phase_agrees_with_exact_clearance():
+    joints = load_joint_specs(CONFIG_PATH)
+    table = Obstacle("table", "box", np.array([0.0, 0.0, -0.03]), np.array([0.6, 0.6, 0.025]), ignore_links=("joint_1",))
+    ball = Obstacle("ball", "sphere", np.array([0.3, 0.2, 0.3]), radius_m=0.1)
+    checker = CollisionChecker(joints, 0.03, [table, ball])
+    # Beyond the joint limits too, so the arm can fold onto itself.
+    q = np.random.default_rng(2).uniform(-180.0, 180.0, size=(5000, len(joints)))
+    hits = checker.collides_batch(q)
+    assert 0 < hits.sum() < len(q)
+    np.testing.assert_array_equal(hits, checker.clearance_batch(q) < 0.0)
+    assert not checker.collides_batch(initial_joint_angles_deg(joints)[None])[0]
+
+
+def test_first_collision_on_trajectory():
+    joints = load_joint_specs(CONFIG_PATH)
+    traj = build_range_trajectory(joints, 1000)
+    # No self-collision over the full range of the shipped arm.
+    assert CollisionChecker(joints, 0.03).first_collision(traj) is None
+
+    ball = Obstacle("ball", "sphere", ee_position(joints, traj[600]), radius_m=0.02)
+    checker = CollisionChecker(joints, 0.03, [ball])
+    idx = checker.first_collision(traj, chunk=128)
+    assert idx is not None and idx <= 600
+    assert checker.collides_batch(traj[idx : idx + 1])[0]
+    assert not checker.collides_batch(traj[:idx]).any()
+    assert any(other == "ball" for _, other, _ in checker.contacts(traj[idx]))
+
+
+def test_shipped_base_obstacle_stops_links_folding_through_the_base():
+    joints = load_joint_specs(CONFIG_PATH)
+    checker = CollisionChecker.from_config(CONFIG_PATH)
+    q = initial_joint_angles_deg(joints)
+    assert not checker.collides_batch(q[None])[0]
+    q[1] = -90.0  # joint_2 points the upper arm straight down through the base
+    assert any(other == "base" for _, other, _ in checker.contacts(q))
@@ -0,0 +1,31 @@
+import numpy as np
+
+from conftest import SIM_ROOT
+from ik_cache import IkSolutionCache
+from kinematics import ee_position, load_joint_specs
+
+CONFIG_PATH = SIM_ROOT / "configs" / "robot_arm.yaml"
+
+
+def test_repeated_target_is_a_hit():
+    joints = load_joint_specs(CONFIG_PATH)
+    cache = IkSolutionCache(joints)
+    target = ee_position(joints, [20.0, 30.0, -20.0, 10.0, 5.0, 0.0])
+    q_first, converged = cache.solve(target)
+    assert converged
+    q_again, converged = cache.solve(target)
+    assert converged
+    np.testing.assert_array_equal(q_first, q_again)
+    # Starting from the solved pose (as the GUI does) lands on the same entry.
+    cache.solve(target, q_init_deg=q_first)
+    assert (cache.stats.hits, cache.stats.misses) == (2, 1)
+
+
+def test_lru_eviction_respects_max_entries():
+    joints = load_joint_specs(CONFIG_PATH)
+    cache = IkSolutionCache(joints, max_entries=2)
+    for q in ([0, 10, 10, 0, 0, 0], [0, 20, 10, 0, 0, 0], [0, 30, 10, 0, 0, 0]):
+        cache.solve(ee_position(joints, q), q_init_deg=q)
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+    assert cache.nbytes <= 2 * len(joints) * 8
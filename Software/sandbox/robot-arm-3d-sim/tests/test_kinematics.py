@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from conftest import SIM_ROOT
+from kinematics import (
+    KinematicModel,
+    ee_position,
+    ee_position_batch,
+    fk,
+    fk_chain_points,
+    geometric_jacobian,
+    ik_dls_position_only,
+    ik_dls_position_only_batch,
+    load_joint_specs,
+    numerical_jacobian,
+)
+
+CONFIG_PATH = SIM_ROOT / "configs" / "robot_arm.yaml"
+
+
+@pytest.fixture(scope="module")
+def joints():
+    return load_joint_specs(CONFIG_PATH)
+
+
+@pytest.fixture(scope="module")
+def sample_configs(joints):
+    rng = np.random.default_rng(7)
+    lo = np.array([j.min_deg for j in joints])
+    hi = np.array([j.max_deg for j in joints])
+    return rng.uniform(lo, hi, size=(25, len(joints)))
+
+
+def test_analytic_jacobian_matches_numeric(joints, sample_configs):
+    for q in sample_configs:
+        analytic = geometric_jacobian(joints, q)
+        # Small step so the finite-difference truncation error stays well below the tolerance.
+        numeric = numerical_jacobian(joints, q, eps_deg=1e-5)
+        assert analytic.shape == (3, len(joints))
+        np.testing.assert_allclose(analytic, numeric, atol=1e-6)
+
+
+def test_analytic_jacobian_orientation_rows_match_numeric(joints, sample_configs):
+    eps_deg = 1e-5
+    for q in sample_configs[:5]:
+        jac = geometric_jacobian(joints, q, include_orientation=True)
+        assert jac.shape == (6, len(joints))
+        # Angular velocity column from the rotation derivative: skew(w) = dR/dq R^T.
+        r0 = fk(joints, q)[:3, :3]
+        for i in range(len(joints)):
+            q_eps = q.copy()
+            q_eps[i] += eps_deg
+            dr = (fk(joints, q_eps)[:3, :3] - r0) / np.radians(eps_deg)
+            w_hat = dr @ r0.T
+            w = np.array([w_hat[2, 1], w_hat[0, 2], w_hat[1, 0]])
+            np.testing.assert_allclose(jac[3:, i], w, atol=1e-5)
+
+
+@pytest.mark.parametrize("jacobian", ["analytic", "numeric"])
+def test_ik_reaches_reachable_target(joints, sample_configs, jacobian):
+    target = ee_position(joints, sample_configs[0])
+    q, converged = ik_dls_position_only(
+        joints, target, q_init_deg=sample_configs[0] * 0.5, max_iters=400, jacobian=jacobian
+    )
+    assert converged
+    assert np.linalg.norm(ee_position(joints, q) - target) < 1e-3
+
+
+def test_batch_ik_matches_single_solves(joints, sample_configs):
+    targets = ee_position_batch(joints, sample_configs)
+    q, converged, iterations = ik_dls_position_only_batch(joints, targets)
+    assert q.shape == sample_configs.shape
+    for i, target in enumerate(targets):
+        q_single, conv_single = ik_dls_position_only(joints, target)
+        assert converged[i] == conv_single
+        np.testing.assert_allclose(q[i], q_single, atol=1e-6)
+    assert np.all(iterations[~converged] == 120)
+    errors = np.linalg.norm(ee_position_batch(joints, q[converged]) - targets[converged], axis=1)
+    assert np.all(errors < 1e-3)
+
+
+def test_batch_fk_matches_per_sample_reference(joints, sample_configs):
+    model = KinematicModel(joints)
+    frames = model.fk_batch(sample_configs)
+    chains = model.chain_batch(sample_configs)
+    assert frames.shape == (len(sample_configs), 4, 4)
+    assert chains.shape == (len(sample_configs), len(joints) + 1, 3)
+    np.testing.assert_allclose(frames, np.stack([fk(joints, q) for q in sample_configs]), atol=1e-12)
+    np.testing.assert_allclose(chains, np.stack([fk_chain_points(joints, q) for q in sample_configs]), atol=1e-12)
+
+
+def test_kinematic_model_matches_reference_functions(joints, sample_configs):
+    model = KinematicModel(joints)
+    fk_out = np.empty((4, 4))
+    chain_out = np.empty((len(joints) + 1, 3))
+    jac_out = np.empty((6, len(joints)))
+    for q in sample_configs:
+        assert model.fk(q, out=fk_out) is fk_out
+        np.testing.assert_allclose(fk_out, fk(joints, q), atol=1e-12)
+        np.testing.assert_allclose(model.chain(q, out=chain_out), fk_chain_points(joints, q), atol=1e-12)
+        model.jacobian(q, include_orientation=True, out=jac_out)
+        np.testing.assert_allclose(jac_out[:3], numerical_jacobian(joints, q, eps_deg=1e-5), atol=1e-6)
+
+    np.testing.assert_allclose(model.fk_batch(sample_configs)[3], fk(joints, sample_configs[3]), atol=1e-12)
+    wide = np.full(len(joints), 500.0)
+    np.testing.assert_array_equal(model.clamp(wide), [j.max_deg for j in joints])
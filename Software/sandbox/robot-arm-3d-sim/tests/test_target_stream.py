@@ -0,0 +1,94 @@
+import time
+
+import numpy as np
+import pytest
+
+from conftest import SIM_ROOT
+from kinematics import ee_position, load_joint_specs
+from target_stream import IkTargetStream
+
+CONFIG_PATH = SIM_ROOT / "configs" / "robot_arm.yaml"
+
+
+def test_streamed_target_is_solved_with_latency_breakdown():
+    joints = load_joint_specs(CONFIG_PATH)
+    stream = IkTargetStream.from_config(CONFIG_PATH)
+    try:
+        target = ee_position(joints, [20.0, 30.0, -20.0, 10.0, 5.0, 0.0])
+        stream.submit(target, stages_ms={"detect": 5.0, "pnp": 0.1})
+        assert stream.wait_idle(timeout=5.0)
+        solution = stream.latest
+        assert solution is not None and solution.converged
+        np.testing.assert_allclose(ee_position(joints, solution.q_deg), target, atol=1e-3)
+        assert {"detect", "pnp", "ik_wait", "ik", "total"} <= set(solution.stages_ms)
+        assert set(stream.latency.percentiles()) == set(solution.stages_ms)
+    finally:
+        stream.close()
+
+
+def test_only_the_newest_pending_target_is_solved():
+    joints = load_joint_specs(CONFIG_PATH)
+    stream = IkTargetStream.from_config(CONFIG_PATH, start=False)
+    targets = [ee_position(joints, [0.0, a, 10.0, 0.0, 0.0, 0.0]) for a in (10.0, 20.0, 30.0)]
+    for target in targets:
+        stream.submit(target)
+    stream.start()
+    try:
+        assert stream.wait_idle(timeout=5.0)
+        assert (stream.solved, stream.superseded) == (1, 2)
+        np.testing.assert_array_equal(stream.latest.sample.target_xyz_m, targets[-1])
+    finally:
+        stream.close()
+
+
+def test_stale_target_is_skipped():
+    joints = load_joint_specs(CONFIG_PATH)
+    stream = IkTargetStream.from_config(CONFIG_PATH, max_age_s=0.05, start=False)
+    try:
+        target = ee_position(joints, [0.0, 20.0, 10.0, 0.0, 0.0, 0.0])
+        stream.submit(target)
+        time.sleep(0.1)  # waits for IK longer than max_age_s
+        stream.start()
+        assert stream.wait_idle(timeout=5.0)
+        assert (stream.solved, stream.stale) == (0, 1)
+        assert stream.latest is None
+    finally:
+        stream.close()
+
+
+def test_late_older_target_counts_as_reordered():
+    joints = load_joint_specs(CONFIG_PATH)
+    stream = IkTargetStream.from_config(CONFIG_PATH, start=False)
+    now = time.perf_counter()
+    newer = ee_position(joints, [0.0, 20.0, 10.0, 0.0, 0.0, 0.0])
+    stream.submit(newer, created_at=now)
+    # Captured earlier; upstream latency alone does not make it stale.
+    stream.submit(ee_position(joints, [0.0, 10.0, 10.0, 0.0, 0.0, 0.0]), created_at=now - 1.0)
+    stream.start()
+    try:
+        assert stream.wait_idle(timeout=5.0)
+        assert (stream.solved, stream.superseded, stream.reordered) == (1, 0, 1)
+        np.testing.assert_array_equal(stream.latest.sample.target_xyz_m, newer)
+    finally:
+        stream.close()
+
+
+def test_callback_error_keeps_the_stream_alive_and_is_reraised():
+    joints = load_joint_specs(CONFIG_PATH)
+    calls = []
+
+    def on_solution(solution):
+        calls.append(solution)
+        if len(calls) == 1:
+            raise RuntimeError("display went away")
+
+    stream = IkTargetStream.from_config(CONFIG_PATH, on_solution=on_solution)
+    try:
+        stream.submit(ee_position(joints, [0.0, 20.0, 10.0, 0.0, 0.0, 0.0]))
+        with pytest.raises(RuntimeError, match="display went away"):
+            stream.wait_idle(timeout=5.0)
+        stream.submit(ee_position(joints, [0.0, 30.0, 10.0, 0.0, 0.0, 0.0]))
+        assert stream.wait_idle(timeout=5.0)
+        assert (stream.solved, len(calls)) == (2, 2)
+    finally:
+        stream.close()
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from conftest import SIM_ROOT
+from kinematics import load_joint_specs
+from trajectory import PROFILES, cartesian_trajectory, joint_trajectory, stream_joint_trajectory
+
+CONFIG_PATH = SIM_ROOT / "configs" / "robot_arm.yaml"
+DT = 0.01
+
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_joint_trajectory_hits_endpoints_within_limits(profile):
+    joints = load_joint_specs(CONFIG_PATH)
+    q0 = np.zeros(len(joints))
+    q1 = np.array([80.0, -60.0, 30.0, 10.0, 0.0, -90.0])
+    traj = joint_trajectory(joints, q0, q1, DT, profile=profile)
+    np.testing.assert_allclose(traj[0], q0)
+    np.testing.assert_allclose(traj[-1], q1)
+
+    vel = np.abs(np.diff(traj, axis=0)) / DT
+    assert np.all(vel <= np.array([j.max_vel_deg_s for j in joints]) * 1.001)
+    if profile != "linear":
+        acc = np.abs(np.diff(traj, n=2, axis=0)) / DT**2
+        assert np.all(acc <= np.array([j.max_acc_deg_s2 for j in joints]) * 1.01)
+
+    chunks = list(stream_joint_trajectory(joints, q0, q1, DT, profile=profile, chunk_steps=16))
+    assert max(len(c) for c in chunks) <= 16
+    np.testing.assert_array_equal(np.concatenate(chunks), traj)
+
+
+def test_cartesian_trajectory_is_straight():
+    path = cartesian_trajectory([0.1, 0.0, 0.2], [0.3, 0.1, 0.2], DT, max_speed_m_s=0.2)
+    direction = np.array([0.2, 0.1, 0.0]) / np.linalg.norm([0.2, 0.1, 0.0])
+    offsets = path - path[0]
+    np.testing.assert_allclose(np.cross(offsets, direction), 0.0, atol=1e-12)
+    assert np.all(np.linalg.norm(np.diff(path, axis=0), axis=1) / DT <= 0.2 * 1.001)
@@ -0,0 +1,32 @@
+import numpy as np
+
+from conftest import SIM_ROOT
+from kinematics import load_joint_specs
+from workspace_map import WorkspaceMap, build_workspace_map, load_or_build_workspace_map
+
+CONFIG_PATH = SIM_ROOT / "configs" / "robot_arm.yaml"
+
+
+def test_nearest_matches_brute_force():
+    joints = load_joint_specs(CONFIG_PATH)
+    wmap = build_workspace_map(joints, samples=5000, voxel_size_m=0.03)
+    # Includes targets well outside the sampled workspace.
+    targets = np.random.default_rng(3).uniform(-0.9, 0.9, size=(100, 3))
+    _, dist = wmap.nearest_batch(targets)
+    brute = np.linalg.norm(wmap.positions[None] - targets[:, None], axis=2).min(axis=1)
+    np.testing.assert_allclose(dist, brute)
+
+
+def test_cache_reused_until_dh_parameters_change(tmp_path):
+    joints = load_joint_specs(CONFIG_PATH)
+    first = load_or_build_workspace_map(joints, tmp_path, samples=2000)
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    again = load_or_build_workspace_map(joints, tmp_path, samples=2000)
+    assert again.key == first.key
+    np.testing.assert_array_equal(again.positions, first.positions)
+
+    joints[1].a_m += 0.01
+    changed = load_or_build_workspace_map(joints, tmp_path, samples=2000)
+    assert changed.key != first.key
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+    assert isinstance(WorkspaceMap.load(next(tmp_path.glob("*.npz"))), WorkspaceMap)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+bench_uart_link.py
+
+Codec and link benchmarks for the host-side UART protocol, without hardware.
+
+  codec: ns per frame for single-frame encode (struct.pack_into), batched encode
+         (record array + column-wise CRC), stream decode of a mixed-type byte stream, and
+         batched decode (record view + vectorized validation).
+  link:  commands per second, ack round-trip p50/p99, retransmits and failures against the
+         Nucleo stand-in over a socket pair and a pty, at each --loss rate (applied to both
+         commands and acks). --baud paces both ends like a real UART.
+
+  python benchmarks/bench_uart_link.py
+  python benchmarks/bench_uart_link.py --baud 115200 --messages 500 --loss 0 0.01
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+LINK_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(LINK_ROOT / "src"))
+
+from uart_codec import (  # noqa: E402
+    FORMATS,
+    MsgType,
+    StreamDecoder,
+    decode_batch,
+    encode_batch,
+    encode_into,
+    new_records,
+)
+from uart_link import HostLink, NucleoStandIn, open_loopback  # noqa: E402
+
+
+def best_ns_per_frame(fn, frames: int, repeats: int = 5) -> float:
+    fn()  # warm-up
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter_ns()
+        fn()
+        best = min(best, (time.perf_counter_ns() - t0) / frames)
+    return best
+
+
+def bench_codec(n: int) -> None:
+    fmt = FORMATS[MsgType.DESIRED_XYZ]
+    xyz = np.random.default_rng(0).uniform(-0.5, 0.5, size=(n, 3)).astype(np.float32)
+    buf = bytearray(n * fmt.size)
+
+    def encode_single():
+        off = 0
+        for i in range(n):
+            off = encode_into(buf, off, MsgType.DESIRED_XYZ, i, *xyz[i].tolist())
+
+    records = new_records(MsgType.DESIRED_XYZ, n)
+
+    def encode_batched():
+        records["x_m"], records["y_m"], records["z_m"] = xyz.T
+        encode_batch(records, MsgType.DESIRED_XYZ, 0)
+
+    encode_single()
+    data = bytes(buf)
+    decoder = StreamDecoder(capacity=n, buffer_size=len(data) + 64)
+
+    def decode_stream():
+        decoder.clear()
+        decoder.feed(data)
+        decoder.decode()
+
+    def decode_batched():
+        decode_batch(data, MsgType.DESIRED_XYZ)
+
+    encode_batched()
+    assert bytes(memoryview(records).cast("B")) == data, "batched and single-frame encodings differ"
+    print(f"Codec, {n} DESIRED_XYZ frames ({fmt.size} bytes each):")
+    for name, fn in (
+        ("encode single", encode_single),
+        ("encode batch", encode_batched),
+        ("decode stream", decode_stream),
+        ("decode batch", decode_batched),
+    ):
+        ns = best_ns_per_frame(fn, n)
+        print(f"  {name:<14} {ns:10.0f} ns/frame  {1e9 / ns:12,.0f} frames/s")
+
+
+def bench_link(kind: str, loss: float, args) -> None:
+    host_wire, device_wire = open_loopback(kind, args.baud)
+    device = NucleoStandIn(device_wire, drop_rate=loss, ack_drop_rate=loss, telemetry_hz=args.telemetry_hz, seed=1)
+    link = HostLink(host_wire, window=args.window, ack_timeout_s=args.ack_timeout_ms / 1000.0)
+    xyz = np.random.default_rng(1).uniform(-0.5, 0.5, size=(args.messages, 3))
+    try:
+        t0 = time.perf_counter()
+        for x, y, z in xyz:
+            link.send(MsgType.DESIRED_XYZ, x, y, z)
+        link.flush(timeout=60.0)
+        elapsed = time.perf_counter() - t0
+    finally:
+        link.close()
+        device.stop()
+        host_wire.close()
+        device_wire.close()
+    rtt = np.asarray(link.rtt_ms) if link.rtt_ms else np.zeros(1)
+    p50, p99 = np.percentile(rtt, [50.0, 99.0])
+    print(
+        f"  {kind:<10} {loss * 100:5.1f}% {link.sent / elapsed:10,.0f} {p50:9.3f} {p99:9.3f} "
+        f"{link.retransmits:7d} {link.failed:6d} {device.duplicates:6d} {link.forces_received:7d}"
+    )
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="UART codec and loopback link benchmark")
+    ap.add_argument("--codec-frames", type=int, default=100_000)
+    ap.add_argument("--messages", type=int, default=2000, help="Commands sent per link run")
+    ap.add_argument("--loss", type=float, nargs="+", default=[0.0, 0.01, 0.05],
+                    help="Command and ack loss rates to run")
+    ap.add_argument("--transports", nargs="+", default=["socketpair", "pty"])
+    ap.add_argument("--window", type=int, default=8, help="Commands in flight")
+    ap.add_argument("--ack-timeout-ms", type=float, default=20.0)
+    ap.add_argument("--baud", type=int, default=None, help="Pace both ends at this UART rate (8N1)")
+    ap.add_argument("--telemetry-hz", type=float, default=100.0, help="Force readings from the stand-in")
+    args = ap.parse_args()
+
+    bench_codec(args.codec_frames)
+    print(f"\nLink: {args.messages} DESIRED_XYZ commands, window {args.window}, "
+          f"ack timeout {args.ack_timeout_ms:.0f} ms, baud {args.baud or 'unpaced'}")
+    print(f"  {'transport':<10} {'loss':>6} {'cmds/s':>10} {'RTT p50':>9} {'RTT p99':>9} "
+          f"{'retx':>7} {'failed':>6} {'dups':>6} {'forces':>7}")
+    for kind in args.transports:
+        for loss in args.loss:
+            bench_link(kind, loss, args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
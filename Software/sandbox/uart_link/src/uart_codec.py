@@ -0,0 +1,278 @@
+"""Fixed-layout binary frames for the Jetson <-> Nucleo UART link.
+
+Every frame is little-endian:
+
+    offset  size  field
+    0       2     sync     0xA5 0x5A
+    2       1     type     MsgType
+    3       1     length   payload bytes (fixed per type)
+    4       2     seq      sender's sequence number (wraps at 65536)
+    6       n     payload  per-type layout, see LAYOUTS
+    6+n     2     crc      CRC-16/CCITT-FALSE over type..payload
+
+Each type has one `struct.Struct` for single frames and one NumPy structured dtype with the
+same layout, so a run of frames of one type is an array of records: batches are encoded and
+validated with whole-array operations and decoded by viewing the received bytes.
+"""
+
+from __future__ import annotations
+
+import binascii
+import struct
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+SYNC = b"\xa5\x5a"
+HEADER = struct.Struct("<2sBBH")
+CRC = struct.Struct("<H")
+CRC_INIT = 0xFFFF
+
+
+class MsgType(IntEnum):
+    # Jetson -> Nucleo commands (acknowledged)
+    DESIRED_XYZ = 0x01
+    GRIPPER_CLAMP = 0x02
+    SHAKE = 0x03
+    # Nucleo -> Jetson
+    FORCE_READING = 0x10
+    ACK = 0x7F
+
+
+class AckStatus(IntEnum):
+    OK = 0
+    REJECTED = 1  # payload out of range
+    STALE = 2  # a newer command of this type was already applied; this one is ignored
+
+
+class ShakeMode(IntEnum):
+    STOP = 0
+    START = 1
+
+
+# (field name, struct code, NumPy dtype) per payload field.
+LAYOUTS: Dict[MsgType, Tuple[Tuple[str, str, str], ...]] = {
+    MsgType.DESIRED_XYZ: (("x_m", "f", "<f4"), ("y_m", "f", "<f4"), ("z_m", "f", "<f4")),
+    MsgType.GRIPPER_CLAMP: (("position", "f", "<f4"), ("force_limit_n", "f", "<f4")),
+    MsgType.SHAKE: (("mode", "B", "u1"), ("reserved", "B", "u1"), ("duration_ms", "H", "<u2")),
+    MsgType.FORCE_READING: (("force_n", "f", "<f4"), ("t_ms", "I", "<u4")),
+    MsgType.ACK: (("ack_seq", "H", "<u2"), ("ack_type", "B", "u1"), ("status", "B", "u1")),
+}
+
+ACKED_TYPES = frozenset({MsgType.DESIRED_XYZ, MsgType.GRIPPER_CLAMP, MsgType.SHAKE})
+
+_CRC_TABLE = np.array(
+    [binascii.crc_hqx(bytes([b]), 0) for b in range(256)], dtype=np.uint16
+)  # crc_hqx(byte, 0) == table[byte] for the 0x1021 polynomial
+
+
+@dataclass(frozen=True)
+class FrameFormat:
+    msg_type: MsgType
+    fields: Tuple[str, ...]
+    packer: struct.Struct  # whole frame, CRC included
+    dtype: np.dtype  # same layout as packer
+
+    @property
+    def size(self) -> int:
+        return self.packer.size
+
+    @property
+    def payload_size(self) -> int:
+        return self.size - HEADER.size - CRC.size
+
+
+def _frame_format(msg_type: MsgType) -> FrameFormat:
+    layout = LAYOUTS[msg_type]
+    packer = struct.Struct("<2sBBH" + "".join(code for _, code, _ in layout) + "H")
+    dtype = np.dtype(
+        [("sync", "u1", (2,)), ("type", "u1"), ("length", "u1"), ("seq", "<u2")]
+        + [(name, dt) for name, _, dt in layout]
+        + [("crc", "<u2")]
+    )
+    if dtype.itemsize != packer.size:
+        raise AssertionError(f"{msg_type.name}: dtype and struct layouts differ")
+    return FrameFormat(msg_type, tuple(name for name, _, _ in layout), packer, dtype)
+
+
+FORMATS: Dict[MsgType, FrameFormat] = {t: _frame_format(t) for t in MsgType}
+MAX_FRAME_SIZE = max(f.size for f in FORMATS.values())
+
+
+def crc16(data) -> int:
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF) of a bytes-like object."""
+    return binascii.crc_hqx(data, CRC_INIT)
+
+
+def crc16_batch(rows: np.ndarray) -> np.ndarray:
+    """CRC-16/CCITT-FALSE of every row of a (N, L) uint8 array, one byte column at a time."""
+    crc = np.full(rows.shape[0], CRC_INIT, dtype=np.uint16)
+    for k in range(rows.shape[1]):
+        crc = (crc << 8) ^ _CRC_TABLE[(crc >> 8) ^ rows[:, k]]
+    return crc
+
+
+def encode_into(buf, offset: int, msg_type: MsgType, seq: int, *values) -> int:
+    """Pack one frame into a writable buffer at offset; returns the offset after it."""
+    fmt = FORMATS[msg_type]
+    fmt.packer.pack_into(buf, offset, SYNC, msg_type, fmt.payload_size, seq & 0xFFFF, *values, 0)
+    end = offset + fmt.size
+    CRC.pack_into(buf, end - CRC.size, crc16(memoryview(buf)[offset + 2 : end - CRC.size]))
+    return end
+
+
+def encode(msg_type: MsgType, seq: int, *values) -> bytes:
+    buf = bytearray(FORMATS[msg_type].size)
+    encode_into(buf, 0, msg_type, seq, *values)
+    return bytes(buf)
+
+
+def new_records(msg_type: MsgType, n: int) -> np.ndarray:
+    """Zeroed record array of n frames of one type (headers filled in by encode_batch)."""
+    return np.zeros(n, dtype=FORMATS[msg_type].dtype)
+
+
+def encode_batch(records: np.ndarray, msg_type: MsgType, first_seq: int) -> memoryview:
+    """Fill headers, sequence numbers and CRCs of a record array in place.
+
+    The payload fields must already be set. Returns a byte view of the records, ready to be
+    written to the port with no further copy.
+    """
+    fmt = FORMATS[msg_type]
+    if records.dtype != fmt.dtype:
+        raise ValueError(f"records must have the {msg_type.name} frame dtype")
+    records["sync"] = np.frombuffer(SYNC, dtype=np.uint8)
+    records["type"] = msg_type
+    records["length"] = fmt.payload_size
+    records["seq"] = (first_seq + np.arange(len(records))) & 0xFFFF
+    rows = records.view(np.uint8).reshape(len(records), fmt.size)
+    records["crc"] = crc16_batch(rows[:, 2 : fmt.size - CRC.size])
+    return memoryview(records).cast("B")
+
+
+def decode_batch(data, msg_type: MsgType) -> Tuple[np.ndarray, np.ndarray]:
+    """View a buffer holding back-to-back frames of one type as records, without copying.
+
+    Returns (records, valid): valid is False for frames whose sync, type, length or CRC is
+    wrong. The records alias `data`, so copy them before the buffer is reused.
+    """
+    fmt = FORMATS[msg_type]
+    records = np.frombuffer(data, dtype=fmt.dtype, count=len(data) // fmt.size)
+    rows = records.view(np.uint8).reshape(len(records), fmt.size)
+    valid = (
+        (rows[:, 0] == SYNC[0])
+        & (rows[:, 1] == SYNC[1])
+        & (records["type"] == msg_type)
+        & (records["length"] == fmt.payload_size)
+        & (crc16_batch(rows[:, 2 : fmt.size - CRC.size]) == records["crc"])
+    )
+    return records, valid
+
+
+def unpack(msg_type: MsgType, frame) -> Tuple[int, tuple]:
+    """(seq, payload values) of one frame known to be valid."""
+    values = FORMATS[msg_type].packer.unpack(frame)
+    return values[3], values[4:-1]
+
+
+class StreamDecoder:
+    """Splits a byte stream into frames, resynchronizing on the sync bytes after garbage.
+
+    Bytes are received straight into a preallocated buffer (`recv_buffer` / `commit`), and
+    valid frames are copied from there into preallocated per-type record arrays with
+    memoryview slice assignment. `frames(msg_type)` is a view of the records decoded since
+    the last `clear()`.
+    """
+
+    def __init__(self, capacity: int = 1024, buffer_size: int = 65536) -> None:
+        self._buf = bytearray(buffer_size)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+        self.capacity = capacity
+        self.records = {t: new_records(t, capacity) for t in MsgType}
+        self._record_bytes = {t: memoryview(r).cast("B") for t, r in self.records.items()}
+        self.counts = {t: 0 for t in MsgType}
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+        self.overflows = 0
+
+    def recv_buffer(self) -> memoryview:
+        """Free space to receive into (e.g. sock.recv_into / os.readv); call commit(n) after."""
+        if self._start and self._end + MAX_FRAME_SIZE > len(self._buf):
+            # Move the unparsed tail to the front; at most one partial frame plus garbage.
+            remaining = self._end - self._start
+            self._view[:remaining] = self._view[self._start : self._end]
+            self._start, self._end = 0, remaining
+        return self._view[self._end :]
+
+    def commit(self, n: int) -> None:
+        self._end += n
+
+    def feed(self, data) -> None:
+        """Copy bytes in (for sources that hand out their own buffers)."""
+        data = memoryview(data).cast("B")
+        while len(data):
+            space = self.recv_buffer()
+            if not len(space):
+                raise BufferError("StreamDecoder buffer full; call decode() more often")
+            n = min(len(space), len(data))
+            space[:n] = data[:n]
+            self.commit(n)
+            data = data[n:]
+
+    def decode(self) -> List[Tuple[MsgType, int]]:
+        """Parse every complete frame buffered so far.
+
+        Returns (type, record index) in arrival order for the new frames; a type whose
+        record array is full drops further frames (counted in `overflows`).
+        """
+        buf, view = self._buf, self._view
+        pos, end = self._start, self._end
+        new = []
+        while end - pos >= HEADER.size:
+            if buf[pos] != SYNC[0] or buf[pos + 1] != SYNC[1]:
+                nxt = buf.find(SYNC, pos + 1, end)
+                skip_to = end - 1 if nxt < 0 else nxt
+                self.skipped_bytes += skip_to - pos
+                pos = skip_to
+                continue
+            try:
+                fmt = FORMATS[MsgType(buf[pos + 2])]
+            except ValueError:
+                fmt = None
+            if fmt is None or buf[pos + 3] != fmt.payload_size:
+                self.skipped_bytes += 1
+                pos += 1
+                continue
+            if end - pos < fmt.size:
+                break
+            crc_at = pos + fmt.size - CRC.size
+            if crc16(view[pos + 2 : crc_at]) != buf[crc_at] | (buf[crc_at + 1] << 8):
+                self.crc_errors += 1
+                self.skipped_bytes += 1
+                pos += 1
+                continue
+            t = fmt.msg_type
+            i = self.counts[t]
+            if i < self.capacity:
+                self._record_bytes[t][i * fmt.size : (i + 1) * fmt.size] = view[pos : pos + fmt.size]
+                self.counts[t] = i + 1
+                new.append((t, i))
+            else:
+                self.overflows += 1
+            pos += fmt.size
+        self._start = pos
+        if pos == end:
+            self._start = self._end = 0
+        return new
+
+    def frames(self, msg_type: MsgType) -> np.ndarray:
+        return self.records[msg_type][: self.counts[msg_type]]
+
+    def clear(self) -> None:
+        """Forget decoded records (buffered bytes are kept)."""
+        for t in self.counts:
+            self.counts[t] = 0
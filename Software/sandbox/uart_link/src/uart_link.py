@@ -0,0 +1,422 @@
+"""Host side of the Jetson <-> Nucleo UART link, plus a loopback stand-in for the Nucleo.
+
+`HostLink` sends commands with sequence numbers, keeps up to `window` of them in flight,
+and retransmits any command not acknowledged within `ack_timeout_s`. Force readings from
+the device are collected as they arrive.
+
+`NucleoStandIn` plays the device on the other end of a socket pair or pseudo-terminal
+(`open_loopback`). It applies commands and acknowledges them. A retransmitted command is
+acknowledged again but not reapplied, and one older than the last applied command of its
+type is acknowledged as STALE. It also streams force readings, and can drop frames, lose
+acks or flip bits to exercise retransmission. `baud` paces both ends like a real 8N1 UART.
+"""
+
+from __future__ import annotations
+
+import os
+import select
+import socket
+import threading
+import time
+import tty
+from collections import deque
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from uart_codec import (
+    ACKED_TYPES,
+    FORMATS,
+    AckStatus,
+    MsgType,
+    ShakeMode,
+    StreamDecoder,
+    encode,
+    encode_batch,
+    encode_into,
+    new_records,
+)
+
+BITS_PER_BYTE = 10  # 8N1: start + 8 data + stop
+
+
+class Wire:
+    """One end of a byte link (file descriptor), optionally paced at a UART baud rate."""
+
+    def __init__(self, fd: int, baud: int | None = None, owner=None) -> None:
+        self.fd = fd
+        self.baud = baud
+        self._owner = owner  # keeps a socket object (and its fd) alive
+        self._lock = threading.Lock()
+        self._line_free_at = 0.0
+        self.bytes_written = 0
+
+    def write(self, data) -> None:
+        data = memoryview(data).cast("B")
+        with self._lock:
+            if self.baud:
+                # The line is busy until the previous bytes are out; block like a full TX FIFO.
+                now = time.perf_counter()
+                start = max(now, self._line_free_at)
+                self._line_free_at = start + len(data) * BITS_PER_BYTE / self.baud
+                delay = self._line_free_at - now
+                if delay > 0:
+                    time.sleep(delay)
+            while len(data):
+                n = os.write(self.fd, data)
+                data = data[n:]
+                self.bytes_written += n
+
+    def read_into(self, view: memoryview, timeout: float) -> int:
+        """Bytes read into view (0 on timeout); raises EOFError when the other end closed."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return 0
+        try:
+            n = os.readv(self.fd, [view])
+        except OSError:  # EIO from a pty whose other end closed
+            n = 0
+        if n == 0:
+            raise EOFError
+        return n
+
+    def close(self) -> None:
+        if self._owner is not None:
+            self._owner.close()
+        else:
+            os.close(self.fd)
+
+
+def open_loopback(kind: str = "socketpair", baud: int | None = None) -> Tuple[Wire, Wire]:
+    """(host end, device end) of a socket pair or a raw-mode pseudo-terminal."""
+    if kind == "socketpair":
+        host, device = socket.socketpair()
+        return Wire(host.fileno(), baud, host), Wire(device.fileno(), baud, device)
+    if kind == "pty":
+        host_fd, device_fd = os.openpty()
+        tty.setraw(device_fd)  # no echo, no newline translation
+        return Wire(host_fd, baud), Wire(device_fd, baud)
+    raise ValueError(f"Unknown loopback kind {kind!r} (use 'socketpair' or 'pty')")
+
+
+class _ReaderThread:
+    """Receive loop shared by both ends: read, decode, hand the new frames to `handle`."""
+
+    poll_s = 0.005
+
+    def __init__(self, wire: Wire, name: str) -> None:
+        self.wire = wire
+        self.decoder = StreamDecoder()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                view = self.decoder.recv_buffer()
+                n = self.wire.read_into(view, self.poll_s)
+            except (EOFError, ValueError, OSError):
+                return
+            if n:
+                self.on_bytes(view[:n])
+                self.decoder.commit(n)
+                new = self.decoder.decode()
+                if new:
+                    self.handle(new)
+                    self.decoder.clear()
+            self.tick()
+
+    def on_bytes(self, view: memoryview) -> None:
+        pass
+
+    def handle(self, new: List[Tuple[MsgType, int]]) -> None:
+        raise NotImplementedError
+
+    def tick(self) -> None:
+        pass
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+
+class NucleoStandIn(_ReaderThread):
+    """
+    drop_rate:       fraction of received commands ignored (lost on the way in)
+    ack_drop_rate:   fraction of acks not sent (lost on the way back)
+    bit_error_rate:  probability of each received bit being flipped
+    telemetry_hz:    force readings sent per second (0 = none)
+    """
+
+    def __init__(
+        self,
+        wire: Wire,
+        drop_rate: float = 0.0,
+        ack_drop_rate: float = 0.0,
+        bit_error_rate: float = 0.0,
+        telemetry_hz: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        super().__init__(wire, "nucleo-stand-in")
+        self.drop_rate = drop_rate
+        self.ack_drop_rate = ack_drop_rate
+        self.bit_error_rate = bit_error_rate
+        self.telemetry_period_s = 1.0 / telemetry_hz if telemetry_hz > 0 else None
+        self._rng = np.random.default_rng(seed)
+        self._seen: Dict[Tuple[int, int], AckStatus] = {}  # (type, seq) -> status sent
+        self._seen_order = deque()
+        self._last_seq: Dict[MsgType, int] = {}
+        self._seq = 0
+        self._next_telemetry = time.perf_counter()
+        self._t0 = time.perf_counter()
+        self._ack = bytearray(FORMATS[MsgType.ACK].size)
+        # Device state, as the firmware would hold it.
+        self.xyz_m = np.zeros(3)
+        self.gripper_position = 0.0
+        self.force_limit_n = 0.0
+        self.shaking = False
+        self.applied = 0
+        self.duplicates = 0
+        self.stale = 0
+        self.dropped = 0
+        self.start()
+
+    def on_bytes(self, view: memoryview) -> None:
+        if not self.bit_error_rate:
+            return
+        flips = self._rng.binomial(len(view) * 8, self.bit_error_rate)
+        for bit in self._rng.integers(0, len(view) * 8, flips):
+            view[bit // 8] ^= 1 << (bit % 8)
+
+    def handle(self, new: List[Tuple[MsgType, int]]) -> None:
+        for msg_type, i in new:
+            if msg_type not in ACKED_TYPES:
+                continue
+            if self.drop_rate and self._rng.random() < self.drop_rate:
+                self.dropped += 1
+                continue
+            rec = self.decoder.records[msg_type][i]
+            seq = int(rec["seq"])
+            key = (int(msg_type), seq)
+            last = self._last_seq.get(msg_type)
+            status = self._seen.get(key)
+            if status is not None:
+                # Retransmit after a lost ack: answer the same, don't apply again.
+                self.duplicates += 1
+            else:
+                if last is not None and not 0 < (seq - last) & 0xFFFF < 0x8000:
+                    # Every command is a setpoint: a late older one must not undo a newer one.
+                    status = AckStatus.STALE
+                    self.stale += 1
+                else:
+                    self._last_seq[msg_type] = seq
+                    status = self._apply(msg_type, rec)
+                self._remember(key, status)
+            if self.ack_drop_rate and self._rng.random() < self.ack_drop_rate:
+                continue
+            encode_into(self._ack, 0, MsgType.ACK, self._next_seq(), seq, int(msg_type), int(status))
+            self.wire.write(self._ack)
+
+    def _remember(self, key: Tuple[int, int], status: AckStatus) -> None:
+        if len(self._seen_order) == 1024:
+            del self._seen[self._seen_order.popleft()]
+        self._seen_order.append(key)
+        self._seen[key] = status
+
+    def _apply(self, msg_type: MsgType, rec) -> AckStatus:
+        if msg_type == MsgType.DESIRED_XYZ:
+            xyz = np.array([rec["x_m"], rec["y_m"], rec["z_m"]], dtype=float)
+            if not np.all(np.isfinite(xyz)):
+                return AckStatus.REJECTED
+            self.xyz_m = xyz
+        elif msg_type == MsgType.GRIPPER_CLAMP:
+            if not 0.0 <= rec["position"] <= 1.0 or rec["force_limit_n"] < 0.0:
+                return AckStatus.REJECTED
+            self.gripper_position = float(rec["position"])
+            self.force_limit_n = float(rec["force_limit_n"])
+        elif msg_type == MsgType.SHAKE:
+            if rec["mode"] not in (ShakeMode.STOP, ShakeMode.START):
+                return AckStatus.REJECTED
+            self.shaking = rec["mode"] == ShakeMode.START
+        self.applied += 1
+        return AckStatus.OK
+
+    def tick(self) -> None:
+        if self.telemetry_period_s is None:
+            return
+        now = time.perf_counter()
+        if now < self._next_telemetry:
+            return
+        self._next_telemetry = now + self.telemetry_period_s
+        force = self.gripper_position * self.force_limit_n + self._rng.normal(0.0, 0.05)
+        t_ms = int((now - self._t0) * 1000.0) & 0xFFFFFFFF
+        self.wire.write(encode(MsgType.FORCE_READING, self._next_seq(), force, t_ms))
+
+    def _next_seq(self) -> int:
+        self._seq = (self._seq + 1) & 0xFFFF
+        return self._seq
+
+
+class _Pending:
+    __slots__ = ("frame", "msg_type", "sent_at", "retries")
+
+    def __init__(self, frame, msg_type: MsgType, sent_at: float) -> None:
+        self.frame = frame
+        self.msg_type = msg_type
+        self.sent_at = sent_at
+        self.retries = 0
+
+
+class HostLink(_ReaderThread):
+    """
+    window:         commands in flight before send() blocks
+    ack_timeout_s:  retransmit a command not acknowledged within this time
+    max_retries:    give up on a command (counted in `failed`) after this many retransmits
+
+    Round-trip times are only sampled for commands acknowledged on their first transmission
+    (an ack after a retransmit could belong to either copy).
+    """
+
+    def __init__(
+        self,
+        wire: Wire,
+        window: int = 8,
+        ack_timeout_s: float = 0.05,
+        max_retries: int = 5,
+        force_history: int = 4096,
+    ) -> None:
+        super().__init__(wire, "uart-host-link")
+        self.poll_s = min(self.poll_s, ack_timeout_s / 4.0)
+        self.window = window
+        self.ack_timeout_s = ack_timeout_s
+        self.max_retries = max_retries
+        self.forces = new_records(MsgType.FORCE_READING, force_history)
+        self.forces_received = 0
+        self._pending: Dict[int, _Pending] = {}
+        self._cond = threading.Condition()
+        self._seq = 0
+        self.rtt_ms: deque = deque(maxlen=100_000)
+        self.sent = 0
+        self.acked = 0
+        self.retransmits = 0
+        self.failed = 0
+        self.rejected = 0
+        self.stale = 0
+        self.start()
+
+    def _next_seq(self) -> int:
+        self._seq = (self._seq + 1) & 0xFFFF
+        return self._seq
+
+    def _wait_for_window(self, n: int, timeout: float | None) -> None:
+        if not self._cond.wait_for(lambda: len(self._pending) + n <= self.window, timeout):
+            raise TimeoutError("UART link: no acks, send window full")
+
+    def send(self, msg_type: MsgType, *values, timeout: float | None = 5.0) -> int:
+        """Send one command; blocks while the window is full. Returns its sequence number."""
+        if msg_type not in ACKED_TYPES:
+            raise ValueError(f"{msg_type.name} is not a host command")
+        with self._cond:
+            self._wait_for_window(1, timeout)
+            seq = self._next_seq()
+            frame = encode(msg_type, seq, *values)
+            self._pending[seq] = _Pending(frame, msg_type, time.perf_counter())
+            self.sent += 1
+        self.wire.write(frame)
+        return seq
+
+    def send_batch(self, records, msg_type: MsgType, timeout: float | None = 5.0) -> None:
+        """Send a record array of commands (payload fields set), window-sized chunks per write.
+
+        Headers and CRCs are written into `records`, and retransmits send straight from it, so
+        leave it untouched until `flush()` returns.
+        """
+        fmt = FORMATS[msg_type]
+        with self._cond:
+            first = (self._seq + 1) & 0xFFFF
+            self._seq = (self._seq + len(records)) & 0xFFFF
+        data = encode_batch(records, msg_type, first)
+        step = max(self.window, 1)
+        for start in range(0, len(records), step):
+            chunk = records[start : start + step]
+            with self._cond:
+                self._wait_for_window(len(chunk), timeout)
+                now = time.perf_counter()
+                for k in range(len(chunk)):
+                    i = start + k
+                    self._pending[(first + i) & 0xFFFF] = _Pending(
+                        data[i * fmt.size : (i + 1) * fmt.size], msg_type, now
+                    )
+                self.sent += len(chunk)
+            self.wire.write(data[start * fmt.size : (start + len(chunk)) * fmt.size])
+
+    def handle(self, new: List[Tuple[MsgType, int]]) -> None:
+        now = time.perf_counter()
+        records = self.decoder.records
+        with self._cond:
+            for msg_type, i in new:
+                rec = records[msg_type][i]
+                if msg_type == MsgType.ACK:
+                    pending = self._pending.pop(int(rec["ack_seq"]), None)
+                    if pending is None:
+                        continue  # ack for a copy we already counted
+                    self.acked += 1
+                    if rec["status"] == AckStatus.REJECTED:
+                        self.rejected += 1
+                    elif rec["status"] == AckStatus.STALE:
+                        self.stale += 1
+                    if pending.retries == 0:
+                        self.rtt_ms.append((now - pending.sent_at) * 1000.0)
+                elif msg_type == MsgType.FORCE_READING:
+                    self.forces[self.forces_received % len(self.forces)] = rec
+                    self.forces_received += 1
+            self._cond.notify_all()
+
+    def tick(self) -> None:
+        now = time.perf_counter()
+        resend = []
+        with self._cond:
+            failed = self.failed
+            for seq, p in list(self._pending.items()):
+                if now - p.sent_at < self.ack_timeout_s:
+                    continue
+                if p.retries >= self.max_retries:
+                    del self._pending[seq]
+                    self.failed += 1
+                    continue
+                p.retries += 1
+                p.sent_at = now
+                self.retransmits += 1
+                resend.append(p.frame)
+            if self.failed != failed:
+                self._cond.notify_all()
+        for frame in resend:
+            self.wire.write(frame)
+
+    def latest_force(self):
+        """Most recent force reading record, or None."""
+        if not self.forces_received:
+            return None
+        return self.forces[(self.forces_received - 1) % len(self.forces)].copy()
+
+    def flush(self, timeout: float | None = 5.0) -> bool:
+        """Wait until every command is acknowledged or given up on."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending, timeout)
+
+    def close(self) -> None:
+        self.stop()
+
+    def report(self) -> str:
+        lines = [
+            f"sent {self.sent}, acked {self.acked}, retransmits {self.retransmits}, "
+            f"failed {self.failed}, rejected {self.rejected}, stale {self.stale}, force readings {self.forces_received}"
+        ]
+        if self.rtt_ms:
+            rtt = np.asarray(self.rtt_ms)
+            p50, p99 = np.percentile(rtt, [50.0, 99.0])
+            lines.append(f"ack RTT {p50:.3f} ms p50 / {p99:.3f} ms p99 ({len(rtt)} samples)")
+        return "\n".join(lines)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+LINK_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(LINK_ROOT / "src"))
@@ -0,0 +1,59 @@
+import numpy as np
+
+from uart_codec import (
+    FORMATS,
+    MsgType,
+    StreamDecoder,
+    crc16,
+    crc16_batch,
+    decode_batch,
+    encode,
+    encode_batch,
+    new_records,
+    unpack,
+)
+
+
+def test_crc_matches_ccitt_false_check_value():
+    assert crc16(b"123456789") == 0x29B1
+    rows = np.frombuffer(b"123456789" * 3, dtype=np.uint8).reshape(3, 9)
+    np.testing.assert_array_equal(crc16_batch(rows), [0x29B1] * 3)
+
+
+def test_batch_encode_matches_single_frames_and_decodes_in_place():
+    xyz = np.random.default_rng(0).uniform(-1.0, 1.0, size=(50, 3)).astype(np.float32)
+    records = new_records(MsgType.DESIRED_XYZ, len(xyz))
+    records["x_m"], records["y_m"], records["z_m"] = xyz.T
+    data = bytes(encode_batch(records, MsgType.DESIRED_XYZ, first_seq=65530))
+    single = b"".join(encode(MsgType.DESIRED_XYZ, 65530 + i, *xyz[i].tolist()) for i in range(len(xyz)))
+    assert data == single
+
+    corrupted = bytearray(data)
+    corrupted[3 * FORMATS[MsgType.DESIRED_XYZ].size + 8] ^= 0x10
+    decoded, valid = decode_batch(corrupted, MsgType.DESIRED_XYZ)
+    assert valid.sum() == len(xyz) - 1 and not valid[3]
+    np.testing.assert_array_equal(decoded["x_m"][valid], xyz[valid, 0])
+    assert decoded["seq"][6] == 0  # wrapped
+
+
+def test_stream_decoder_resyncs_after_garbage_and_bad_crc():
+    frames = [
+        encode(MsgType.GRIPPER_CLAMP, 1, 0.5, 12.0),
+        encode(MsgType.SHAKE, 2, 1, 0, 750),
+        encode(MsgType.FORCE_READING, 3, 4.25, 1000),
+        encode(MsgType.ACK, 4, 2, int(MsgType.SHAKE), 0),
+    ]
+    bad = bytearray(frames[1])
+    bad[-3] ^= 0xFF
+    stream = b"\x00\xa5\x5a\x02" + frames[0] + bytes(bad) + b"junk" + b"".join(frames[1:])
+
+    decoder = StreamDecoder(capacity=8, buffer_size=256)
+    seen = []
+    for k in range(0, len(stream), 7):  # arrives in arbitrary chunks
+        decoder.feed(stream[k : k + 7])
+        seen += decoder.decode()
+    assert [t for t, _ in seen] == [MsgType.GRIPPER_CLAMP, MsgType.SHAKE, MsgType.FORCE_READING, MsgType.ACK]
+    assert decoder.crc_errors == 1
+    shake = decoder.frames(MsgType.SHAKE)[0]
+    assert (shake["seq"], shake["mode"], shake["duration_ms"]) == (2, 1, 750)
+    assert unpack(MsgType.FORCE_READING, frames[2]) == (3, (4.25, 1000))
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from uart_codec import MsgType, new_records
+from uart_link import HostLink, NucleoStandIn, open_loopback
+
+
+@pytest.mark.parametrize("kind", ["socketpair", "pty"])
+def test_commands_are_applied_once_despite_loss(kind):
+    host_wire, device_wire = open_loopback(kind)
+    device = NucleoStandIn(device_wire, drop_rate=0.1, ack_drop_rate=0.1, bit_error_rate=1e-4, seed=3)
+    link = HostLink(host_wire, window=4, ack_timeout_s=0.01, max_retries=20)
+    try:
+        for i in range(100):
+            link.send(MsgType.DESIRED_XYZ, 0.001 * i, 0.0, 0.2)
+        records = new_records(MsgType.DESIRED_XYZ, 50)
+        records["x_m"] = np.linspace(0.0, 0.5, 50)
+        records["z_m"] = 0.2
+        link.send_batch(records, MsgType.DESIRED_XYZ)
+        link.send(MsgType.GRIPPER_CLAMP, 2.0, 5.0)  # out of range
+        assert link.flush(timeout=10.0)
+    finally:
+        link.close()
+        device.stop()
+        host_wire.close()
+        device_wire.close()
+
+    assert (link.sent, link.acked, link.failed, link.rejected) == (151, 151, 0, 1)
+    assert link.retransmits > 0 and device.duplicates > 0
+    # Every valid command applied exactly once, unless a newer one overtook it.
+    assert device.applied + device.stale == 150
+    np.testing.assert_allclose(device.xyz_m, [0.5, 0.0, 0.2], atol=1e-6)
+
+
+def test_force_readings_reach_the_host():
+    host_wire, device_wire = open_loopback("socketpair")
+    device = NucleoStandIn(device_wire, telemetry_hz=500.0)
+    link = HostLink(host_wire)
+    try:
+        link.send(MsgType.GRIPPER_CLAMP, 1.0, 8.0)
+        assert link.flush(timeout=5.0)
+        deadline = link.forces_received + 5
+        for _ in range(200):
+            if link.forces_received >= deadline:
+                break
+            device._stop.wait(0.01)
+    finally:
+        link.close()
+        device.stop()
+        host_wire.close()
+        device_wire.close()
+    assert link.forces_received >= deadline
+    assert abs(float(link.latest_force()["force_n"]) - 8.0) < 0.5